@@ -9,7 +9,16 @@ of the integration.
 import sys
 import os
 
+from rl_model.payload import visualizer_fragment
 from rl_model.sample_sequences import get_case
+from rl_model.local_server import ensure_server, visualizer_url
+
+def _visualizer_url(html_path, initial_seq, target_seq):
+    """Shared local server URL (rl_model/local_server.py), or a file:// URL if it can't start."""
+    try:
+        return visualizer_url(ensure_server(), initial_seq, target_seq)
+    except (OSError, RuntimeError):
+        return f"file://{html_path}#{visualizer_fragment(initial_seq, target_seq)}"
 
 def print_header():
     print("=" * 70)
@@ -43,7 +52,6 @@ def test_visualizer_params():
     
     try:
         import webbrowser
-        import urllib.parse
         
         current_dir = os.path.dirname(os.path.abspath(__file__))
         html_path = os.path.join(current_dir, "sequence_transformation_viz.html")
@@ -52,21 +60,17 @@ def test_visualizer_params():
         initial_seq = case.initial_sequence
         target_seq = case.target_sequence
         
-        params = urllib.parse.urlencode({
-            'initial': initial_seq,
-            'target': target_seq
-        })
-        
-        file_url = f"file://{html_path}?{params}"
+        # compact 2-bit + edit-list payload (rl_model/payload.py)
+        url = _visualizer_url(html_path, initial_seq, target_seq)
         
         print(f"\n✓ HTML file found: {html_path}")
         print(f"\n✓ Test sequences (MdTFL1 → MdFT1 demo):")
         print(f"  Initial: {initial_seq}")
         print(f"  Target:  {target_seq}")
         print(f"\n✓ Opening browser with URL:")
-        print(f"  {file_url[:80]}...")
+        print(f"  {url[:80]}...")
         
-        webbrowser.open(file_url)
+        webbrowser.open(url)
         
         print(f"\n✓ Browser should open with the visualizer")
         print(f"✓ You should see the transformation animation")
@@ -128,7 +132,6 @@ def quick_test():
     
     try:
         import webbrowser
-        import urllib.parse
         
         current_dir = os.path.dirname(os.path.abspath(__file__))
         html_path = os.path.join(current_dir, "sequence_transformation_viz.html")
@@ -138,19 +141,15 @@ def quick_test():
         initial_seq = case.initial_sequence[:24]
         target_seq = case.target_sequence[:24]
         
-        params = urllib.parse.urlencode({
-            'initial': initial_seq,
-            'target': target_seq
-        })
-        
-        file_url = f"file://{html_path}?{params}"
+        # compact 2-bit + edit-list payload (rl_model/payload.py)
+        url = _visualizer_url(html_path, initial_seq, target_seq)
         
         print(f"\n✓ Quick test sequences:")
         print(f"  Initial: {initial_seq}")
         print(f"  Target:  {target_seq}")
         print(f"\n✓ This shows a trimmed MdTFL1 → MdFT1 transition")
         
-        webbrowser.open(file_url)
+        webbrowser.open(url)
         
         print(f"\n✓ Browser opened")
         input("\nPress Enter to return to menu...")
@@ -10,12 +10,26 @@ These modules are intentionally high-level and do not provide lab protocols.
 
 __all__ = [
     "env",
+    "encoding",
     "reward_model",
     "agent",
     "train",
+    "callbacks",
+    "profiling",
+    "checkpoint",
+    "serve",
+    "jobs",
+    "actor_critic",
     "encoder",
     "value",
     "scorers",
     "constraints",
     "sample_sequences",
+    "catalog",
+    "seqstore",
+    "export",
+    "payload",
+    "local_server",
+    "bench",
+    "parallel",
 ]
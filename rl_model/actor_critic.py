@@ -0,0 +1,191 @@
+"""Actor-critic trainer (A2C/PPO-style) built on SimpleEncoder and ValueHead.
+
+The policy and value heads share one ``SimpleEncoder`` trunk. Rollouts are
+collected graph-free on a ``VecSequenceEnv`` (see ``train.collect_rollout``),
+advantages come from GAE, and the update runs a few epochs of shuffled
+minibatches with an optional PPO clip. With ``epochs=1``, one minibatch and
+``clip=None`` it reduces to plain A2C.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from .agent import ReinforceAgent, masked_logits
+from .callbacks import CallbackList, PrintLogger
+from .encoder import SimpleEncoder
+from .env import VecSequenceEnv
+from .reward_model import RewardModel
+from .train import _make_constraints, _notify_batch, _reached, collect_rollout
+from .value import ValueHead
+
+
+class ActorCriticNet(nn.Module):
+    def __init__(self, seq_len, n_actions, emb_dim=128):
+        super().__init__()
+        self.encoder = SimpleEncoder(seq_len, emb_dim=emb_dim)
+        self.policy_head = nn.Linear(emb_dim, n_actions)
+        self.value_head = ValueHead(emb_dim)
+
+    def forward(self, x):
+        h = self.encoder(x)
+        return self.policy_head(h), self.value_head(h)
+
+
+class _PolicyView(nn.Module):
+    """Exposes only the logits so ReinforceAgent's sampling helpers apply as-is."""
+
+    def __init__(self, net):
+        super().__init__()
+        self.net = net
+
+    def forward(self, x):
+        return self.net(x)[0]
+
+
+class ActorCriticAgent(ReinforceAgent):
+    """ReinforceAgent-compatible agent whose policy shares a trunk with a critic."""
+
+    def __init__(self, seq_len, lr=1e-3, emb_dim=128):
+        self.seq_len = seq_len
+        self.n_bases = 4
+        self.n_actions = seq_len * self.n_bases + 1
+        # same rebuild info as ReinforceAgent, so checkpoints work unchanged;
+        # policy.state_dict() covers the whole net, critic included
+        self.policy_type = "actor_critic"
+        self.lr = lr
+        self.policy_kwargs = {"emb_dim": emb_dim}
+        self.net = ActorCriticNet(seq_len, self.n_actions, emb_dim=emb_dim)
+        self.policy = _PolicyView(self.net)
+        self.optimizer = optim.Adam(self.net.parameters(), lr=lr)
+
+    def evaluate(self, seqs, actions, action_mask=None):
+        """Return (log_probs, entropy, values) for a batch of stored steps."""
+        logits, values = self.net(self.encode_batch(seqs))
+        dist = torch.distributions.Categorical(logits=masked_logits(logits, action_mask))
+        actions = torch.as_tensor(actions).long()
+        return dist.log_prob(actions), dist.entropy(), values
+
+
+def gae(rewards, values, mask, gamma=0.99, lam=0.95):
+    """Generalized advantage estimates for ``(B, T)`` padded episodes.
+
+    Every episode is terminal at its last valid step, so the bootstrap value
+    past the end is zero. Returns ``(advantages, returns)``.
+    """
+    rewards = torch.as_tensor(rewards, dtype=torch.float32)
+    maskf = torch.as_tensor(mask, dtype=torch.float32)
+    B, T = rewards.shape
+    adv = torch.zeros(B, T)
+    next_value = torch.zeros(B)
+    next_adv = torch.zeros(B)
+    next_mask = torch.zeros(B)
+    for t in reversed(range(T)):
+        delta = rewards[:, t] + gamma * next_value * next_mask - values[:, t]
+        next_adv = delta + gamma * lam * next_adv * next_mask
+        adv[:, t] = next_adv * maskf[:, t]
+        next_value, next_mask = values[:, t], maskf[:, t]
+    return adv, (adv + values) * maskf
+
+
+def train_actor_critic(
+    episodes: int = 200,
+    batch_size: int = 32,
+    seq_len: Optional[int] = None,
+    max_edits: int = 10,
+    env: Optional[VecSequenceEnv] = None,
+    case_id: Optional[str] = None,
+    gamma: float = 0.99,
+    gae_lambda: float = 0.95,
+    lr: float = 3e-3,
+    epochs: int = 4,
+    minibatch_size: int = 64,
+    clip: Optional[float] = 0.2,
+    vf_coef: float = 0.5,
+    ent_coef: float = 0.01,
+    emb_dim: int = 128,
+    target_reward: Optional[float] = None,
+    seed: Optional[int] = None,
+    mask_actions: bool = True,
+    forbidden: Optional[List[int]] = None,
+    edit_budget: Optional[int] = None,
+    callbacks=None,
+) -> Tuple[ActorCriticAgent, VecSequenceEnv, List[float]]:
+    """Train an actor-critic agent; mirrors ``train.train_batched``'s signature and return."""
+    if epochs < 1:
+        raise ValueError("epochs must be at least 1")
+    env = env or VecSequenceEnv(
+        batch_size, seq_len=seq_len, max_edits=max_edits, case_id=case_id,
+        autoreset=False, seed=seed,
+    )
+    if env.autoreset:
+        raise ValueError("train_actor_critic needs a VecSequenceEnv with autoreset=False")
+    batch_size = env.num_envs
+    agent = ActorCriticAgent(env.seq_len, lr=lr, emb_dim=emb_dim)
+    model = RewardModel.from_env(env)
+    constraints = _make_constraints(env.seq_len, mask_actions, forbidden, edit_budget)
+    episode_scores: List[float] = []
+    cbs = CallbackList(callbacks)
+
+    obs_buf = np.empty((batch_size, env.max_edits, env.seq_len), dtype=np.uint8)
+    act_buf = np.zeros((batch_size, env.max_edits), dtype=np.int64)
+    rew_buf = np.zeros((batch_size, env.max_edits), dtype=np.float64)
+    mask_buf = np.zeros((batch_size, env.max_edits), dtype=bool)
+
+    update = 0
+    while len(episode_scores) < episodes:
+        t, final_score = collect_rollout(agent, env, model, obs_buf, act_buf, rew_buf, mask_buf, constraints)
+        mask = torch.from_numpy(mask_buf[:, :t].copy())
+        obs = torch.from_numpy(obs_buf[:, :t])[mask]
+        actions = torch.from_numpy(act_buf[:, :t])[mask]
+        n_edits = torch.arange(t).expand(mask.shape)[mask]
+        action_mask = constraints.mask(obs, n_edits) if constraints else None
+
+        with torch.no_grad():
+            old_log_probs, _, flat_values = agent.evaluate(obs, actions, action_mask)
+            values = torch.zeros(mask.shape)
+            values[mask] = flat_values
+            adv, returns = gae(rew_buf[:, :t], values, mask, gamma, gae_lambda)
+            adv, returns = adv[mask], returns[mask]
+            if adv.numel() > 1:
+                adv = (adv - adv.mean()) / (adv.std() + 1e-8)
+
+        n = len(actions)
+        # reported as NaN when the batch had no actions to train on
+        loss = None
+        for _ in range(epochs):
+            for idx in torch.randperm(n).split(minibatch_size):
+                am = action_mask[idx] if action_mask is not None else None
+                log_probs, entropy, v = agent.evaluate(obs[idx], actions[idx], am)
+                ratio = torch.exp(log_probs - old_log_probs[idx])
+                surrogate = ratio * adv[idx]
+                if clip is not None:
+                    surrogate = torch.min(surrogate, ratio.clamp(1 - clip, 1 + clip) * adv[idx])
+                loss = (
+                    -surrogate.mean()
+                    + vf_coef * (returns[idx] - v).pow(2).mean()
+                    - ent_coef * entropy.mean()
+                )
+                agent.optimizer.zero_grad()
+                loss.backward()
+                agent.optimizer.step()
+
+        first = len(episode_scores)
+        episode_scores.extend(final_score.tolist())
+        last_loss = float("nan") if loss is None else loss.item()
+        if cbs and _notify_batch(cbs, update, first, final_score, last_loss, env):
+            break
+        update += 1
+        if _reached(episode_scores, target_reward, window=max(20, batch_size)):
+            break
+
+    return agent, env, episode_scores
+
+
+if __name__ == "__main__":
+    train_actor_critic(episodes=320, callbacks=PrintLogger())
@@ -1,9 +1,37 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import random
 
+from .encoding import one_hot
 from .env import SequenceEnv
+from .profiling import NULL_TIMER
+
+
+def discounted_returns(rewards, gamma=0.99, mask=None):
+    """Discounted returns for a ``(B, T)`` reward tensor.
+
+    Runs the backward recurrence G_t = r_t + gamma * G_{t+1} over T on whole
+    columns in float64, so long horizons neither underflow nor lose
+    precision. Steps where ``mask`` is False contribute no reward.
+    """
+    rewards = torch.as_tensor(rewards, dtype=torch.float64)
+    if mask is not None:
+        rewards = rewards * torch.as_tensor(mask, dtype=torch.float64)
+    returns = torch.empty_like(rewards)
+    running = torch.zeros_like(rewards[..., 0])
+    for t in range(rewards.shape[-1] - 1, -1, -1):
+        running = rewards[..., t] + gamma * running
+        returns[..., t] = running
+    return returns
+
+
+def masked_logits(logits, action_mask=None):
+    """Set logits of disallowed actions (``action_mask`` False) to -inf."""
+    if action_mask is None:
+        return logits
+    return logits.masked_fill(~action_mask, float("-inf"))
 
 
 class PolicyNet(nn.Module):
@@ -19,58 +47,217 @@ class PolicyNet(nn.Module):
         return self.fc(x)
 
 
+class _ResidualConv(nn.Module):
+    def __init__(self, channels, kernel_size, dilation):
+        super().__init__()
+        self.conv = nn.Conv1d(
+            channels, channels, kernel_size, padding=dilation * (kernel_size // 2), dilation=dilation
+        )
+
+    def forward(self, h):
+        return h + torch.relu(self.conv(h))
+
+
+class ConvPolicyNet(nn.Module):
+    """Length-independent policy: dilated 1D convolutions over positions.
+
+    Takes the same flattened one-hot input as ``PolicyNet`` (any length L) and
+    returns ``L * 4 + 1`` logits in the same ``pos * 4 + base`` order: a 1x1
+    per-position base head plus a noop logit from mean-pooled features. The
+    parameter count depends only on ``channels``/``layers``, never on L, and
+    the cost of a forward pass is linear in L.
+    """
+
+    def __init__(self, n_bases=4, channels=32, layers=4, kernel_size=3):
+        super().__init__()
+        self.n_bases = n_bases
+        self.stem = nn.Conv1d(n_bases, channels, kernel_size, padding=kernel_size // 2)
+        # dilations 1, 2, 4, ... widen the receptive field without extra weights
+        self.blocks = nn.Sequential(
+            *[_ResidualConv(channels, kernel_size, 2 ** i) for i in range(layers)]
+        )
+        self.base_head = nn.Conv1d(channels, n_bases, 1)
+        self.noop_head = nn.Linear(channels, 1)
+
+    def forward(self, x):
+        B = x.shape[0]
+        h = x.view(B, -1, self.n_bases).transpose(1, 2)
+        h = self.blocks(torch.relu(self.stem(h)))
+        per_pos = self.base_head(h).transpose(1, 2).reshape(B, -1)
+        noop = self.noop_head(h.mean(dim=2))
+        return torch.cat([per_pos, noop], dim=1)
+
+
+POLICIES = {"mlp": PolicyNet, "conv": ConvPolicyNet}
+
+
 class ReinforceAgent:
     """Very small REINFORCE agent.
 
     Actions are flattened: pos * 4 + base_idx, plus one noop action at the end.
+    ``policy="conv"`` selects :class:`ConvPolicyNet`, whose weights do not
+    depend on ``seq_len``; pass ``seq_len`` to the action helpers when acting
+    on sequences of another length.
     """
 
-    def __init__(self, seq_len, lr=1e-3):
+    def __init__(self, seq_len, lr=1e-3, policy="mlp", **policy_kwargs):
         self.seq_len = seq_len
         self.n_bases = 4
         self.n_actions = seq_len * self.n_bases + 1
-        self.policy = PolicyNet(seq_len, self.n_actions)
+        self.policy_type = policy
+        # kept so checkpoints can rebuild the same agent
+        self.lr = lr
+        self.policy_kwargs = policy_kwargs
+        if policy == "mlp":
+            self.policy = PolicyNet(seq_len, self.n_actions, **policy_kwargs)
+        elif policy in POLICIES:
+            self.policy = POLICIES[policy](n_bases=self.n_bases, **policy_kwargs)
+        else:
+            raise ValueError(f"Unknown policy '{policy}'. Available: {', '.join(POLICIES)}")
         self.optimizer = optim.Adam(self.policy.parameters(), lr=lr)
 
     def encode_seq(self, seq):
-        # one-hot encoding
-        mapping = {"A":0, "C":1, "G":2, "T":3}
-        arr = torch.zeros(self.seq_len, 4)
-        for i, ch in enumerate(seq):
-            arr[i, mapping.get(ch,0)] = 1.0
-        return arr.view(-1)
-
-    def select_action(self, seq):
+        if isinstance(seq, torch.Tensor) and seq.is_floating_point():
+            # SequenceEnv(obs_mode="one_hot") tensor, updated in place by the
+            # env; autograd must keep its own copy for the backward pass
+            return seq.clone() if torch.is_grad_enabled() else seq
+        # one-hot encoding via the shared lookup table (str, bytes or codes)
+        return one_hot(seq)
+
+    def encode_batch(self, seqs):
+        return one_hot(seqs)
+
+    def select_actions(self, seqs, action_mask=None):
+        """Sample one action per row of a batch; returns (actions, log_probs)."""
+        logits = masked_logits(self.policy(self.encode_batch(seqs)), action_mask)
+        m = torch.distributions.Categorical(logits=logits)
+        a = m.sample()
+        return a, m.log_prob(a)
+
+    def act(self, seqs, action_mask=None):
+        """Sample actions for a batch without building an autograd graph."""
+        with torch.inference_mode():
+            logits = masked_logits(self.policy(self.encode_batch(seqs)), action_mask)
+            return torch.distributions.Categorical(logits=logits).sample()
+
+    def log_probs_of(self, seqs, actions, action_mask=None):
+        """Recompute log pi(a|s) for stored observations in one batched forward."""
+        logits = masked_logits(self.policy(self.encode_batch(seqs)), action_mask)
+        log_p = torch.log_softmax(logits, dim=-1)
+        return log_p.gather(-1, torch.as_tensor(actions).long().view(-1, 1)).squeeze(-1)
+
+    def select_action(self, seq, action_mask=None, timer=NULL_TIMER):
+        """Sample one action; ``timer`` (see ``rl_model.profiling``) gets encode/forward/sample laps."""
+        t = timer.start()
         x = self.encode_seq(seq).unsqueeze(0)
-        logits = self.policy(x)
+        t = timer.lap("encode", t)
+        logits = masked_logits(self.policy(x), action_mask)
+        t = timer.lap("forward", t)
         probs = torch.softmax(logits, dim=-1)
         m = torch.distributions.Categorical(probs)
         a = m.sample()
-        return int(a.item()), m.log_prob(a)
+        action = int(a.item())
+        timer.lap("sample", t)
+        return action, m.log_prob(a)
 
-    def action_to_env(self, action):
-        if action == self.n_actions - 1:
+    def _noop(self, seq_len=None):
+        return (seq_len or self.seq_len) * self.n_bases
+
+    def action_to_env(self, action, seq_len=None):
+        if action == self._noop(seq_len):
             return None
         pos = action // self.n_bases
         base_idx = action % self.n_bases
         base = ["A","C","G","T"][base_idx]
         return (pos, base)
 
+    def actions_to_env_batch(self, actions, seq_len=None):
+        """Map flat actions to VecSequenceEnv ``(pos, base_idx)`` rows (noop -> pos -1)."""
+        actions = np.asarray(torch.as_tensor(actions).cpu(), dtype=np.int64)
+        out = np.stack([actions // self.n_bases, actions % self.n_bases], axis=1)
+        out[actions == self._noop(seq_len)] = (-1, 0)
+        return out
+
     def update(self, log_probs, rewards, gamma=0.99):
-        # compute discounted returns
-        R = 0
-        returns = []
-        for r in reversed(rewards):
-            R = r + gamma * R
-            returns.insert(0, R)
-        returns = torch.tensor(returns)
-
-        returns = (returns - returns.mean()) / (returns.std() + 1e-8)
-        
-        loss = 0
-        for lp, R in zip(log_probs, returns):
-            loss = loss - lp * R
+        returns = discounted_returns([rewards], gamma)[0].float()
+        # a single-step episode has no spread to normalize by
+        if returns.numel() > 1:
+            returns = (returns - returns.mean()) / (returns.std() + 1e-8)
+        loss = -(torch.stack(log_probs).view(-1) * returns).sum()
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        return float(loss.item())
+
+    @staticmethod
+    def advantages(rewards, mask, gamma=0.99, baseline="mean", normalize=True):
+        """Per-step advantages for ``(B, T)`` padded episodes (zero where masked).
+
+        ``baseline`` is ``"mean"`` (subtract the per-timestep mean return over
+        the episodes still running) or ``"none"``. ``normalize`` whitens the
+        advantages over all valid steps.
+        """
+        mask = torch.as_tensor(mask, dtype=torch.bool)
+        maskf = mask.double()
+        returns = discounted_returns(rewards, gamma, mask)
+        adv = returns
+        if baseline == "mean":
+            count = maskf.sum(0).clamp(min=1)
+            adv = returns - ((returns * maskf).sum(0) / count)
+        elif baseline != "none":
+            raise ValueError(f"Unknown baseline '{baseline}'")
+        if normalize:
+            valid = adv[mask]
+            if valid.numel() > 1:
+                adv = (adv - valid.mean()) / (valid.std() + 1e-8)
+        return (adv * maskf).float()
+
+    def update_batch(self, log_probs, rewards, mask, gamma=0.99, baseline="mean", normalize=True):
+        """One optimizer step from B padded episodes.
+
+        log_probs, rewards and mask are ``(B, T)``; padded steps have mask False.
+        See :meth:`advantages` for ``baseline``/``normalize``. The loss is the
+        mean over episodes of the per-episode REINFORCE sum.
+        """
+        adv = self.advantages(rewards, mask, gamma, baseline, normalize)
+        loss = -(log_probs * adv).sum() / log_probs.shape[0]
 
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
+        return float(loss.item())
+
+    def update_from_rollout(self, obs, actions, rewards, mask, chunk_size=512, constraints=None, **kwargs):
+        """``update_batch`` for graph-free rollouts.
+
+        ``obs`` is ``(B, T, L)`` uint8 codes and ``actions`` ``(B, T)`` indices as
+        collected by :meth:`act`. Advantages do not depend on the policy, so
+        log-probs of the valid steps are recomputed in batched forwards of at
+        most ``chunk_size`` rows, each backpropagated straight away; gradients
+        accumulate into a single optimizer step and peak memory stays bounded.
+
+        If the rollout sampled under ``constraints`` the same action masks are
+        rebuilt here. Every step before t in an episode was an edit (a noop
+        ends it), so the edit count at step t is t.
+        """
+        mask = torch.as_tensor(mask, dtype=torch.bool)
+        adv = self.advantages(rewards, mask, **kwargs)[mask]
+        obs = torch.as_tensor(obs)[mask]
+        actions = torch.as_tensor(actions)[mask]
+        n_edits = torch.arange(mask.shape[1]).expand(mask.shape)[mask]
+        n_episodes = mask.shape[0]
+
+        self.optimizer.zero_grad()
+        total = 0.0
+        for start in range(0, len(actions), chunk_size):
+            stop = start + chunk_size
+            action_mask = None
+            if constraints is not None:
+                action_mask = constraints.mask(obs[start:stop], n_edits[start:stop])
+            lp = self.log_probs_of(obs[start:stop], actions[start:stop], action_mask)
+            loss = -(lp * adv[start:stop]).sum() / n_episodes
+            loss.backward()
+            total += float(loss.item())
+        self.optimizer.step()
+        return total
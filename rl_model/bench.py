@@ -0,0 +1,832 @@
+"""Small benchmarks for the RL toy (speed and sample efficiency).
+
+Each subcommand runs with fixed seeds and prints a short table:
+
+    python -m rl_model.bench reinforce --target 0.0
+
+Numbers are wall-clock on the current machine and only meaningful relative to
+each other.
+
+``suite`` is the regression suite: micro-benchmarks of the env, reward,
+encoding and agent hot paths plus ``train`` episodes/s at several sequence
+lengths, written to JSON. ``compare`` checks a new run against a baseline::
+
+    python -m rl_model.bench suite --out base.json
+    python -m rl_model.bench suite --out new.json
+    python -m rl_model.bench compare base.json new.json --threshold 0.15
+
+``compare`` exits with status 1 if any benchmark got slower than the
+threshold allows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing as mp
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+
+def _seed_all(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def _quiet(fn, *args, **kwargs):
+    """Run ``fn`` with its progress prints swallowed; return (result, seconds)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _print_rows(rows: List[Dict[str, object]]) -> None:
+    if not rows:
+        return
+    keys = list(rows[0].keys())
+    widths = {k: max(len(k), *(len(_fmt(r[k])) for r in rows)) for k in keys}
+    print("  ".join(k.ljust(widths[k]) for k in keys))
+    for r in rows:
+        print("  ".join(_fmt(r[k]).ljust(widths[k]) for k in keys))
+
+
+def _fmt(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.4g}"
+    return str(v)
+
+
+def bench_reinforce(
+    target: float = 0.0,
+    episodes: int = 3000,
+    batch_size: int = 32,
+    max_edits: int = 8,
+    lr_batched: float = 1e-2,
+    seed: int = 0,
+) -> List[Dict[str, object]]:
+    """Optimizer steps and wall time to reach ``target`` (per-episode vs batched)."""
+    from .train import train, train_batched
+
+    rows = []
+    _seed_all(seed)
+    (_, _, scores), secs = _quiet(train, episodes=episodes, max_edits=max_edits, target_reward=target)
+    rows.append({
+        "trainer": "train",
+        "episodes": len(scores),
+        "updates": len(scores),
+        "seconds": secs,
+        "reached": sum(scores[-20:]) / 20 >= target,
+    })
+
+    _seed_all(seed)
+    (_, _, scores), secs = _quiet(
+        train_batched, episodes=episodes, batch_size=batch_size, max_edits=max_edits,
+        lr=lr_batched, target_reward=target, seed=seed,
+    )
+    window = max(20, batch_size)
+    rows.append({
+        "trainer": f"train_batched(B={batch_size})",
+        "episodes": len(scores),
+        "updates": -(-len(scores) // batch_size),
+        "seconds": secs,
+        "reached": sum(scores[-window:]) / window >= target,
+    })
+    return rows
+
+
+def _rollout_memory_child(conn, kwargs) -> None:
+    from .train import train_batched
+
+    _seed_all(0)
+    (_, _, scores), secs = _quiet(train_batched, **kwargs)
+    # ru_maxrss is reported in KiB on Linux
+    conn.send((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, len(scores) / secs))
+    conn.close()
+
+
+def bench_rollout_memory(
+    max_edits_values=(10, 50, 200),
+    seq_len: int = 1000,
+    batch_size: int = 64,
+    updates: int = 3,
+) -> List[Dict[str, object]]:
+    """Peak RSS and episodes/s of train_batched with and without graph-free rollouts.
+
+    Each configuration runs in a fresh spawned process so peak RSS is not
+    shared between runs.
+    """
+    ctx = mp.get_context("spawn")
+    rows = []
+    for graph_free in (False, True):
+        for max_edits in max_edits_values:
+            kwargs = dict(
+                episodes=batch_size * updates, batch_size=batch_size, seq_len=seq_len,
+                max_edits=max_edits, graph_free=graph_free, seed=0,
+            )
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_rollout_memory_child, args=(child, kwargs))
+            proc.start()
+            rss_mb, eps = parent.recv()
+            proc.join()
+            rows.append({
+                "mode": "graph-free" if graph_free else "graph",
+                "max_edits": max_edits,
+                "peak_rss_mb": rss_mb,
+                "episodes_per_s": eps,
+            })
+    return rows
+
+
+def bench_workers(
+    workers=(1, 2, 4, 8),
+    envs_per_worker: int = 32,
+    rounds: int = 10,
+    max_edits: int = 8,
+    seq_len: Optional[int] = None,
+) -> List[Dict[str, object]]:
+    """Rollout episodes/s for the in-process loop vs RolloutWorkerPool sizes.
+
+    Each worker gets a fixed ``envs_per_worker`` slice (weak scaling), so
+    ideal scaling is linear in the worker count. Pool start-up (spawning
+    processes, importing torch) is excluded; one warm-up round is discarded.
+    """
+    from .agent import ReinforceAgent
+    from .env import VecSequenceEnv
+    from .parallel import RolloutWorkerPool
+    from .reward_model import RewardModel
+    from .train import collect_rollout
+
+    _seed_all(0)
+    env = VecSequenceEnv(envs_per_worker, seq_len=seq_len, max_edits=max_edits, autoreset=False, seed=0)
+    agent = ReinforceAgent(seq_len=env.seq_len)
+    model = RewardModel.from_env(env)
+    bufs = (
+        np.empty((env.num_envs, max_edits, env.seq_len), dtype=np.uint8),
+        np.zeros((env.num_envs, max_edits), dtype=np.int64),
+        np.zeros((env.num_envs, max_edits), dtype=np.float64),
+        np.zeros((env.num_envs, max_edits), dtype=bool),
+    )
+    collect_rollout(agent, env, model, *bufs)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        collect_rollout(agent, env, model, *bufs)
+    base = env.num_envs * rounds / (time.perf_counter() - start)
+    rows = [{"workers": 0, "episodes_per_s": base, "speedup": 1.0}]
+
+    for n in workers:
+        with RolloutWorkerPool.from_env(env, n, envs_per_worker, seed=0, policy=agent.policy) as pool:
+            pool.broadcast(agent.policy)
+            pool.rollout()
+            start = time.perf_counter()
+            for _ in range(rounds):
+                pool.broadcast(agent.policy)
+                pool.rollout()
+            eps = pool.num_envs * rounds / (time.perf_counter() - start)
+        rows.append({"workers": n, "episodes_per_s": eps, "speedup": eps / base})
+    return rows
+
+
+def bench_masking(
+    episodes: int = 960,
+    batch_size: int = 32,
+    max_edits: int = 8,
+    seeds=(0, 1, 2),
+) -> List[Dict[str, object]]:
+    """Reward per environment step for train_batched with and without action masks."""
+    from .env import VecSequenceEnv
+    from .train import train_batched
+
+    class _CountingEnv(VecSequenceEnv):
+        env_steps = 0
+
+        def step(self, actions):
+            self.env_steps += int((~self.done).sum())
+            return super().step(actions)
+
+    rows = []
+    for mask_actions in (False, True):
+        steps, total, last = 0, 0.0, []
+        for seed in seeds:
+            _seed_all(seed)
+            env = _CountingEnv(batch_size, max_edits=max_edits, autoreset=False, seed=seed)
+            (_, _, scores), _ = _quiet(
+                train_batched, episodes=episodes, env=env, lr=1e-2, mask_actions=mask_actions,
+            )
+            steps += env.env_steps
+            total += sum(scores)
+            last.append(sum(scores[-2 * batch_size:]) / (2 * batch_size))
+        rows.append({
+            "masking": mask_actions,
+            "env_steps": steps,
+            "reward_per_kstep": 1000 * total / steps,
+            "final_mean_reward": sum(last) / len(last),
+        })
+    return rows
+
+
+def bench_actor_critic(
+    target: float = 0.1,
+    episodes: int = 3200,
+    batch_size: int = 32,
+    max_edits: int = 8,
+    case_id: str = "mdtfl1_to_mdft1",
+    seed: int = 0,
+) -> List[Dict[str, object]]:
+    """Time and episodes to ``target`` for REINFORCE vs the actor-critic trainer."""
+    from .actor_critic import train_actor_critic
+    from .train import train, train_batched
+
+    runs = [
+        ("train (REINFORCE)", train, dict(max_edits=max_edits, case_id=case_id), 20),
+        ("train_batched (REINFORCE)", train_batched, dict(
+            batch_size=batch_size, max_edits=max_edits, case_id=case_id, lr=1e-2, seed=seed,
+        ), max(20, batch_size)),
+        ("train_actor_critic", train_actor_critic, dict(
+            batch_size=batch_size, max_edits=max_edits, case_id=case_id, seed=seed,
+        ), max(20, batch_size)),
+    ]
+    rows = []
+    for name, fn, kwargs, window in runs:
+        _seed_all(seed)
+        (_, _, scores), secs = _quiet(fn, episodes=episodes, target_reward=target, **kwargs)
+        final = sum(scores[-window:]) / window
+        rows.append({
+            "trainer": name,
+            "episodes": len(scores),
+            "seconds": secs,
+            "final_mean_reward": final,
+            "reached": final >= target,
+        })
+    return rows
+
+
+def _policy_scaling_child(conn, policy, seq_len, reps) -> None:
+    from .agent import ReinforceAgent
+
+    _seed_all(0)
+    torch.set_num_threads(1)
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    agent = ReinforceAgent(seq_len=seq_len, policy=policy)
+    obs = np.random.randint(0, 4, (1, seq_len), dtype=np.uint8)
+    agent.act(obs)
+    start = time.perf_counter()
+    for _ in range(reps):
+        agent.act(obs)
+    latency = (time.perf_counter() - start) / reps
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    params = sum(p.numel() for p in agent.policy.parameters())
+    conn.send((params, latency, (rss - rss0) / 1024))
+    conn.close()
+
+
+def bench_policy_scaling(
+    lengths=(60, 1_000, 10_000, 100_000),
+    policies=("mlp", "conv"),
+    reps: int = 20,
+) -> List[Dict[str, object]]:
+    """Parameters, single-sequence act() latency and memory growth per policy and L.
+
+    Every point runs in a fresh spawned process with one torch thread;
+    ``rss_delta_mb`` is the peak RSS added by building the agent and acting.
+    """
+    ctx = mp.get_context("spawn")
+    rows = []
+    for policy in policies:
+        for seq_len in lengths:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_policy_scaling_child, args=(child, policy, seq_len, reps))
+            proc.start()
+            params, latency, rss_mb = parent.recv()
+            proc.join()
+            rows.append({
+                "policy": policy,
+                "seq_len": seq_len,
+                "params": params,
+                "latency_ms": latency * 1e3,
+                "rss_delta_mb": rss_mb,
+            })
+    return rows
+
+
+def bench_episode_rate(episodes: int = 300, max_edits: int = 8, seed: int = 0) -> List[Dict[str, object]]:
+    """Episodes/s of ``train`` with the old fixed pacing vs the callback API.
+
+    The ``legacy`` row re-creates what the loop used to do inline: print every
+    20 episodes and sleep 10 ms after every episode.
+    """
+    from .callbacks import FunctionCallback, PrintLogger, RateLimited, TrainingCallback
+    from .train import train
+
+    class LegacyPacing(TrainingCallback):
+        def on_episode_end(self, episode, reward, env):
+            if episode % 20 == 0:
+                print(f"Episode {episode:3d}: reward={reward:+.4f} seq={env.sequence}")
+            time.sleep(0.01)
+
+    configs = {
+        "legacy sleep+print": [LegacyPacing()],
+        "no callbacks": None,
+        "PrintLogger": [PrintLogger()],
+        "30 Hz rate-limited": [RateLimited(FunctionCallback(lambda *a: None), 1 / 30)],
+    }
+    _quiet(train, episodes=5, max_edits=max_edits)  # warm up torch before timing
+    rows = []
+    for name, callbacks in configs.items():
+        _seed_all(seed)
+        (_, _, scores), secs = _quiet(train, episodes=episodes, max_edits=max_edits, callbacks=callbacks)
+        rows.append({"callbacks": name, "episodes": len(scores), "seconds": secs, "episodes_per_s": len(scores) / secs})
+    return rows
+
+
+def _serve_child(conn, window_ms, max_batch, seq_len, seed) -> None:
+    import asyncio
+
+    from .agent import ReinforceAgent
+    from .serve import PolicyService
+
+    torch.set_num_threads(1)
+    _seed_all(seed)
+
+    async def run():
+        service = PolicyService(ReinforceAgent(seq_len=seq_len), window_ms=window_ms, max_batch=max_batch)
+        server = await service.start("127.0.0.1", 0)
+        conn.send(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+def bench_serve(
+    windows: List[float] = (0.0, 2.0, 5.0),
+    concurrency: int = 32,
+    requests: int = 2000,
+    max_batch: int = 64,
+    seed: int = 0,
+) -> List[Dict[str, object]]:
+    """Throughput and latency of the policy service vs micro-batching window.
+
+    The first row disables batching (``max_batch=1``) as the baseline.
+    """
+    import asyncio
+
+    from .sample_sequences import get_case
+    from .serve import load_test
+
+    start = get_case().initial_sequence
+    rng = np.random.default_rng(seed)
+    # vary the requests a little so no two consecutive bodies are identical
+    seqs = []
+    for _ in range(64):
+        chars = list(start)
+        for pos in rng.integers(0, len(chars), size=3):
+            chars[pos] = "ACGT"[rng.integers(4)]
+        seqs.append("".join(chars))
+
+    ctx = mp.get_context("spawn")
+    rows = []
+    for window, batch in [(0.0, 1)] + [(w, max_batch) for w in windows]:
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_serve_child, args=(child, window, batch, len(start), seed), daemon=True)
+        proc.start()
+        try:
+            port = parent.recv()
+            # warm up the server (thread pool, first forward) before timing
+            asyncio.run(load_test("127.0.0.1", port, seqs, requests=50, concurrency=4))
+            result = asyncio.run(load_test("127.0.0.1", port, seqs, requests=requests, concurrency=concurrency))
+        finally:
+            proc.terminate()
+            proc.join()
+        rows.append({"window_ms": window, "max_batch": batch, "concurrency": concurrency, **result})
+    return rows
+
+
+def bench_export(
+    workers: List[int] = (1, 2, 4),
+    trajectories: int = 64,
+    lengths: List[int] = (500, 2_000, 8_000),
+    edits: int = 50,
+    seed: int = 0,
+) -> List[Dict[str, object]]:
+    """Trajectories/s of ``export.export_directory`` vs worker processes.
+
+    Every worker count renders the same synthetic trajectories into a fresh
+    output directory; the last row re-runs the first so every input is skipped.
+    """
+    import shutil
+    import tempfile
+
+    from .export import export_directory, save_trajectory
+
+    rng = np.random.default_rng(seed)
+    root = tempfile.mkdtemp(prefix="bench-export-")
+    try:
+        src = f"{root}/src"
+        for i in range(trajectories):
+            n = int(lengths[i % len(lengths)])
+            seq = "".join(np.array(list("ACGT"))[rng.integers(0, 4, n)])
+            pairs = [(int(p), "ACGT"[int(b)]) for p, b in zip(rng.integers(0, n, edits), rng.integers(0, 4, edits))]
+            save_trajectory(f"{src}/run{i:04d}.json", seq, pairs)
+        rows = []
+        for w in workers:
+            result = export_directory(src, f"{root}/out{w}", workers=w)
+            rows.append({"workers": w, "rendered": result["rendered"], "skipped": result["skipped"],
+                         "seconds": result["seconds"], "per_s": trajectories / result["seconds"]})
+        result = export_directory(src, f"{root}/out{workers[0]}", workers=workers[0])
+        rows.append({"workers": f"{workers[0]} (unchanged)", "rendered": result["rendered"], "skipped": result["skipped"],
+                     "seconds": result["seconds"], "per_s": trajectories / result["seconds"]})
+        return rows
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _static_server_child(conn, kind, root) -> None:
+    import http.server
+    import socketserver
+    from functools import partial
+
+    from .local_server import LocalServer
+
+    if kind == "simple":
+        class Quiet(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = socketserver.TCPServer(("127.0.0.1", 0), partial(Quiet, directory=root))
+    else:
+        server = LocalServer(("127.0.0.1", 0), root)
+    conn.send(server.server_address[1])
+    server.serve_forever()
+
+
+def bench_static_server(clients: int = 8, rounds: int = 5) -> List[Dict[str, object]]:
+    """Page-load cost of the old single-threaded ``SimpleHTTPRequestHandler``
+    vs the shared ``local_server.LocalServer``.
+
+    Each client loads the three visualizer pages, an exported plot page and
+    its 4.8 MB ``plotly.min.js``, ``rounds`` times, with all clients running
+    concurrently. The servers run in spawned processes. The local server is
+    measured cold (full gzip responses) and warm (browser-cache revalidation
+    with ``If-None-Match``).
+    """
+    import shutil
+    import tempfile
+    import urllib.error
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .local_server import REPO_ROOT
+    from .visualize import animate_edit_history
+
+    root = tempfile.mkdtemp(prefix="bench-static-")
+    try:
+        for name in ("sequence_transformation_viz.html", "gene_visualization.html", "visual_demo.html"):
+            shutil.copy(f"{REPO_ROOT}/{name}", root)
+        rng = np.random.default_rng(0)
+        seq = "".join(np.array(list("ACGT"))[rng.integers(0, 4, 1000)])
+        with contextlib.redirect_stdout(io.StringIO()):
+            animate_edit_history(seq, [(int(p), "A") for p in rng.integers(0, 1000, 50)],
+                                 out_html=f"{root}/plot.html", include_plotlyjs="directory")
+        paths = ["/sequence_transformation_viz.html", "/gene_visualization.html", "/visual_demo.html",
+                 "/plot.html", "/plotly.min.js"]
+
+        def load(base, etags, sizes):
+            for path in paths:
+                headers = {"Accept-Encoding": "gzip"}
+                if path in etags:
+                    headers["If-None-Match"] = etags[path]
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(base + path, headers=headers)) as resp:
+                        sizes.append(len(resp.read()))
+                        if resp.headers.get("ETag"):
+                            etags[path] = resp.headers["ETag"]
+                except urllib.error.HTTPError as exc:
+                    if exc.code != 304:
+                        raise
+                    sizes.append(0)
+
+        ctx = mp.get_context("spawn")
+        rows = []
+        for label, kind, revalidate in [
+            ("TCPServer + SimpleHTTPRequestHandler", "simple", False),
+            ("LocalServer (gzip, cold)", "local", False),
+            ("LocalServer (ETag revalidation)", "local", True),
+        ]:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_static_server_child, args=(child, kind, root), daemon=True)
+            proc.start()
+            try:
+                base = f"http://127.0.0.1:{parent.recv()}"
+                client_etags = [{} for _ in range(clients)]
+                for etags in client_etags:
+                    # warm-up; fills the server's compressed cache too
+                    load(base, etags if revalidate else {}, [])
+                sizes: List[int] = []
+                start = time.perf_counter()
+                with ThreadPoolExecutor(clients) as pool:
+                    for _ in range(rounds):
+                        list(pool.map(lambda e: load(base, e if revalidate else {}, sizes), client_etags))
+                secs = time.perf_counter() - start
+            finally:
+                proc.terminate()
+                proc.join()
+            loads = clients * rounds
+            rows.append({"server": label, "page_loads": loads, "seconds": secs,
+                         "ms_per_load": secs / loads * 1e3, "mb_per_load": sum(sizes) / loads / 1e6})
+        return rows
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+SUITE_FORMAT = 1
+
+
+def _time_calls(fn, setup=None, min_time: float = 0.05, repeat: int = 5) -> Dict[str, float]:
+    """Per-call seconds of ``fn``: median and min over ``repeat`` timed batches.
+
+    The batch size doubles until one batch takes ``min_time``. With ``setup``,
+    each call is ``fn(setup())`` and only ``fn`` is timed.
+    """
+
+    def run(number):
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            return time.perf_counter() - start
+        total = 0.0
+        for _ in range(number):
+            arg = setup()
+            start = time.perf_counter()
+            fn(arg)
+            total += time.perf_counter() - start
+        return total
+
+    run(1)  # warm up caches and lazy init
+    number = 1
+    while True:
+        secs = run(number)
+        if secs >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    samples = [secs / number] + [run(number) / number for _ in range(repeat - 1)]
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "number": number}
+
+
+def _suite_cases(seq_len: int, seed: int, train_episodes: int):
+    """(name, thunk) pairs for one sequence length; each thunk returns a timing dict."""
+    from .agent import ReinforceAgent
+    from .env import SequenceEnv
+    from .reward_model import compute_reward, kmer_score, motif_value
+    from .train import train
+
+    def env_step(obs_mode):
+        env = SequenceEnv(seq_len=seq_len, max_edits=10 ** 9, obs_mode=obs_mode)
+        rng = np.random.default_rng(seed)
+        actions = itertools.cycle(
+            list(zip(rng.integers(0, seq_len, 4096).tolist(), rng.choice(env.alphabet, 4096).tolist()))
+        )
+        return _time_calls(lambda: env.step(next(actions)))
+
+    def env_reset():
+        env = SequenceEnv(seq_len=seq_len, max_edits=8, obs_mode="one_hot")
+        return _time_calls(env.reset)
+
+    env = SequenceEnv(seq_len=seq_len, max_edits=8, obs_mode="one_hot")
+    seq, target = env.sequence, env.target_ft
+
+    def agent_case(which):
+        agent = ReinforceAgent(seq_len=seq_len)
+        obs = env.reset()
+        if which == "encode_seq":
+            return _time_calls(lambda: agent.encode_seq(seq))
+        if which == "select_action":
+            return _time_calls(lambda: agent.select_action(obs))
+
+        def episode():
+            lps = [agent.select_action(obs)[1] for _ in range(env.max_edits)]
+            return lps, np.random.default_rng(seed).standard_normal(len(lps)).tolist()
+
+        return _time_calls(lambda ep: agent.update(*ep), setup=episode, min_time=0.02, repeat=3)
+
+    def train_episode():
+        _seed_all(seed)
+        _, secs = _quiet(train, episodes=2, seq_len=seq_len, max_edits=8)  # warm up
+        samples = []
+        for _ in range(3):
+            _seed_all(seed)
+            (_, _, scores), secs = _quiet(train, episodes=train_episodes, seq_len=seq_len, max_edits=8)
+            samples.append(secs / len(scores))
+        return {"median_s": statistics.median(samples), "min_s": min(samples), "number": train_episodes}
+
+    return [
+        ("env.step", lambda: env_step("codes")),
+        ("env.step[one_hot]", lambda: env_step("one_hot")),
+        ("env.reset", env_reset),
+        ("kmer_score", lambda: _time_calls(lambda: kmer_score(seq, target, k=4))),
+        ("motif_value", lambda: _time_calls(lambda: motif_value(seq))),
+        ("compute_reward", lambda: _time_calls(lambda: compute_reward(seq, target, env.target_tfl1, 3))),
+        ("agent.encode_seq", lambda: agent_case("encode_seq")),
+        ("agent.select_action", lambda: agent_case("select_action")),
+        ("agent.update", lambda: agent_case("update")),
+        ("train.episode", train_episode),
+    ]
+
+
+def run_suite(
+    lengths: List[int] = (100, 1_000, 10_000),
+    seed: int = 0,
+    train_episodes: int = 20,
+    only: Optional[List[str]] = None,
+) -> Dict[str, object]:
+    """Run the regression suite; returns the JSON-ready result document.
+
+    ``results`` maps ``"<benchmark>[L=<seq_len>]"`` to per-call seconds
+    (lower is better). ``only`` keeps benchmarks whose name starts with any
+    of the given prefixes.
+    """
+    torch.set_num_threads(1)
+    results = {}
+    for seq_len in lengths:
+        for name, thunk in _suite_cases(seq_len, seed, train_episodes):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            _seed_all(seed)
+            results[f"{name}[L={seq_len}]"] = {"benchmark": name, "seq_len": seq_len, **thunk()}
+    return {
+        "format": SUITE_FORMAT,
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "machine": platform.machine(),
+            "seed": seed,
+            "lengths": list(lengths),
+        },
+        "results": results,
+    }
+
+
+def compare_results(base: Dict[str, object], new: Dict[str, object], threshold: float = 0.15) -> List[Dict[str, object]]:
+    """Rows comparing median per-call times; ``status`` is ``regression`` beyond ``threshold``."""
+    rows = []
+    base_r, new_r = base["results"], new["results"]
+    for key in list(base_r) + [k for k in new_r if k not in base_r]:
+        if key not in new_r or key not in base_r:
+            status = "missing" if key not in new_r else "new"
+            rows.append({"benchmark": key, "base_us": "-", "new_us": "-", "change": "-", "status": status})
+            continue
+        b, n = base_r[key]["median_s"], new_r[key]["median_s"]
+        ratio = n / b if b else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append({
+            "benchmark": key,
+            "base_us": b * 1e6,
+            "new_us": n * 1e6,
+            "change": f"{ratio - 1:+.1%}",
+            "status": status,
+        })
+    return rows
+
+
+def _suite_rows(doc: Dict[str, object]) -> List[Dict[str, object]]:
+    return [
+        {"benchmark": key, "median_us": r["median_s"] * 1e6, "min_us": r["min_s"] * 1e6, "per_s": 1 / r["median_s"]}
+        for key, r in doc["results"].items()
+    ]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmarks for the rl_model toy")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("reinforce", help="steps/time to target: train vs train_batched")
+    r.add_argument("--target", type=float, default=0.0)
+    r.add_argument("--episodes", type=int, default=3000)
+    r.add_argument("--batch-size", type=int, default=32)
+    r.add_argument("--max-edits", type=int, default=8)
+    r.add_argument("--seed", type=int, default=0)
+
+    m = sub.add_parser("rollout-memory", help="peak RSS vs max_edits: graph vs graph-free rollouts")
+    m.add_argument("--seq-len", type=int, default=1000)
+    m.add_argument("--batch-size", type=int, default=64)
+    m.add_argument("--max-edits", type=int, nargs="+", default=[10, 50, 200])
+
+    w = sub.add_parser("workers", help="rollout episodes/s vs number of worker processes")
+    w.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    w.add_argument("--envs-per-worker", type=int, default=32)
+    w.add_argument("--rounds", type=int, default=10)
+    w.add_argument("--seq-len", type=int, default=None)
+
+    k = sub.add_parser("masking", help="reward per env step with vs without action masks")
+    k.add_argument("--episodes", type=int, default=960)
+    k.add_argument("--batch-size", type=int, default=32)
+
+    a = sub.add_parser("actor-critic", help="time-to-target: REINFORCE vs actor-critic")
+    a.add_argument("--target", type=float, default=0.1)
+    a.add_argument("--episodes", type=int, default=3200)
+    a.add_argument("--case-id", default="mdtfl1_to_mdft1")
+    a.add_argument("--seed", type=int, default=0)
+
+    ps = sub.add_parser("policy-scaling", help="policy size/latency/memory vs sequence length")
+    ps.add_argument("--lengths", type=int, nargs="+", default=[60, 1_000, 10_000, 100_000])
+    ps.add_argument("--policies", nargs="+", default=["mlp", "conv"])
+
+    er = sub.add_parser("episode-rate", help="train episodes/s: old sleep+print pacing vs callbacks")
+    er.add_argument("--episodes", type=int, default=300)
+    er.add_argument("--max-edits", type=int, default=8)
+
+    sv = sub.add_parser("serve", help="policy service rps and p50/p99 latency vs batching window")
+    sv.add_argument("--windows", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    sv.add_argument("--concurrency", type=int, default=32)
+    sv.add_argument("--requests", type=int, default=2000)
+
+    ex = sub.add_parser("export", help="batch HTML export trajectories/s vs worker processes")
+    ex.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ex.add_argument("--trajectories", type=int, default=64)
+
+    st = sub.add_parser("static-server", help="visualizer page loads: SimpleHTTPRequestHandler vs LocalServer")
+    st.add_argument("--clients", type=int, default=8)
+    st.add_argument("--rounds", type=int, default=5)
+
+    su = sub.add_parser("suite", help="regression suite: env/reward/encoding/agent/train timings to JSON")
+    su.add_argument("--lengths", type=int, nargs="+", default=[100, 1_000, 10_000])
+    su.add_argument("--train-episodes", type=int, default=20)
+    su.add_argument("--only", nargs="+", default=None, help="benchmark name prefixes to run")
+    su.add_argument("--seed", type=int, default=0)
+    su.add_argument("--out", default=None, help="write results JSON here")
+
+    c = sub.add_parser("compare", help="compare two suite JSON files; exit 1 on regressions")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+
+    args = p.parse_args(argv)
+    if args.cmd == "reinforce":
+        _print_rows(bench_reinforce(
+            target=args.target, episodes=args.episodes, batch_size=args.batch_size,
+            max_edits=args.max_edits, seed=args.seed,
+        ))
+    elif args.cmd == "rollout-memory":
+        _print_rows(bench_rollout_memory(
+            max_edits_values=args.max_edits, seq_len=args.seq_len, batch_size=args.batch_size,
+        ))
+    elif args.cmd == "workers":
+        _print_rows(bench_workers(
+            workers=args.workers, envs_per_worker=args.envs_per_worker,
+            rounds=args.rounds, seq_len=args.seq_len,
+        ))
+    elif args.cmd == "actor-critic":
+        _print_rows(bench_actor_critic(
+            target=args.target, episodes=args.episodes, case_id=args.case_id, seed=args.seed,
+        ))
+    elif args.cmd == "policy-scaling":
+        _print_rows(bench_policy_scaling(lengths=args.lengths, policies=args.policies))
+    elif args.cmd == "episode-rate":
+        _print_rows(bench_episode_rate(episodes=args.episodes, max_edits=args.max_edits))
+    elif args.cmd == "serve":
+        _print_rows(bench_serve(windows=args.windows, concurrency=args.concurrency, requests=args.requests))
+    elif args.cmd == "masking":
+        _print_rows(bench_masking(episodes=args.episodes, batch_size=args.batch_size))
+    elif args.cmd == "export":
+        _print_rows(bench_export(workers=args.workers, trajectories=args.trajectories))
+    elif args.cmd == "static-server":
+        _print_rows(bench_static_server(clients=args.clients, rounds=args.rounds))
+    elif args.cmd == "suite":
+        doc = run_suite(lengths=args.lengths, seed=args.seed, train_episodes=args.train_episodes, only=args.only)
+        _print_rows(_suite_rows(doc))
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as fh:
+                json.dump(doc, fh, indent=1)
+    elif args.cmd == "compare":
+        with open(args.base, encoding="utf-8") as fh:
+            base = json.load(fh)
+        with open(args.new, encoding="utf-8") as fh:
+            new = json.load(fh)
+        rows = compare_results(base, new, threshold=args.threshold)
+        _print_rows(rows)
+        return 1 if any(r["status"] == "regression" for r in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
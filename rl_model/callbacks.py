@@ -0,0 +1,160 @@
+"""Hooks for observing the training loops without slowing them down.
+
+``train``, ``train_batched`` and ``actor_critic.train_actor_critic`` accept
+``callbacks=``: a ``TrainingCallback``, a plain function, or a list of them.
+The loops call:
+
+  - ``on_episode_end(episode, reward, env)`` after every finished episode. A
+    True return value stops training.
+  - ``on_update(update, metrics)`` after every optimizer step. Every loop
+    puts the same keys in ``metrics``: ``loss``, ``reward`` (mean final
+    reward of the episodes in this update, i.e. the episode's own reward in
+    ``train``) and ``episodes`` (episodes finished so far). The batched
+    loops add ``best_reward``, the batch maximum.
+  - ``on_best(episode, reward, sequence)`` when an episode beats every earlier
+    one. ``sequence`` is None when the final sequence isn't available in this
+    process, e.g. with rollout workers.
+
+A plain function is treated as ``on_episode_end``. The loops never print or
+sleep themselves. Wrap slow subscribers in ``RateLimited`` so they only run a
+few times per second; ``PrintLogger`` is the CLI's rate-limited console
+logger.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+
+class TrainingCallback:
+    """Base class; override any subset of the hooks."""
+
+    def on_episode_end(self, episode: int, reward: float, env) -> Optional[bool]:
+        return None
+
+    def on_update(self, update: int, metrics: Dict[str, float]) -> None:
+        return None
+
+    def on_best(self, episode: int, reward: float, sequence: Optional[str]) -> None:
+        return None
+
+
+class FunctionCallback(TrainingCallback):
+    """Adapts ``fn(episode, reward, env) -> stop?`` to the callback interface."""
+
+    def __init__(self, fn: Callable):
+        self.fn = fn
+
+    def on_episode_end(self, episode, reward, env):
+        return self.fn(episode, reward, env)
+
+
+class RateLimited(TrainingCallback):
+    """Forwards episode/update hooks to ``inner`` at most once per ``interval`` seconds.
+
+    ``on_best`` is rare and always forwarded. Dropped ``on_episode_end`` calls
+    return None, so a rate-limited callback can only stop training on the
+    calls it receives.
+    """
+
+    def __init__(self, inner: TrainingCallback, interval: float = 0.5):
+        self.inner = as_callback(inner)
+        self.interval = interval
+        self._next_episode = 0.0
+        self._next_update = 0.0
+
+    def on_episode_end(self, episode, reward, env):
+        now = time.perf_counter()
+        if now < self._next_episode:
+            return None
+        self._next_episode = now + self.interval
+        return self.inner.on_episode_end(episode, reward, env)
+
+    def on_update(self, update, metrics):
+        now = time.perf_counter()
+        if now < self._next_update:
+            return
+        self._next_update = now + self.interval
+        self.inner.on_update(update, metrics)
+
+    def on_best(self, episode, reward, sequence):
+        self.inner.on_best(episode, reward, sequence)
+
+
+class PrintLogger(TrainingCallback):
+    """Console progress, rate-limited to one line per ``interval`` seconds per hook."""
+
+    def __init__(self, interval: float = 1.0, show_sequence: bool = False):
+        self.show_sequence = show_sequence
+        self._episodes = RateLimited(FunctionCallback(self._print_episode), interval)
+        self._updates = RateLimited(_UpdatePrinter(), interval)
+
+    def _print_episode(self, episode, reward, env):
+        seq = f" seq={env.sequence}" if self.show_sequence and hasattr(env, "sequence") else ""
+        print(f"Episode {episode:4d}: reward={reward:+.4f}{seq}")
+
+    def on_episode_end(self, episode, reward, env):
+        self._episodes.on_episode_end(episode, reward, env)
+
+    def on_update(self, update, metrics):
+        self._updates.on_update(update, metrics)
+
+    def on_best(self, episode, reward, sequence):
+        print(f"New best at episode {episode}: reward={reward:+.4f}")
+
+
+class _UpdatePrinter(TrainingCallback):
+    def on_update(self, update, metrics):
+        parts = " ".join(f"{k}={v:+.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items())
+        print(f"Update {update:4d}: {parts}")
+
+
+def as_callback(cb: Union[TrainingCallback, Callable]) -> TrainingCallback:
+    return cb if isinstance(cb, TrainingCallback) else FunctionCallback(cb)
+
+
+class CallbackList(TrainingCallback):
+    """Dispatches to several callbacks and tracks the best episode for ``on_best``."""
+
+    def __init__(self, callbacks: Union[None, TrainingCallback, Callable, Iterable] = None):
+        if callbacks is None:
+            callbacks = []
+        elif isinstance(callbacks, TrainingCallback) or callable(callbacks):
+            callbacks = [callbacks]
+        self.callbacks: List[TrainingCallback] = [as_callback(cb) for cb in callbacks]
+        self.best = float("-inf")
+
+    def __bool__(self) -> bool:
+        return bool(self.callbacks)
+
+    def on_episode_end(self, episode, reward, env):
+        stop = False
+        for cb in self.callbacks:
+            stop = bool(cb.on_episode_end(episode, reward, env)) or stop
+        return stop
+
+    def on_update(self, update, metrics):
+        for cb in self.callbacks:
+            cb.on_update(update, metrics)
+
+    def on_best(self, episode, reward, sequence):
+        for cb in self.callbacks:
+            cb.on_best(episode, reward, sequence)
+
+    def is_best(self, reward: float) -> bool:
+        """Record ``reward``; True if it beats every earlier episode."""
+        if reward > self.best:
+            self.best = reward
+            return True
+        return False
+
+
+__all__ = [
+    "TrainingCallback",
+    "FunctionCallback",
+    "RateLimited",
+    "PrintLogger",
+    "CallbackList",
+    "as_callback",
+]
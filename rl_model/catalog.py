@@ -0,0 +1,394 @@
+"""Streaming gene catalog over the repo's CSV files, with an on-disk index.
+
+The CSVs (``flowering_genes_with_fasta.csv``, ``flowering_genes.csv``,
+``data/ncbi.csv``, ``data/uniprot_genes.csv``) are read record by record and
+never held in memory as a whole. The first time a file is seen (or after it
+changes) every record's byte offset is written to a SQLite index keyed by
+entry ID, symbol, synonyms and FASTA ``GN=`` tags. Embedded FASTA records are
+parsed at that point and their residues are written to a per-source sidecar
+``.bin`` file, so a lookup is one indexed query, one seek into the CSV and
+one read of the sequence bytes. Opening a catalog only stats the source files,
+so startup cost does not grow with the catalog.
+
+Each distinct set of sources gets its own index directory, so catalogs over
+different file lists don't overwrite each other's index. Within a set, only
+the sources whose size or mtime changed are re-scanned.
+
+``CaseRegistry`` turns any initial/target/avoid triple of catalog keys into a
+lazily built ``DemoCase`` and registers it with ``sample_sequences.get_case``,
+so ``SequenceEnv(case_id=...)`` can use it directly.
+
+Note: the FASTA records shipped with the repo are UniProt protein sequences;
+use nucleotide entries (or a matching env ``alphabet``) for DNA editing.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .sample_sequences import DemoCase, register_case
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SOURCES = [
+    os.path.join(_REPO_ROOT, "flowering_genes_with_fasta.csv"),
+    os.path.join(_REPO_ROOT, "flowering_genes.csv"),
+    os.path.join(_REPO_ROOT, "data", "ncbi.csv"),
+    os.path.join(_REPO_ROOT, "data", "uniprot_genes.csv"),
+]
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bloomsync", "catalog")
+
+_ID_COLUMNS = ("gene_id_or_entry_id", "gene_id", "entry_id")
+_SYMBOL_COLUMNS = ("symbol_or_gene", "symbol", "gene_names")
+_NAME_COLUMNS = ("description", "protein_name")
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    entry_id: str
+    symbol: str
+    species: str
+    description: str
+    source: str
+    path: str
+    fasta_header: Optional[str] = None
+    sequence: Optional[str] = None
+
+
+def parse_fasta(text: str) -> Tuple[Optional[str], str]:
+    """Return ``(header, residues)`` for one FASTA record (whitespace stripped)."""
+    header = None
+    residues = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            header = line[1:]
+        else:
+            residues.append(line)
+    return header, "".join(residues)
+
+
+def _fasta_tags(header: Optional[str]) -> List[str]:
+    """Accession and ``GN=`` gene name from a UniProt-style header."""
+    if not header:
+        return []
+    keys = []
+    first = header.split()[0]
+    parts = first.split("|")
+    if len(parts) >= 2:
+        keys.append(parts[1])
+    for token in header.split():
+        if token.startswith("GN="):
+            keys.append(token[3:])
+    return keys
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, List[str]]]:
+    """Yield ``(byte_offset, fields)`` for every data row, streaming the file.
+
+    Multi-line quoted fields (embedded FASTA) are stitched together by
+    tracking quote parity, so offsets always point at a record start.
+    """
+    with open(path, "rb") as fh:
+        fh.readline()  # header
+        offset = fh.tell()
+        buf: List[bytes] = []
+        start = offset
+        quotes = 0
+        for line in iter(fh.readline, b""):
+            if not buf:
+                start = offset
+            buf.append(line)
+            quotes += line.count(b'"')
+            offset += len(line)
+            if quotes % 2 == 0:
+                yield start, _parse_row(b"".join(buf))
+                buf, quotes = [], 0
+        if buf:
+            yield start, _parse_row(b"".join(buf))
+
+
+def _parse_row(raw: bytes) -> List[str]:
+    row = next(csv.reader(io.StringIO(raw.decode("utf-8")), skipinitialspace=True), [])
+    return [c.strip() for c in row]
+
+
+def _read_header(path: str) -> List[str]:
+    with open(path, "rb") as fh:
+        return [c.strip() for c in _parse_row(fh.readline())]
+
+
+def _col(header: Sequence[str], names: Sequence[str]) -> Optional[int]:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+class GeneCatalog:
+    """Keyed access to catalog entries through a persistent offset index.
+
+    Use as a context manager (or call ``close``) to release the SQLite handle.
+    """
+
+    def __init__(self, sources: Optional[Sequence[str]] = None, index_dir: Optional[str] = None):
+        self.sources = [os.path.abspath(p) for p in (sources or DEFAULT_SOURCES) if os.path.exists(p)]
+        set_key = _digest("\n".join(sorted(set(self.sources))))
+        self.index_dir = os.path.join(index_dir or DEFAULT_INDEX_DIR, set_key)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.index_dir, "catalog.sqlite"))
+        self._headers: Dict[str, List[str]] = {}
+        self._init_schema()
+        self.refresh()
+
+    def __enter__(self) -> "GeneCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _init_schema(self) -> None:
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT, path TEXT, offset INTEGER, seq_offset INTEGER, seq_length INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS entries_key ON entries(key);
+            CREATE INDEX IF NOT EXISTS entries_path ON entries(path);
+            """
+        )
+
+    def _seq_path(self, path: str) -> str:
+        return os.path.join(self.index_dir, f"{_digest(path)}.bin")
+
+    def refresh(self) -> List[str]:
+        """Re-scan the sources whose size or mtime changed; returns their paths."""
+        known = dict(
+            (p, (s, m)) for p, s, m in self._db.execute("SELECT path, size, mtime_ns FROM files")
+        )
+        stale = []
+        for path in self.sources:
+            st = os.stat(path)
+            if known.get(path) != (st.st_size, st.st_mtime_ns) or not os.path.exists(self._seq_path(path)):
+                stale.append(path)
+        if stale:
+            with self._db:
+                for path in stale:
+                    self._reindex(path)
+        return stale
+
+    def rebuild(self) -> None:
+        """Re-scan every source file and rewrite the index and sequence stores."""
+        with self._db:
+            for path in self.sources:
+                self._reindex(path)
+
+    def _reindex(self, path: str) -> None:
+        self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM entries WHERE path = ?", (path,))
+        self._headers.pop(path, None)
+        with open(self._seq_path(path), "wb") as seq_out:
+            self._index_file(path, seq_out)
+
+    def _index_file(self, path: str, seq_out) -> None:
+        header = _read_header(path)
+        id_col = _col(header, _ID_COLUMNS)
+        sym_col = _col(header, _SYMBOL_COLUMNS)
+        syn_col = _col(header, ("synonyms",))
+        fasta_col = _col(header, ("fasta",))
+        rows = []
+        for offset, fields in iter_records(path):
+            if id_col is None or len(fields) <= id_col or not fields[id_col]:
+                continue
+            seq_offset, seq_length = -1, 0
+            keys = [fields[id_col]]
+            if sym_col is not None and len(fields) > sym_col and fields[sym_col]:
+                keys.append(fields[sym_col])
+            if syn_col is not None and len(fields) > syn_col:
+                keys.extend(s for s in fields[syn_col].split(";") if s)
+            if fasta_col is not None and len(fields) > fasta_col and fields[fasta_col]:
+                fasta_header, residues = parse_fasta(fields[fasta_col])
+                keys.extend(_fasta_tags(fasta_header))
+                seq_offset = seq_out.tell()
+                seq_length = len(residues)
+                seq_out.write(residues.encode("ascii"))
+            for key in dict.fromkeys(k.casefold() for k in keys):
+                rows.append((key, path, offset, seq_offset, seq_length))
+        self._db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+        st = os.stat(path)
+        self._db.execute("INSERT INTO files VALUES (?, ?, ?)", (path, st.st_size, st.st_mtime_ns))
+
+    def _load(self, path: str, offset: int, seq_offset: int, seq_length: int) -> CatalogEntry:
+        header = self._headers.get(path)
+        if header is None:
+            header = self._headers[path] = _read_header(path)
+        with open(path, "rb") as fh:
+            fh.seek(offset)
+            _, fields = next(_records_from(fh))
+        sequence = None
+        if seq_offset >= 0:
+            with open(self._seq_path(path), "rb") as fh:
+                fh.seek(seq_offset)
+                sequence = fh.read(seq_length).decode("ascii")
+        return _make_entry(path, header, fields, sequence)
+
+    def find(self, key: str) -> List[CatalogEntry]:
+        """Return every entry indexed under ``key`` (case-insensitive)."""
+        rows = self._db.execute(
+            "SELECT path, offset, seq_offset, seq_length FROM entries WHERE key = ?", (key.casefold(),)
+        ).fetchall()
+        return [self._load(*row) for row in rows]
+
+    def get(self, key: str, require_sequence: bool = False) -> CatalogEntry:
+        """Return the entry for ``key``, preferring one that carries a sequence."""
+        query = "SELECT path, offset, seq_offset, seq_length FROM entries WHERE key = ?"
+        if require_sequence:
+            query += " AND seq_offset >= 0"
+        row = self._db.execute(query + " ORDER BY seq_offset < 0 LIMIT 1", (key.casefold(),)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._load(*row)
+
+    def sequence(self, key: str) -> str:
+        return self.get(key, require_sequence=True).sequence
+
+    def __contains__(self, key: str) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM entries WHERE key = ? LIMIT 1", (key.casefold(),)
+        ).fetchone() is not None
+
+    def iter_entries(self) -> Iterator[CatalogEntry]:
+        """Stream every entry of every source (FASTA parsed on the fly)."""
+        for path in self.sources:
+            header = _read_header(path)
+            for _, fields in iter_records(path):
+                yield _make_entry(path, header, fields)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _make_entry(path: str, header: List[str], fields: List[str], sequence: Optional[str] = None) -> CatalogEntry:
+    fields = fields + [""] * (len(header) - len(fields))
+
+    def field(names):
+        idx = _col(header, names)
+        return fields[idx] if idx is not None else ""
+
+    fasta_header, residues = parse_fasta(field(("fasta",)))
+    return CatalogEntry(
+        entry_id=field(_ID_COLUMNS),
+        symbol=field(_SYMBOL_COLUMNS),
+        species=field(("species",)),
+        description=field(_NAME_COLUMNS),
+        source=field(("source",)) or os.path.basename(path),
+        path=path,
+        fasta_header=fasta_header,
+        sequence=sequence if sequence is not None else (residues or None),
+    )
+
+
+def _records_from(fh) -> Iterator[Tuple[int, List[str]]]:
+    """Like ``iter_records`` but from the current position of an open file."""
+    offset = fh.tell()
+    buf: List[bytes] = []
+    quotes = 0
+    for line in iter(fh.readline, b""):
+        buf.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield offset, _parse_row(b"".join(buf))
+            return
+    if buf:
+        yield offset, _parse_row(b"".join(buf))
+
+
+class CaseRegistry:
+    """``get_case``-compatible registry of lazily built catalog cases."""
+
+    def __init__(self, catalog: Optional[GeneCatalog] = None):
+        self._catalog = catalog
+        self._triples: Dict[str, dict] = {}
+        self._cases: Dict[str, DemoCase] = {}
+
+    @property
+    def catalog(self) -> GeneCatalog:
+        if self._catalog is None:
+            self._catalog = GeneCatalog()
+        return self._catalog
+
+    def register(
+        self,
+        case_id: str,
+        initial: str,
+        target: str,
+        avoid: str,
+        *,
+        motifs: Optional[List[str]] = None,
+        objectives: Optional[List[str]] = None,
+        title: Optional[str] = None,
+    ) -> None:
+        """Record a triple of catalog keys; nothing is read until the case is used.
+
+        The case is also registered with ``sample_sequences.get_case``.
+        """
+        self._triples[case_id] = dict(
+            initial=initial, target=target, avoid=avoid,
+            motifs=motifs or [], objectives=objectives or [], title=title,
+        )
+        self._cases.pop(case_id, None)
+        register_case(case_id, lambda: self.get_case(case_id))
+
+    def get_case(self, case_id: str) -> DemoCase:
+        case = self._cases.get(case_id)
+        if case is not None:
+            return case
+        try:
+            spec = self._triples[case_id]
+        except KeyError as exc:
+            raise ValueError(f"Unknown catalog case '{case_id}'") from exc
+        entries = [self.catalog.get(spec[k], require_sequence=True) for k in ("initial", "target", "avoid")]
+        # SequenceEnv needs equal lengths; trim to the shortest record
+        length = min(len(e.sequence) for e in entries)
+        initial, target, avoid = entries
+        case = DemoCase(
+            case_id=case_id,
+            title=spec["title"] or f"{initial.symbol or initial.entry_id} → {target.symbol or target.entry_id}",
+            description=f"Catalog case built from {initial.entry_id}, {target.entry_id} and {avoid.entry_id}.",
+            initial_name=initial.symbol or initial.entry_id,
+            initial_sequence=initial.sequence[:length],
+            target_name=target.symbol or target.entry_id,
+            target_sequence=target.sequence[:length],
+            avoid_name=avoid.symbol or avoid.entry_id,
+            avoid_sequence=avoid.sequence[:length],
+            objectives=spec["objectives"],
+            motifs=spec["motifs"],
+        )
+        self._cases[case_id] = case
+        return case
+
+    def list_cases(self) -> List[str]:
+        return sorted(self._triples)
+
+
+__all__ = [
+    "CatalogEntry",
+    "GeneCatalog",
+    "CaseRegistry",
+    "DEFAULT_SOURCES",
+    "iter_records",
+    "parse_fasta",
+]
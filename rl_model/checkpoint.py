@@ -0,0 +1,225 @@
+"""Policy checkpoints and a content-addressed cache of trained agents.
+
+``save_checkpoint``/``load_checkpoint`` store a ``ReinforceAgent``'s policy
+and optimizer state plus the arguments needed to rebuild it. Files use
+torch's zip format and load with ``mmap=True, weights_only=True``, so weights
+are paged in lazily and no pickled code runs. Torch builds without those
+``torch.load`` options fall back to a plain load.
+
+``ModelCache`` keys checkpoints by a sha256 over everything that determines
+training: the case sequences, ``seq_len``, ``max_edits`` and the
+hyperparameters. ``train_cached`` uses it to skip training when enough
+episodes are already cached, or to warm-start and train only the
+remainder.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from typing import List, Optional, Tuple
+
+import torch
+
+from .agent import ReinforceAgent
+from .env import SequenceEnv
+from .profiling import RewardTrace
+from .train import _make_constraints, _reached, train
+
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bloomsync", "models")
+# train() options that don't change what gets learned
+_NOT_HPARAMS = ("target_reward", "callbacks", "instrument", "profiler")
+# what torch.load/load_checkpoint raise for truncated, corrupt or mismatched files
+_LOAD_ERRORS = (OSError, EOFError, ValueError, KeyError, RuntimeError, pickle.UnpicklingError)
+
+
+def save_checkpoint(path: str, agent: ReinforceAgent, meta: Optional[dict] = None) -> None:
+    """Write ``agent`` (and JSON-like ``meta``) to ``path`` atomically."""
+    state = {
+        "format": FORMAT_VERSION,
+        "seq_len": agent.seq_len,
+        "policy_type": agent.policy_type,
+        "policy_kwargs": dict(agent.policy_kwargs),
+        "lr": agent.lr,
+        "policy": agent.policy.state_dict(),
+        "optimizer": agent.optimizer.state_dict(),
+        "meta": meta or {},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    torch.save(state, tmp)
+    os.replace(tmp, path)
+
+
+def _torch_load(path: str):
+    try:
+        return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    except TypeError:
+        # older torch: no mmap (or no weights_only) keyword
+        try:
+            return torch.load(path, map_location="cpu", weights_only=True)
+        except TypeError:
+            return torch.load(path, map_location="cpu")
+
+
+def load_checkpoint(path: str, agent: Optional[ReinforceAgent] = None) -> Tuple[ReinforceAgent, dict]:
+    """Load a checkpoint into ``agent`` (or a freshly built one); returns ``(agent, meta)``."""
+    state = _torch_load(path)
+    if state.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported checkpoint format {state.get('format')!r}")
+    if agent is None and state["policy_type"] == "actor_critic":
+        from .actor_critic import ActorCriticAgent
+
+        agent = ActorCriticAgent(state["seq_len"], lr=state["lr"], **state["policy_kwargs"])
+    elif agent is None:
+        agent = ReinforceAgent(
+            state["seq_len"], lr=state["lr"], policy=state["policy_type"], **state["policy_kwargs"]
+        )
+    agent.policy.load_state_dict(state["policy"])
+    agent.optimizer.load_state_dict(state["optimizer"])
+    return agent, state["meta"]
+
+
+def cache_key(
+    start_sequence: str,
+    target_ft: str,
+    target_tfl1: str,
+    seq_len: int,
+    max_edits: int,
+    **hparams,
+) -> str:
+    """sha256 over the case sequences, sizes and (JSON-serializable) hyperparameters."""
+    payload = {
+        "format": FORMAT_VERSION,
+        "start": start_sequence,
+        "target_ft": target_ft,
+        "target_tfl1": target_tfl1,
+        "seq_len": seq_len,
+        "max_edits": max_edits,
+        "hparams": hparams,
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def env_cache_key(env: SequenceEnv, **hparams) -> str:
+    motifs = env.case.motifs if env.case else None
+    return cache_key(
+        env.start_sequence, env.target_ft, env.target_tfl1, env.seq_len, env.max_edits,
+        motifs=motifs, noise_prob=env.noise_prob, **hparams,
+    )
+
+
+class ModelCache:
+    """Directory of ``<key>.pt`` checkpoints."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or DEFAULT_CACHE_DIR
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pt")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def get(self, key: str) -> Optional[Tuple[ReinforceAgent, dict]]:
+        if key not in self:
+            return None
+        try:
+            return load_checkpoint(self.path(key))
+        except _LOAD_ERRORS:
+            # a corrupt or incompatible entry is treated as a miss
+            return None
+
+    def put(self, key: str, agent: ReinforceAgent, meta: Optional[dict] = None) -> str:
+        path = self.path(key)
+        save_checkpoint(path, agent, meta)
+        return path
+
+
+def _replay(agent: ReinforceAgent, env: SequenceEnv, constraints=None) -> None:
+    """Run one episode without learning so ``env`` ends in a trained final state.
+
+    ``constraints`` should be the ``ActionConstraints`` the agent was trained
+    under, so the replay samples from the same masked distribution.
+    """
+    obs = env.reset()
+    action_mask = constraints.mask(env.codes) if constraints else None
+    n_edits = 0
+    done = False
+    with torch.inference_mode():
+        while not done:
+            env_action = agent.action_to_env(agent.select_action(obs, action_mask)[0])
+            if env_action is None:
+                break
+            obs, _, done, _ = env.step(env_action)
+            n_edits += 1
+            if constraints:
+                pos = env_action[0]
+                constraints.apply_edit(action_mask, pos, int(env.codes[pos]), n_edits)
+
+
+def train_cached(
+    episodes: int = 200,
+    seq_len: Optional[int] = None,
+    max_edits: int = 10,
+    env: Optional[SequenceEnv] = None,
+    case_id: Optional[str] = None,
+    cache: Optional[ModelCache] = None,
+    policy: str = "mlp",
+    **train_kwargs,
+) -> Tuple[ReinforceAgent, SequenceEnv, List[float]]:
+    """``train`` with a model cache; same arguments and return value.
+
+    A cached agent trained with a budget of at least ``episodes`` is
+    returned without any training; the env is replayed for one episode so its
+    final state reflects the policy. A cached agent with a smaller budget is
+    warm-started and trained for the remainder; its callbacks see episode
+    indices continuing from the cached count. The reward trace covers every
+    episode trained under this key.
+    """
+    cache = cache or ModelCache()
+    env = env or SequenceEnv(seq_len=seq_len, max_edits=max_edits, case_id=case_id, obs_mode="one_hot")
+    hparams = {k: v for k, v in train_kwargs.items() if k not in _NOT_HPARAMS}
+    key = env_cache_key(env, policy=policy, **hparams)
+
+    hit = cache.get(key)
+    agent, meta = hit if hit else (None, {})
+    done_episodes = meta.get("episodes", 0)
+    scores = list(meta.get("scores", []))
+    if agent is not None and done_episodes >= episodes:
+        constraints = _make_constraints(
+            env.seq_len, train_kwargs.get("mask_actions", True),
+            train_kwargs.get("forbidden"), train_kwargs.get("edit_budget"),
+        )
+        _replay(agent, env, constraints)
+        return agent, env, scores
+
+    agent, env, new_scores = train(
+        episodes=episodes - done_episodes, env=env, policy=policy, agent=agent,
+        first_episode=done_episodes, **train_kwargs
+    )
+    scores = RewardTrace(scores + list(new_scores))
+    scores.stats = new_scores.stats
+    # a run that stopped short without reaching target_reward was cancelled by
+    # its callback: record only the episodes actually trained so the next call
+    # resumes; a target-reached stop counts as the full budget
+    budget = episodes
+    if len(new_scores) < episodes - done_episodes and not _reached(scores, train_kwargs.get("target_reward")):
+        budget = done_episodes + len(new_scores)
+    cache.put(key, agent, {"episodes": budget, "scores": list(scores)})
+    return agent, env, scores
+
+
+__all__ = [
+    "save_checkpoint",
+    "load_checkpoint",
+    "cache_key",
+    "env_cache_key",
+    "ModelCache",
+    "train_cached",
+    "DEFAULT_CACHE_DIR",
+]
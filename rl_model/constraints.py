@@ -5,6 +5,10 @@ like max edits, allowed positions, and masks. It does not expose any protocol
 for lab work.
 """
 
+import torch
+
+from .encoding import to_index_tensor
+
 
 def enforce_budget(n_edits, max_edits):
     return n_edits <= max_edits
@@ -17,3 +21,60 @@ def allowed_positions_mask(seq_len, forbidden=None):
             if 0 <= p < seq_len:
                 mask[p] = False
     return mask
+
+
+class ActionConstraints:
+    """Builds boolean action masks for the flattened ``pos * 4 + base`` action space.
+
+    Masks out forbidden positions, rewrites of a base to the value it already
+    has, and every edit once ``max_edits`` edits have been spent (``enforce_budget``
+    would fail for one more). The trailing noop action is always allowed.
+    """
+
+    def __init__(self, seq_len, forbidden=None, max_edits=None, mask_same_base=True, n_bases=4):
+        self.seq_len = seq_len
+        self.n_bases = n_bases
+        self.max_edits = max_edits
+        self.mask_same_base = mask_same_base
+        self._allowed = allowed_positions_mask(seq_len, forbidden)
+        self.positions = torch.tensor(self._allowed, dtype=torch.bool)
+
+    def mask(self, seqs, n_edits=0):
+        """Return a ``(B, seq_len * n_bases + 1)`` mask (``(A,)`` for one sequence).
+
+        ``seqs`` is anything ``encoding.to_index_tensor`` accepts; ``n_edits`` is
+        a scalar or per-row count of edits already made.
+        """
+        codes = to_index_tensor(seqs)
+        single = codes.ndim == 1
+        codes = codes.view(-1, codes.shape[-1])
+        B, L = codes.shape
+        m = self.positions.view(1, L, 1).expand(B, L, self.n_bases).clone()
+        if self.mask_same_base:
+            known = codes < self.n_bases
+            current = torch.zeros(B, L, self.n_bases, dtype=torch.bool)
+            current.scatter_(2, codes.clamp(max=self.n_bases - 1).unsqueeze(-1), known.unsqueeze(-1))
+            m &= ~current
+        m = m.view(B, L * self.n_bases)
+        if self.max_edits is not None:
+            n_edits = torch.as_tensor(n_edits).expand(B)
+            m[~enforce_budget(n_edits + 1, self.max_edits)] = False
+        out = torch.cat([m, torch.ones(B, 1, dtype=torch.bool)], dim=1)
+        return out[0] if single else out
+
+    def apply_edit(self, mask, pos, code, n_edits):
+        """Update one sequence's ``(A,)`` mask in place after ``code`` was written at ``pos``.
+
+        ``n_edits`` counts this edit. Only the edited position's entries (and,
+        once the budget is spent, the edit actions) change, so a rollout can
+        build its mask once per episode with :meth:`mask` and keep it current
+        at O(1) cost per step.
+        """
+        if self.max_edits is not None and not enforce_budget(n_edits + 1, self.max_edits):
+            mask[:-1] = False
+        elif self._allowed[pos]:
+            row = pos * self.n_bases
+            mask[row:row + self.n_bases] = True
+            if self.mask_same_base and code < self.n_bases:
+                mask[row + code] = False
+        return mask
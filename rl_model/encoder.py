@@ -7,6 +7,8 @@ toy implementation (one-hot + linear) for experiments and demos only.
 import torch
 import torch.nn as nn
 
+from .encoding import as_model_input
+
 
 class SimpleEncoder(nn.Module):
     def __init__(self, seq_len, emb_dim=32):
@@ -19,4 +21,5 @@ class SimpleEncoder(nn.Module):
         )
 
     def forward(self, x):
-        return self.fc(x)
+        # accepts flattened one-hot features or raw sequences/code arrays
+        return self.fc(as_model_input(x))
@@ -0,0 +1,147 @@
+"""Sequence encoding helpers shared by the environment, reward and agent.
+
+Bases are stored as small integer codes (A=0, C=1, G=2, T=3) in uint8 arrays so
+whole batches of sequences can be edited and scored with NumPy instead of
+Python strings. Lowercase letters map to their uppercase base; anything else
+(N and other ambiguity codes) maps to ``N_CODE``, which one-hot encodes as an
+all-zero row and is the padding index for embeddings.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import torch
+
+BASES = "ACGT"
+N_CODE = 4
+# vocabulary size for nn.Embedding inputs (4 bases + padding/ambiguous)
+EMBED_VOCAB = N_CODE + 1
+
+SequenceLike = Union[str, bytes, bytearray, memoryview, np.ndarray]
+
+
+def build_lut(
+    alphabet: Sequence[str] = BASES,
+    fill: Optional[int] = None,
+    ignore_case: bool = True,
+) -> np.ndarray:
+    """Return a 256-entry byte -> code lookup table for ``alphabet``.
+
+    Lowercase letters share the code of their uppercase base unless
+    ``ignore_case`` is False. Bytes that are not part of the alphabet map to
+    ``fill`` (defaults to ``len(alphabet)``).
+    """
+    if fill is None:
+        fill = len(alphabet)
+    lut = np.full(256, fill, dtype=np.uint8)
+    for code, base in enumerate(alphabet):
+        if ignore_case:
+            lut[ord(base.upper())] = code
+            lut[ord(base.lower())] = code
+        else:
+            lut[ord(base)] = code
+    lut.flags.writeable = False
+    return lut
+
+
+BASE_LUT = build_lut(BASES)
+# exact-match table: only uppercase ACGT get a code, used where results must
+# agree with the string-based scorers
+STRICT_LUT = build_lut(BASES, ignore_case=False)
+
+
+def encode(seq: SequenceLike, lut: np.ndarray = BASE_LUT) -> np.ndarray:
+    """Encode a sequence into a uint8 code array.
+
+    Strings and bytes-like objects are treated as ASCII letters; NumPy arrays
+    and other array-likes (e.g. ``seqstore.SequenceView``) are assumed to
+    already hold codes and are returned as uint8.
+    """
+    if isinstance(seq, np.ndarray):
+        return seq.astype(np.uint8, copy=False)
+    if hasattr(seq, "__array__"):
+        return np.asarray(seq, dtype=np.uint8)
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+    return lut[np.frombuffer(seq, dtype=np.uint8)]
+
+
+def encode_batch(seqs, lut: np.ndarray = BASE_LUT) -> np.ndarray:
+    """Encode equal-length sequences into an ``(N, L)`` uint8 array."""
+    if isinstance(seqs, np.ndarray):
+        return np.atleast_2d(seqs.astype(np.uint8, copy=False))
+    if hasattr(seqs, "__array__"):
+        return np.atleast_2d(np.asarray(seqs, dtype=np.uint8))
+    return np.stack([encode(s, lut) for s in seqs])
+
+
+def decode(codes, alphabet: Sequence[str] = BASES) -> str:
+    """Decode a code array back into a string (unknown codes become ``N``)."""
+    table = np.frombuffer(("".join(alphabet) + "N").encode("ascii"), dtype=np.uint8)
+    codes = np.minimum(np.asarray(codes, dtype=np.uint8), len(alphabet))
+    return table[codes].tobytes().decode("ascii")
+
+
+_ONE_HOT_TABLE = torch.cat([torch.eye(4), torch.zeros(1, 4)])
+
+
+def _is_single(seqs) -> bool:
+    if isinstance(seqs, (str, bytes, bytearray, memoryview)):
+        return True
+    # arrays, tensors and store views all carry ndim
+    return getattr(seqs, "ndim", None) == 1
+
+
+def to_index_tensor(seqs, lut: np.ndarray = BASE_LUT) -> torch.Tensor:
+    """Return int64 base indices: ``(L,)`` for one sequence, ``(B, L)`` for a batch.
+
+    Accepts a string, bytes, uint8 code array, integer tensor, or a list of
+    any of those (equal length).
+    """
+    if isinstance(seqs, torch.Tensor):
+        return seqs.long()
+    if _is_single(seqs):
+        codes = encode(seqs, lut)
+    else:
+        codes = encode_batch(seqs, lut)
+    # astype copies, so read-only inputs (env observations) are fine here
+    return torch.from_numpy(codes.astype(np.int64))
+
+
+def one_hot(seqs, flatten: bool = True, lut: np.ndarray = BASE_LUT) -> torch.Tensor:
+    """One-hot encode one sequence or a batch in a single table lookup.
+
+    Returns ``(L*4,)``/``(B, L*4)`` when ``flatten`` else ``(L, 4)``/``(B, L, 4)``.
+    Ambiguous bases become all-zero rows.
+    """
+    idx = to_index_tensor(seqs, lut).clamp(max=N_CODE)
+    out = _ONE_HOT_TABLE[idx]
+    if flatten:
+        out = out.flatten(start_dim=-2)
+    return out
+
+
+def as_model_input(x) -> torch.Tensor:
+    """Pass float feature tensors through; one-hot encode anything sequence-like."""
+    if isinstance(x, torch.Tensor) and x.is_floating_point():
+        return x
+    out = one_hot(x)
+    return out.unsqueeze(0) if out.ndim == 1 else out
+
+
+__all__ = [
+    "BASES",
+    "N_CODE",
+    "EMBED_VOCAB",
+    "BASE_LUT",
+    "STRICT_LUT",
+    "build_lut",
+    "encode",
+    "encode_batch",
+    "decode",
+    "to_index_tensor",
+    "one_hot",
+    "as_model_input",
+]
@@ -1,18 +1,126 @@
 import random
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import numpy as np
+import torch
+
+from .encoding import build_lut, decode, encode
 from .sample_sequences import DemoCase, get_case
+from .seqstore import as_text
+
+
+def _resolve_sequences(
+    target_ft: Optional[str],
+    target_tfl1: Optional[str],
+    seq_len: Optional[int],
+    start_sequence: Optional[str],
+    case_id: Optional[str],
+    alphabet: List[str],
+) -> Tuple[Optional[DemoCase], str, str, str, int]:
+    """Pick the demo case or fill in ad-hoc sequences; shared by both envs.
+
+    Sequences may be ``seqstore.SequenceView`` windows; they are decoded once
+    here, since the env owns a mutable copy of its state anyway.
+    """
+    target_ft, target_tfl1, start_sequence = (
+        as_text(target_ft), as_text(target_tfl1), as_text(start_sequence)
+    )
+    case: Optional[DemoCase] = None
+    if seq_len is None and (target_ft is None or target_tfl1 is None or start_sequence is None):
+        case = get_case(case_id or "mdtfl1_to_mdft1")
+        target_ft = case.target_sequence
+        target_tfl1 = case.avoid_sequence
+        start_sequence = case.initial_sequence
+        seq_len = len(start_sequence)
+    else:
+        seq_len = seq_len or (len(start_sequence) if start_sequence else None)
+        if seq_len is None:
+            raise ValueError("seq_len or start_sequence must be provided for ad-hoc envs")
+        target_ft = target_ft or _random_sequence(alphabet, seq_len)
+        target_tfl1 = target_tfl1 or _random_sequence(alphabet, seq_len)
+        start_sequence = start_sequence or _random_sequence(alphabet, seq_len)
+
+    if len(start_sequence) != seq_len:
+        raise ValueError("start_sequence length must match seq_len")
+    if len(target_ft) != seq_len or len(target_tfl1) != seq_len:
+        raise ValueError("target sequences must match seq_len")
+    return case, target_ft, target_tfl1, start_sequence, seq_len
+
+
+def _random_sequence(alphabet: List[str], length: int) -> str:
+    return "".join(random.choices(alphabet, k=length))
+
+
+class EditHistory:
+    """Preallocated record of applied edits as a structured array.
+
+    Each row is ``(step, pos, from, to)`` with the bases stored as alphabet
+    codes. Iterating yields the ``{"step", "pos", "from", "to"}`` dicts the
+    env used to keep in a list, with letters decoded.
+    """
+
+    __slots__ = ("alphabet", "_data", "_n")
+    DTYPE = np.dtype([("step", np.int32), ("pos", np.int32), ("from", np.uint8), ("to", np.uint8)])
+
+    def __init__(self, capacity: int, alphabet: List[str]):
+        self.alphabet = alphabet
+        self._data = np.zeros(max(1, capacity), dtype=self.DTYPE)
+        self._n = 0
+
+    def append(self, step: int, pos: int, from_code: int, to_code: int) -> None:
+        if self._n == len(self._data):
+            self._data = np.concatenate([self._data, np.zeros_like(self._data)])
+        self._data[self._n] = (step, pos, from_code, to_code)
+        self._n += 1
+
+    def clear(self) -> None:
+        self._n = 0
+
+    @property
+    def records(self) -> np.ndarray:
+        """Read-only view of the filled rows."""
+        view = self._data[: self._n]
+        view.flags.writeable = False
+        return view
+
+    def edits(self) -> List[Tuple[int, str]]:
+        """``(pos, base)`` pairs in order, as used by ``visualize.animate_edit_history``."""
+        return [(int(r["pos"]), self.alphabet[r["to"]]) for r in self.records]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> dict:
+        r = self.records[i]
+        return {
+            "step": int(r["step"]),
+            "pos": int(r["pos"]),
+            "from": self.alphabet[r["from"]],
+            "to": self.alphabet[r["to"]],
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(self._n))
 
 
 class SequenceEnv:
     """A minimal sequence-editing environment backed by curated demo data.
 
-    Observation: current sequence as a string.
+    Observation (``obs_mode``):
+      - ``"codes"``: read-only uint8 view of the current sequence as alphabet
+        codes.
+      - ``"one_hot"``: flattened ``(L * |alphabet|,)`` float tensor that the
+        policy can consume directly.
+      - ``"index"``: ``(L,)`` int64 tensor of codes, e.g. for embeddings.
+    Each is a single persistent buffer that tracks the live state (edits touch
+    only the changed position), so copy it to keep a snapshot. The string
+    form is available on request through ``sequence``.
     Action: (pos, base) where base is part of the alphabet (default DNA).
     Episode ends after max_edits steps or when the agent emits a noop.
     """
 
     BASES = ["A", "C", "G", "T"]
+    OBS_MODES = ("codes", "one_hot", "index")
 
     def __init__(
         self,
@@ -24,44 +132,60 @@ class SequenceEnv:
         noise_prob: float = 0.1,
         case_id: Optional[str] = None,
         alphabet: Optional[List[str]] = None,
+        obs_mode: str = "codes",
     ):
+        if obs_mode not in self.OBS_MODES:
+            raise ValueError(f"Unknown obs_mode '{obs_mode}'. Available: {', '.join(self.OBS_MODES)}")
+        self.obs_mode = obs_mode
         self.max_edits = max_edits
         self.noise_prob = noise_prob
         self.alphabet = alphabet or self.BASES
-        self.case: Optional[DemoCase] = None
-
-        if seq_len is None and (target_ft is None or target_tfl1 is None or start_sequence is None):
-            self.case = get_case(case_id or "mdtfl1_to_mdft1")
-            target_ft = self.case.target_sequence
-            target_tfl1 = self.case.avoid_sequence
-            start_sequence = self.case.initial_sequence
-            seq_len = len(start_sequence)
-        else:
-            seq_len = seq_len or (len(start_sequence) if start_sequence else None)
-            if seq_len is None:
-                raise ValueError("seq_len or start_sequence must be provided for ad-hoc envs")
-            target_ft = target_ft or self._random_sequence(seq_len)
-            target_tfl1 = target_tfl1 or self._random_sequence(seq_len)
-            start_sequence = start_sequence or self._random_sequence(seq_len)
-
-        if len(start_sequence) != seq_len:
-            raise ValueError("start_sequence length must match seq_len")
-        if len(target_ft) != seq_len or len(target_tfl1) != seq_len:
-            raise ValueError("target sequences must match seq_len")
+        self.case, target_ft, target_tfl1, start_sequence, seq_len = _resolve_sequences(
+            target_ft, target_tfl1, seq_len, start_sequence, case_id, self.alphabet
+        )
 
         self.seq_len = seq_len
         self.target_ft = target_ft
         self.target_tfl1 = target_tfl1
         self.start_sequence = start_sequence
-        self.sequence = start_sequence
+        self._lut = build_lut(self.alphabet)
+        self._base_codes = {b: i for i, b in enumerate(self.alphabet)}
+        self.codes = np.empty(seq_len, dtype=np.uint8)
+        if obs_mode == "one_hot":
+            self._obs = torch.zeros(seq_len * len(self.alphabet))
+        elif obs_mode == "index":
+            self._obs = torch.zeros(seq_len, dtype=torch.long)
+        else:
+            self._obs = self.codes.view()
+            self._obs.flags.writeable = False
         self.initial_sequence = start_sequence
-        self.history = []
+        # one row per possible edit; grows past the cap only for huge budgets
+        self.history = EditHistory(min(max_edits, 4096), self.alphabet)
         self.steps = 0
 
         self.reset()
 
+    @property
+    def sequence(self) -> str:
+        return decode(self.codes, self.alphabet)
+
+    @sequence.setter
+    def sequence(self, value: str) -> None:
+        self.codes[:] = encode(value, self._lut)
+        self._sync_obs()
+
+    def _sync_obs(self) -> None:
+        """Rebuild a tensor observation from ``codes`` (only on reset/assignment)."""
+        if self.obs_mode == "one_hot":
+            self._obs.zero_()
+            pos = np.flatnonzero(self.codes < len(self.alphabet))
+            flat = pos * len(self.alphabet) + self.codes[pos]
+            self._obs[torch.from_numpy(flat)] = 1.0
+        elif self.obs_mode == "index":
+            self._obs.copy_(torch.from_numpy(self.codes))
+
     def _random_sequence(self, length: int) -> str:
-        return "".join(random.choices(self.alphabet, k=length))
+        return _random_sequence(self.alphabet, length)
 
     def _mutate_sequence(self, sequence: str, prob: float) -> str:
         seq_list = list(sequence)
@@ -73,14 +197,14 @@ class SequenceEnv:
 
     def reset(self):
         # start near the curated sequence with a bit of noise for variability
-        self.sequence = self._mutate_sequence(self.start_sequence, self.noise_prob)
-        self.initial_sequence = self.sequence
+        self.initial_sequence = self._mutate_sequence(self.start_sequence, self.noise_prob)
+        self.sequence = self.initial_sequence
         self.steps = 0
-        self.history = []
+        self.history.clear()
         return self._get_obs()
 
     def _get_obs(self):
-        return self.sequence
+        return self._obs
 
     def step(self, action):
         """Apply action and return obs, reward, done, info."""
@@ -92,17 +216,21 @@ class SequenceEnv:
 
         pos, base = action
         pos = int(pos)
-        base = str(base)
-        old = self.sequence
-        if pos < 0 or pos >= self.seq_len or base not in self.alphabet:
+        code = self._base_codes.get(str(base))
+        if pos < 0 or pos >= self.seq_len or code is None:
             raise ValueError("Invalid action")
 
-        if old[pos] != base:
-            seq_list = list(old)
-            prev_base = seq_list[pos]
-            seq_list[pos] = base
-            self.sequence = "".join(seq_list)
-            self.history.append({"step": self.steps, "pos": pos, "from": prev_base, "to": base})
+        prev = int(self.codes[pos])
+        if prev != code:
+            self.codes[pos] = code
+            if self.obs_mode == "one_hot":
+                row = pos * len(self.alphabet)
+                if prev < len(self.alphabet):
+                    self._obs[row + prev] = 0.0
+                self._obs[row + code] = 1.0
+            elif self.obs_mode == "index":
+                self._obs[pos] = code
+            self.history.append(self.steps, pos, prev, code)
 
         self.steps += 1
         done = self.steps >= self.max_edits
@@ -112,3 +240,125 @@ class SequenceEnv:
 
     def render(self):
         print(f"seq={self.sequence} steps={self.steps}")
+
+
+class VecSequenceEnv:
+    """N copies of :class:`SequenceEnv` stepped together as one uint8 array.
+
+    Observation: ``(N, L)`` uint8 array of base codes (index into ``alphabet``).
+    Action: ``(N, 2)`` integer array of ``(pos, base_idx)`` rows; a negative
+    ``pos`` is a noop and ends that slot's episode, like ``SequenceEnv.step(None)``.
+
+    With ``autoreset`` enabled, slots that finish are reset in the same call
+    and their terminal observation is returned in ``info["final_obs"]``.
+    Otherwise finished slots ignore further actions until :meth:`reset`.
+    """
+
+    BASES = SequenceEnv.BASES
+
+    def __init__(
+        self,
+        num_envs: int,
+        target_ft: Optional[str] = None,
+        target_tfl1: Optional[str] = None,
+        seq_len: Optional[int] = None,
+        max_edits: int = 10,
+        start_sequence: Optional[str] = None,
+        noise_prob: float = 0.1,
+        case_id: Optional[str] = None,
+        alphabet: Optional[List[str]] = None,
+        autoreset: bool = True,
+        seed: Optional[int] = None,
+    ):
+        if num_envs < 1:
+            raise ValueError("num_envs must be positive")
+        self.num_envs = num_envs
+        self.max_edits = max_edits
+        self.noise_prob = noise_prob
+        self.alphabet = alphabet or self.BASES
+        self.autoreset = autoreset
+        self.rng = np.random.default_rng(seed)
+
+        self.case, target_ft, target_tfl1, start_sequence, seq_len = _resolve_sequences(
+            target_ft, target_tfl1, seq_len, start_sequence, case_id, self.alphabet
+        )
+        self.seq_len = seq_len
+        self.target_ft = target_ft
+        self.target_tfl1 = target_tfl1
+        self.start_sequence = start_sequence
+
+        lut = build_lut(self.alphabet)
+        self.start_codes = encode(start_sequence, lut)
+        if (self.start_codes >= len(self.alphabet)).any():
+            raise ValueError("start_sequence contains bases outside the alphabet")
+
+        self.sequences = np.empty((num_envs, seq_len), dtype=np.uint8)
+        self.initial_sequences = np.empty_like(self.sequences)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.n_changed = np.zeros(num_envs, dtype=np.int64)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self._rows = np.arange(num_envs)
+
+        self.reset()
+
+    def _reset_slots(self, idx: np.ndarray) -> None:
+        n = len(idx)
+        if n == 0:
+            return
+        seqs = np.broadcast_to(self.start_codes, (n, self.seq_len)).copy()
+        if self.noise_prob > 0:
+            # Bernoulli mask per base; shift by 1..|alphabet|-1 so a flipped
+            # base always lands on one of the *other* letters, uniformly.
+            flip = self.rng.random((n, self.seq_len)) < self.noise_prob
+            shift = self.rng.integers(1, len(self.alphabet), size=(n, self.seq_len), dtype=np.uint8)
+            seqs = np.where(flip, (seqs + shift) % len(self.alphabet), seqs).astype(np.uint8)
+        self.sequences[idx] = seqs
+        self.initial_sequences[idx] = seqs
+        self.steps[idx] = 0
+        self.n_changed[idx] = 0
+        self.done[idx] = False
+
+    def reset(self) -> np.ndarray:
+        self._reset_slots(self._rows)
+        return self.sequences
+
+    def step(self, actions):
+        """Apply one action per slot and return obs, rewards, dones, info."""
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs, 2)
+        pos, base = actions[:, 0], actions[:, 1]
+        active = ~self.done
+        noop = active & (pos < 0)
+        edit = active & ~noop
+
+        if (edit & ((pos >= self.seq_len) | (base < 0) | (base >= len(self.alphabet)))).any():
+            raise ValueError("Invalid action")
+
+        rows = self._rows[edit]
+        cols = pos[edit]
+        new = base[edit].astype(np.uint8)
+        changed = self.sequences[rows, cols] != new
+        self.sequences[rows, cols] = new
+        self.n_changed[rows[changed]] += 1
+
+        self.steps[edit] += 1
+        dones = noop | (edit & (self.steps >= self.max_edits))
+        self.done |= dones
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)  # computed externally
+        changed_mask = np.zeros(self.num_envs, dtype=bool)
+        changed_mask[rows[changed]] = True
+        info = {"changed": changed_mask}
+        if self.autoreset and dones.any():
+            finished = self._rows[dones]
+            info["final_obs"] = self.sequences[finished].copy()
+            info["final_steps"] = self.steps[finished].copy()
+            info["final_slots"] = finished
+            self._reset_slots(finished)
+        return self.sequences, rewards, dones, info
+
+    def get_sequence(self, i: int) -> str:
+        return decode(self.sequences[i], self.alphabet)
+
+    def render(self):
+        for i in range(self.num_envs):
+            print(f"[{i}] seq={self.get_sequence(i)} steps={self.steps[i]}")
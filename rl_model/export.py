@@ -0,0 +1,306 @@
+"""Batch-render saved trajectories to HTML visualizations.
+
+A trajectory is a small JSON file written by ``save_trajectory``::
+
+    {"format": 1, "initial": "ACGT...", "edits": [[pos, "G"], ...], "meta": {...}}
+
+``export_directory`` renders every ``*.json`` trajectory in a directory,
+using ``visualize.animate_edit_history`` for short sequences and the
+level-of-detail ``plot_sequence_3d`` view above ``visualize.LOD_THRESHOLD``.
+It then writes an ``index.html`` linking them all:
+
+    python -m rl_model.export runs/ html/ --workers 8
+
+Rendering runs in a ``spawn`` process pool. Workers receive file paths, not
+contents, and at most ``max_in_flight`` renders are queued, so memory stays
+bounded however many trajectories there are. A ``manifest.json`` in the
+output directory records a sha256 of each input together with the render
+settings, and unchanged inputs are skipped on the next run. All pages share
+one ``plotly.min.js`` in the output directory. ``--open`` serves the output
+directory with a ``local_server.LocalServer`` of its own until interrupted; it
+compresses the bundle and lets browsers cache it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures as cf
+import contextlib
+import hashlib
+import html
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+TRAJECTORY_FORMAT = 1
+# bump when the rendered output changes, so cached pages are re-rendered
+RENDER_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def trajectory_from_env(env, **meta) -> dict:
+    """Trajectory dict for the episode recorded in ``env.history``."""
+    if env.case is not None:
+        meta.setdefault("case_id", env.case.case_id)
+    return {
+        "format": TRAJECTORY_FORMAT,
+        "initial": env.initial_sequence,
+        "edits": [[pos, base] for pos, base in env.history.edits()],
+        "meta": meta,
+    }
+
+
+def save_trajectory(path: str, initial: str, edits: List[Tuple[int, str]], **meta) -> None:
+    """Write a trajectory JSON atomically."""
+    doc = {
+        "format": TRAJECTORY_FORMAT,
+        "initial": initial,
+        "edits": [[int(pos), base] for pos, base in edits],
+        "meta": meta,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_trajectory(path: str) -> dict:
+    """Read a trajectory JSON; ``edits`` come back as ``(pos, base)`` tuples."""
+    with open(path, encoding="utf-8") as fh:
+        doc = json.load(fh)
+    if doc.get("format") != TRAJECTORY_FORMAT:
+        raise ValueError(f"{path}: unsupported trajectory format {doc.get('format')!r}")
+    doc["edits"] = [(int(pos), base) for pos, base in doc["edits"]]
+    doc.setdefault("meta", {})
+    return doc
+
+
+def _digest(path: str, settings: dict) -> str:
+    h = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def render_trajectory(src: str, out_html: str, include_plotlyjs="directory") -> Dict[str, object]:
+    """Render one trajectory file; returns the summary shown in the index."""
+    from .visualize import LOD_THRESHOLD, animate_edit_history, plot_sequence_3d
+
+    traj = load_trajectory(src)
+    initial, edits = traj["initial"], traj["edits"]
+    tmp = os.path.join(os.path.dirname(out_html), f".{os.path.basename(out_html)}.tmp{os.getpid()}")
+    try:
+        # the writers print a line per file; a batch of hundreds doesn't need them
+        with contextlib.redirect_stdout(io.StringIO()):
+            if len(initial) > LOD_THRESHOLD:
+                final = list(initial)
+                for pos, base in edits:
+                    final[pos] = base
+                plot_sequence_3d("".join(final), out_html=tmp, include_plotlyjs=include_plotlyjs, edits=edits)
+                view = "lod"
+            else:
+                animate_edit_history(initial, edits, out_html=tmp, include_plotlyjs=include_plotlyjs)
+                view = "animation"
+        os.replace(tmp, out_html)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {"length": len(initial), "edits": len(edits), "view": view, "meta": traj["meta"]}
+
+
+def _render_job(src: str, out_html: str) -> Tuple[str, Dict[str, object]]:
+    try:
+        return "ok", render_trajectory(src, out_html)
+    except Exception as exc:
+        return "error", {"error": f"{type(exc).__name__}: {exc}"}
+
+
+def _job_result(fut) -> Tuple[str, Dict[str, object]]:
+    # a worker that dies (OOM kill, segfault) breaks the whole pool: every
+    # pending future then raises BrokenProcessPool
+    try:
+        return fut.result()
+    except BrokenProcessPool as exc:
+        return "error", {"error": f"{type(exc).__name__}: {exc}"}
+
+
+def _ensure_plotly_bundle(out_dir: str) -> None:
+    # written once up front so concurrent workers never race on it
+    path = os.path.join(out_dir, "plotly.min.js")
+    if not os.path.exists(path):
+        from plotly.offline import get_plotlyjs
+
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(get_plotlyjs())
+        os.replace(tmp, path)
+
+
+def _load_manifest(out_dir: str) -> Dict[str, dict]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def export_directory(
+    src_dir: str,
+    out_dir: str,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, object]:
+    """Render every trajectory in ``src_dir`` into ``out_dir`` plus ``index.html``.
+
+    ``workers`` defaults to the CPU count; ``workers=1`` renders in this
+    process. At most ``max_in_flight`` (default ``2 * workers``) renders are
+    queued at once. Inputs whose hash matches the manifest are skipped unless
+    ``force``. Returns counts plus the per-file manifest entries.
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    settings = {"render": RENDER_VERSION}
+    manifest = _load_manifest(out_dir)
+    sources = sorted(f for f in os.listdir(src_dir) if f.endswith(".json"))
+
+    todo = []
+    skipped = 0
+    entries: Dict[str, dict] = {}
+    for name in sources:
+        src = os.path.join(src_dir, name)
+        digest = _digest(src, settings)
+        out_name = f"{os.path.splitext(name)[0]}.html"
+        old = manifest.get(name)
+        if (
+            not force and old and old.get("sha256") == digest and old.get("status") == "ok"
+            and os.path.exists(os.path.join(out_dir, out_name))
+        ):
+            entries[name] = old
+            skipped += 1
+        else:
+            todo.append((name, src, out_name, digest))
+
+    # every call, so skipped pages still find the bundle if it was deleted
+    _ensure_plotly_bundle(out_dir)
+
+    def record(item, result) -> None:
+        name, _, out_name, digest = item
+        status, summary = result
+        entries[name] = {"sha256": digest, "html": out_name, "status": status, **summary}
+
+    if workers == 1:
+        for item in todo:
+            record(item, _render_job(item[1], os.path.join(out_dir, item[2])))
+    elif todo:
+        with cf.ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            pending = {}
+            for item in todo:
+                try:
+                    pending[pool.submit(_render_job, item[1], os.path.join(out_dir, item[2]))] = item
+                except BrokenProcessPool as exc:
+                    record(item, ("error", {"error": f"{type(exc).__name__}: {exc}"}))
+                    continue
+                if len(pending) >= max_in_flight:
+                    done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                    for fut in done:
+                        record(pending.pop(fut), _job_result(fut))
+            for fut in cf.as_completed(pending):
+                record(pending[fut], _job_result(fut))
+
+    # drop entries for inputs that no longer exist
+    entries = {name: entries[name] for name in sources}
+    _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(entries, indent=1, sort_keys=True))
+    _write_atomic(os.path.join(out_dir, "index.html"), _index_html(entries))
+    failed = sum(1 for e in entries.values() if e["status"] != "ok")
+    return {
+        "rendered": len(todo) - failed,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": time.perf_counter() - start,
+        "entries": entries,
+    }
+
+
+def _index_html(entries: Dict[str, dict]) -> str:
+    rows = []
+    for name, e in entries.items():
+        link = f'<a href="{html.escape(e["html"])}">{html.escape(name)}</a>'
+        if e["status"] != "ok":
+            rows.append(f"<tr><td>{html.escape(name)}</td><td colspan=4>{html.escape(e['error'])}</td></tr>")
+            continue
+        meta = ", ".join(f"{k}={v}" for k, v in sorted(e.get("meta", {}).items()))
+        rows.append(
+            f"<tr><td>{link}</td><td>{e['length']}</td><td>{e['edits']}</td>"
+            f"<td>{e['view']}</td><td>{html.escape(meta)}</td></tr>"
+        )
+    return (
+        "<!doctype html>\n<html><head><meta charset=\"utf-8\"><title>Trajectories</title>"
+        "<style>body{font-family:sans-serif}td,th{padding:2px 10px;text-align:left}</style></head><body>\n"
+        f"<h1>Trajectories ({len(entries)})</h1>\n<table>\n"
+        "<tr><th>run</th><th>length</th><th>edits</th><th>view</th><th>meta</th></tr>\n"
+        + "\n".join(rows)
+        + "\n</table></body></html>\n"
+    )
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Render a directory of trajectory JSON files to HTML")
+    p.add_argument("src", help="directory of trajectory .json files")
+    p.add_argument("out", help="output directory (index.html, one page per trajectory)")
+    p.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count)")
+    p.add_argument("--max-in-flight", type=int, default=None)
+    p.add_argument("--force", action="store_true", help="re-render unchanged inputs too")
+    p.add_argument("--open", action="store_true", help="serve the output directory and open index.html")
+    args = p.parse_args(argv)
+    result = export_directory(args.src, args.out, args.workers, args.max_in_flight, args.force)
+    print(
+        f"rendered {result['rendered']}, skipped {result['skipped']}, failed {result['failed']} "
+        f"in {result['seconds']:.2f}s -> {os.path.join(args.out, 'index.html')}"
+    )
+    if args.open:
+        import webbrowser
+
+        from .local_server import LocalServer
+
+        # its own root rather than the shared server, which only serves the repo
+        server = LocalServer(("127.0.0.1", 0), root=args.out)
+        url = f"http://127.0.0.1:{server.port}/index.html"
+        print(f"Serving {url} (Ctrl-C to stop)")
+        webbrowser.open_new_tab(url)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return 1 if result["failed"] else 0
+
+
+__all__ = [
+    "save_trajectory",
+    "load_trajectory",
+    "trajectory_from_env",
+    "render_trajectory",
+    "export_directory",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,22 @@
-"""Simple Tkinter GUI to start training with a fake progress bar.
+"""Simple Tkinter GUI to start training and follow its progress.
 
-This GUI launches the same toy training loop in a background thread but
-displays a simulated progress bar so the UI remains responsive and
-predictable for demos.
+Training runs in a child process (``jobs.TrainingJob``) that streams progress
+events; the GUI polls them every frame with ``after`` so the UI stays
+responsive, and the Cancel button stops the run between episodes.
 
 Note: This is a demo UI. It does not provide any wet-lab instructions.
 """
 
-import threading
-import time
-import random
 import tkinter as tk
 from tkinter import ttk
 import webbrowser
-import os
-import urllib.parse
-import http.server
-import socketserver
-from functools import partial
 
-from .env import SequenceEnv
+from .jobs import TrainingJob
 from .sample_sequences import get_case
-from .train import train as train_fn
+from .local_server import ensure_server, visualizer_url
+
+# ~60 fps polling of the training process' event queue
+POLL_MS = 16
 
 
 class TrainingGUI:
@@ -40,18 +35,20 @@ class TrainingGUI:
         self.case_id = case_id
         self.case = get_case(case_id)
         
-        # HTTP server for serving visualizer
-        self.httpd = None
-        self.server_port = 8765
-        self.server_thread = None
+        # client for the shared local server (rl_model/local_server.py), on demand
+        self.server = None
 
         master.title("BloomSync AI — Training Demo")
 
         self.frame = ttk.Frame(master, padding=12)
         self.frame.grid(row=0, column=0, sticky="nsew")
 
-        self.start_btn = ttk.Button(self.frame, text="Start Training", command=self.start_training)
-        self.start_btn.grid(row=0, column=0, pady=(0, 8))
+        self.buttons = ttk.Frame(self.frame)
+        self.buttons.grid(row=0, column=0, pady=(0, 8))
+        self.start_btn = ttk.Button(self.buttons, text="Start Training", command=self.start_training)
+        self.start_btn.grid(row=0, column=0, padx=(0, 4))
+        self.cancel_btn = ttk.Button(self.buttons, text="Cancel", command=self.cancel_training, state="disabled")
+        self.cancel_btn.grid(row=0, column=1)
 
         case_text = (
             f"Scenario: {self.case.initial_name} → {self.case.target_name} "
@@ -112,177 +109,138 @@ class TrainingGUI:
         self.preset_combo.grid(row=8, column=0, pady=(8, 0))
         self.preset_combo.bind("<<ComboboxSelected>>", self._on_preset_selected)
 
-        self.training_thread = None
-        self.training_done = False
-        self.agent = None
-        self.env = None
+        self.job = None
+        self._dead_polls = 0
+        self.objectives = []
         self.initial_sequence = None  # Store initial sequence for visualizer
+        self.final_sequence = None
         self.reward_trace = []
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def start_training(self):
-        if self.training_thread and self.training_thread.is_alive():
+        if self.job and self.job.is_alive():
             return
         self.start_btn.config(state="disabled")
-        self.status_lbl.config(text="Training started...")
+        self.cancel_btn.config(state="normal")
+        self.viz_btn.config(state="disabled")
+        self.status_lbl.config(text="Starting training process...")
         self.progress.set(0)
-        self.training_done = False
-
-        # create a fresh env and show the initial sequence
-        # we create it here so the GUI can display the starting seq immediately
-        try:
-            self.env = SequenceEnv(
-                seq_len=self.seq_len,
-                max_edits=self.max_edits,
-                case_id=self.case_id,
-            )
-            # attach selected objectives to the env (non-intrusive attribute)
-            self.env.objectives = self.get_selected_objectives()
-            # Store the initial sequence for the visualizer
-            self.initial_sequence = self.env.sequence
-            # show initial sequence and selected objectives
-            selected = self._format_selected_objectives(self.env.objectives)
-            if selected:
-                self.initial_lbl.config(text=f"Initial seq: {self.env.sequence} | Objectives: {selected}")
-            else:
-                self.initial_lbl.config(text=f"Initial seq: {self.env.sequence}")
-        except Exception:
-            self.initial_lbl.config(text="Initial seq: N/A")
-
-        # start real training in background thread
-        self.training_thread = threading.Thread(target=self._run_training)
-        self.training_thread.daemon = True
-        self.training_thread.start()
-
-        # start fake progress animation
-        self._simulate_progress()
-
-    def _run_training(self):
-        # Run the existing toy training loop; this may take a few seconds.
-        try:
-            # pass pre-created env so GUI and training reference the same sequence
-            self.agent, self.env, self.reward_trace = train_fn(
-                episodes=self.episodes,
-                seq_len=self.seq_len,
-                max_edits=self.max_edits,
-                env=self.env,
-                case_id=self.case_id,
-            )
-        except Exception as e:
-            # capture error and show in UI thread
-            self.master.after(0, lambda: self._on_failure(str(e)))
+        self.initial_sequence = self.final_sequence = None
+        self.objectives = self.get_selected_objectives()
+
+        # the child process reuses (or warm-starts from) a cached agent for the
+        # same case/settings; see checkpoint.train_cached
+        self.job = TrainingJob(
+            episodes=self.episodes,
+            seq_len=self.seq_len,
+            max_edits=self.max_edits,
+            case_id=self.case_id,
+        ).start()
+        self._dead_polls = 0
+        self.master.after(POLL_MS, self._poll_events)
+
+    def cancel_training(self):
+        if self.job and self.job.is_alive():
+            self.job.cancel()
+            self.cancel_btn.config(state="disabled")
+            self.status_lbl.config(text="Cancelling...")
+
+    def _poll_events(self):
+        if self.job is None:
             return
-        self.training_done = True
-        # ensure UI finalization runs on main thread
-        self.master.after(0, self._on_done)
-
-    def _simulate_progress(self):
-        # Increment progress by a small random amount, cap below 100 until done.
-        cur = self.progress.get()
-        if self.training_done:
-            self.progress.set(100)
+        events = self.job.poll()
+        for event in events:
+            kind = event["type"]
+            if kind == "started":
+                self._show_seq(self.initial_lbl, "Initial seq", event["initial"])
+            elif kind == "progress":
+                self.progress.set(int(100 * event["episode"] / event["episodes"]))
+                self.status_lbl.config(
+                    text=(
+                        f"Episode {event['episode']}/{event['episodes']}  "
+                        f"reward {event['reward']:+.3f}  best {event['best_reward']:+.3f}  "
+                        f"({event['episodes_per_sec']:.0f} ep/s)"
+                    )
+                )
+                self._show_seq(self.result_lbl, "Best seq", event["best_sequence"])
+            elif kind == "done":
+                self._on_done(event)
+                return
+            elif kind == "cancelled":
+                self._finish(f"Training cancelled at episode {event['episode'] or '?'}")
+                return
+            elif kind == "error":
+                self._on_failure(event["message"].strip().splitlines()[-1])
+                return
+        # a dead child may still have events in flight; give it ~0.5 s
+        self._dead_polls = self._dead_polls + 1 if not events and not self.job.is_alive() else 0
+        if self._dead_polls > 30:
+            self._on_failure("training process exited unexpectedly")
             return
+        self.master.after(POLL_MS, self._poll_events)
 
-        # increase quickly at first, then slower
-        step = random.randint(2, 5) if cur < 60 else random.randint(1, 3)
-        new = min(cur + step, 95)
-        self.progress.set(new)
-        # schedule next update
-        self.master.after(100, self._simulate_progress)
+    def _show_seq(self, label, title, seq):
+        selected = self._format_selected_objectives(self.objectives)
+        if selected:
+            label.config(text=f"{title}: {seq} | Objectives: {selected}")
+        else:
+            label.config(text=f"{title}: {seq}")
 
-    def _on_done(self):
+    def _on_done(self, event):
         self.progress.set(100)
+        self.reward_trace = event["rewards"]
+        self.initial_sequence = event["initial"]
+        self.final_sequence = event["final"]
         final_reward = self.reward_trace[-1] if self.reward_trace else 0.0
-        self.status_lbl.config(text=f"Training finished (reward {final_reward:+.3f})")
-        final = getattr(self.env, 'sequence', 'N/A')
-        # display final sequence and the objectives that were used
-        objectives = getattr(self.env, 'objectives', [])
-        selected = self._format_selected_objectives(objectives)
-        if selected:
-            self.result_lbl.config(text=f"Final seq: {final} | Objectives: {selected}")
-        else:
-            self.result_lbl.config(text=f"Final seq: {final}")
-        self.start_btn.config(state="normal")
+        source = "loaded from cache" if event["cached"] else "finished"
+        self._finish(f"Training {source} (reward {final_reward:+.3f})")
+        # display the final sequence and the objectives that were used
+        self._show_seq(self.initial_lbl, "Initial seq", self.initial_sequence)
+        self._show_seq(self.result_lbl, "Final seq", self.final_sequence)
         # Enable visualizer button
         self.viz_btn.config(state="normal")
 
-    def _on_failure(self, msg):
-        self.status_lbl.config(text=f"Error: {msg}")
+    def _finish(self, text):
+        self.status_lbl.config(text=text)
         self.start_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        self.job = None
+
+    def _on_close(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job.terminate()
+        self.master.destroy()
+
+    def _on_failure(self, msg):
+        self._finish(f"Error: {msg}")
         self.reward_trace = []
     
-    def _start_server(self):
-        """Start a simple HTTP server to serve the visualizer HTML."""
-        if self.httpd is not None:
-            return  # Server already running
-        
-        # Get the parent directory path
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(script_dir)
-        
-        # Create a custom handler that serves from parent_dir
-        handler = partial(http.server.SimpleHTTPRequestHandler, directory=parent_dir)
-        
-        # Find an available port
-        for port in range(self.server_port, self.server_port + 10):
-            try:
-                self.httpd = socketserver.TCPServer(("", port), handler)
-                self.server_port = port
-                break
-            except OSError:
-                continue
-        
-        if self.httpd is None:
-            print("Error: Could not find available port for server")
-            return
-        
-        # Start server in background thread
-        self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
-        self.server_thread.start()
-        print(f"[INFO] HTTP server started on port {self.server_port}")
-    
     def open_visualizer(self):
-        """Open the HTML visualizer with the initial and final sequences as URL parameters."""
-        if not self.initial_sequence or not self.env:
-            return
-        
-        # Start the HTTP server if not already running
-        self._start_server()
-        
-        if self.httpd is None:
-            self.status_lbl.config(text="Error: Could not start server")
+        """Open the HTML visualizer for the initial and final sequences via the shared local server."""
+        if not self.initial_sequence or not self.final_sequence:
             return
-        
-        # Get the path to the HTML file to verify it exists
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(script_dir)
-        html_path = os.path.join(parent_dir, "sequence_transformation_viz.html")
-        
-        # Check if file exists
-        if not os.path.exists(html_path):
-            self.status_lbl.config(text="Error: Visualizer HTML not found")
+
+        try:
+            # reuses the machine's server (one per machine, shared by every tab)
+            if self.server is None:
+                self.server = ensure_server()
+            url = visualizer_url(
+                self.server, self.initial_sequence, self.final_sequence,
+                case_id=self.case_id, rewards=list(self.reward_trace),
+            )
+        except (OSError, RuntimeError) as exc:
+            self.server = None
+            self.status_lbl.config(text=f"Error: could not reach local server ({exc})")
             return
-        
-        # Build URL with query parameters
-        final_seq = self.env.sequence
-        
-        print(f"\n[DEBUG] Opening visualizer:")
+
+        print("\n[DEBUG] Opening visualizer:")
         print(f"  Initial sequence: {self.initial_sequence}")
-        print(f"  Final sequence:   {final_seq}")
-        
-        # URL encode the sequences
-        params = urllib.parse.urlencode({
-            'initial': self.initial_sequence,
-            'target': final_seq
-        })
-        
-        # Use localhost URL instead of file://
-        url = f"http://localhost:{self.server_port}/sequence_transformation_viz.html?{params}"
-        
-        print(f"  URL: {url}")
-        
-        # Open in browser
+        print(f"  Final sequence:   {self.final_sequence}")
+        print(f"  URL: {url[:120]}")
+
         webbrowser.open_new_tab(url)
-        self.status_lbl.config(text=f"Visualizer opened at localhost:{self.server_port}")
+        self.status_lbl.config(text=f"Visualizer opened at {self.server.base_url}")
 
     def _on_preset_selected(self, event=None):
         """Apply a preset to the checkbox vars."""
@@ -312,8 +270,8 @@ class TrainingGUI:
     def get_selected_objectives(self):
         """Return a list of selected objective keys (non-destructive).
 
-        This attaches to the env as a simple attribute; the training loop
-        itself is unchanged and will run the same way.
+        They are shown next to the sequences; the training loop itself is
+        unchanged and will run the same way.
         """
         return [k for k, v in self.obj_vars.items() if v.get()]
 
@@ -0,0 +1,150 @@
+"""Run training in a child process and stream progress events back.
+
+``TrainingJob`` starts ``checkpoint.train_cached`` in a ``spawn``-ed process,
+so PyTorch never competes with a UI thread for the GIL. The child puts small
+dict events on a ``multiprocessing.Queue``:
+
+  - ``{"type": "started", "episodes", "initial"}``
+  - ``{"type": "progress", "episode", "episodes", "reward", "best_reward",
+    "best_sequence", "episodes_per_sec"}``, throttled to ``progress_hz``
+  - ``{"type": "done", "initial", "final", "rewards", "cached"}``
+  - ``{"type": "cancelled", "episode"}`` or ``{"type": "error", "message"}``
+
+Episode numbers count from the start of the cached run, so a warm-started
+job picks up at the cached episode count. ``poll()`` never blocks.
+``cancel()`` sets an ``Event`` that the job's ``on_episode_end`` callback
+checks after every episode, so the child exits on its own between episodes.
+The agent is saved to the model cache either way.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from typing import List, Optional
+
+from .callbacks import FunctionCallback, RateLimited, TrainingCallback
+
+
+class _JobReporter(TrainingCallback):
+    """Streams rate-limited progress events and checks for cancellation."""
+
+    def __init__(self, events, cancel, episodes: int, progress_hz: float):
+        self.events = events
+        self.cancel = cancel
+        self.episodes = episodes
+        self.start = time.perf_counter()
+        self.best = float("-inf")
+        self.best_sequence = None
+        self.last_episode = 0
+        # first episode index of this run (non-zero when resuming from the cache)
+        self.first_episode = None
+        self._progress = RateLimited(FunctionCallback(self._send_progress), 1.0 / progress_hz)
+
+    def _send_progress(self, episode, reward, env=None) -> None:
+        self.events.put({
+            "type": "progress",
+            "episode": episode + 1,
+            "episodes": self.episodes,
+            "reward": reward,
+            "best_reward": self.best,
+            "best_sequence": self.best_sequence,
+            "episodes_per_sec": (episode + 1 - self.first_episode) / max(time.perf_counter() - self.start, 1e-9),
+        })
+
+    def on_best(self, episode, reward, sequence):
+        self.best, self.best_sequence = reward, sequence
+
+    def on_episode_end(self, episode, reward, env):
+        if self.first_episode is None:
+            self.first_episode = episode
+        self.last_episode = episode + 1
+        if episode + 1 == self.episodes:
+            self._send_progress(episode, reward)
+        else:
+            self._progress.on_episode_end(episode, reward, env)
+        # checked every episode, never rate-limited
+        return self.cancel.is_set()
+
+
+def _job_main(events, cancel, train_kwargs, progress_hz) -> None:
+    from .checkpoint import train_cached
+    from .env import SequenceEnv
+
+    try:
+        env_kwargs = {k: train_kwargs.pop(k) for k in ("seq_len", "max_edits", "case_id") if k in train_kwargs}
+        env = SequenceEnv(obs_mode="one_hot", **env_kwargs)
+        episodes = train_kwargs.pop("episodes")
+        events.put({"type": "started", "episodes": episodes, "initial": env.initial_sequence})
+
+        reporter = _JobReporter(events, cancel, episodes, progress_hz)
+        _, env, rewards = train_cached(episodes=episodes, env=env, callbacks=[reporter], **train_kwargs)
+        if cancel.is_set():
+            events.put({"type": "cancelled", "episode": reporter.last_episode})
+        else:
+            events.put({
+                "type": "done",
+                "initial": env.initial_sequence,
+                "final": env.sequence,
+                "rewards": list(rewards),
+                "cached": reporter.last_episode == 0,
+            })
+    except Exception:
+        events.put({"type": "error", "message": traceback.format_exc(limit=3)})
+
+
+class TrainingJob:
+    """One background training run; see the module docstring for the events."""
+
+    def __init__(self, episodes: int = 200, progress_hz: float = 30.0, **train_kwargs):
+        self.train_kwargs = dict(train_kwargs, episodes=episodes)
+        self.progress_hz = progress_hz
+        ctx = mp.get_context("spawn")
+        self._events = ctx.Queue()
+        self._cancel = ctx.Event()
+        self._proc = ctx.Process(
+            target=_job_main,
+            args=(self._events, self._cancel, self.train_kwargs, progress_hz),
+            daemon=True,
+        )
+        self._cancel_deadline: Optional[float] = None
+
+    def start(self) -> "TrainingJob":
+        self._proc.start()
+        return self
+
+    def poll(self, max_events: int = 100) -> List[dict]:
+        """Return the events received so far (at most ``max_events``) without blocking."""
+        out = []
+        while len(out) < max_events:
+            try:
+                out.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        # a child that ignores cancellation (e.g. stuck in one huge episode) is
+        # terminated after the grace period
+        if self._cancel_deadline is not None and time.monotonic() > self._cancel_deadline and self.is_alive():
+            self._proc.terminate()
+            out.append({"type": "cancelled", "episode": None})
+            self._cancel_deadline = None
+        return out
+
+    def cancel(self, grace: float = 5.0) -> None:
+        self._cancel.set()
+        self._cancel_deadline = time.monotonic() + grace
+
+    def is_alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._proc.join(timeout)
+
+    def terminate(self) -> None:
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._proc.join(1.0)
+
+
+__all__ = ["TrainingJob"]
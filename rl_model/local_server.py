@@ -0,0 +1,520 @@
+"""Shared local HTTP server for the visualizers, the GUI and the exporters.
+
+One threaded server per machine serves the repository's HTML/JS assets:
+
+  - ``GET /<path>``: static files under the root, compressed once per file
+    version (gzip, and brotli when the ``brotli`` package is installed) and
+    cached in memory. Responses carry a content ``ETag`` (``If-None-Match``
+    gets a 304) and ``Cache-Control``: HTML revalidates on every load, other
+    assets are cached for an hour. Dot-files and dot-directories (``.git``)
+    are never served.
+  - ``POST /api/session`` stores a JSON document and returns ``{"id"}``;
+    ``GET /api/session/<id>`` returns it. Sessions hold run data such as a
+    ``payload`` token for ``sequence_transformation_viz.html#session=<id>``.
+  - ``GET /api/health`` identifies the server.
+
+``ensure_server()`` returns a client for the running server. If none
+answers, it starts one as a detached ``python -m rl_model.local_server`` process.
+The port and pid go into ``~/.cache/bloomsync/server.json``, and a lock
+file keeps two callers from starting two servers. An auto-started server
+exits after ``DEFAULT_IDLE_TIMEOUT`` seconds without requests.
+
+The server listens on 127.0.0.1 only and answers only requests whose
+``Host`` is a loopback name, so a web page cannot reach it through DNS
+rebinding. POST bodies must be ``application/json``, which a cross-site
+page cannot send without a CORS preflight (never granted).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no start-up lock
+    fcntl = None
+
+SERVER_VERSION = 2
+DEFAULT_PORT = 8765
+DEFAULT_IDLE_TIMEOUT = 3600.0
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bloomsync")
+
+_COMPRESSIBLE = {".html", ".htm", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".csv", ".md", ".fasta", ".fa"}
+_MIN_COMPRESS = 1024
+_MAX_BODY = 64 << 20
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class _Asset:
+    __slots__ = ("version", "etag", "ctype", "raw", "gzip", "br")
+
+    def __init__(self, version, raw: bytes, ctype: str, compress: bool):
+        self.version = version
+        self.raw = raw
+        self.ctype = ctype
+        self.etag = '"' + hashlib.sha1(raw).hexdigest()[:20] + '"'
+        self.gzip = self.br = None
+        if compress:
+            self.gzip = gzip.compress(raw, 9)
+            if brotli is not None:
+                self.br = brotli.compress(raw)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.raw) + len(self.gzip or b"") + len(self.br or b"")
+
+    def body(self, accept_encoding: str):
+        """``(bytes, content_encoding)`` for the client's ``Accept-Encoding``."""
+        accepted = _accepted_encodings(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.raw, None
+
+
+def _accepted_encodings(header: str) -> set:
+    out = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            out.add(name.lower())
+    return out
+
+
+class AssetCache:
+    """Files with their precompressed variants, keyed by path and (mtime, size)."""
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, _Asset]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> _Asset:
+        st = os.stat(path)
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            asset = self._items.get(path)
+            if asset is not None and asset.version == version:
+                self._items.move_to_end(path)
+                return asset
+        # load and compress outside the lock; concurrent misses just race
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        ext = os.path.splitext(path)[1].lower()
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ext in (".js", ".mjs", ".json"):
+            ctype += "; charset=utf-8"
+        asset = _Asset(version, raw, ctype, ext in _COMPRESSIBLE and len(raw) >= _MIN_COMPRESS)
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if asset.nbytes <= self.max_bytes:
+                self._items[path] = asset
+                self._bytes += asset.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._items.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return asset
+
+
+class SessionStore:
+    """In-memory JSON documents by random ID; the oldest are dropped past
+    ``capacity`` documents or ``max_bytes`` in total."""
+
+    def __init__(self, capacity: int = 512, max_bytes: int = 256 << 20):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, body: bytes) -> str:
+        sid = secrets.token_urlsafe(9)
+        with self._lock:
+            self._items[sid] = body
+            self._bytes += len(body)
+            while len(self._items) > self.capacity or (self._bytes > self.max_bytes and len(self._items) > 1):
+                _, dropped = self._items.popitem(last=False)
+                self._bytes -= len(dropped)
+        return sid
+
+    def get(self, sid: str) -> Optional[bytes]:
+        with self._lock:
+            return self._items.get(sid)
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops connections (1 s SYN retry)
+    # as soon as a few tabs load at once
+    request_queue_size = 128
+
+    def __init__(self, address, root: str = REPO_ROOT, idle_timeout: Optional[float] = None):
+        super().__init__(address, _Handler)
+        self.root = os.path.realpath(root)
+        self.idle_timeout = idle_timeout
+        self.assets = AssetCache()
+        self.sessions = SessionStore()
+        self.last_request = time.monotonic()
+        self._stopping = False
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def service_actions(self) -> None:
+        if (
+            self.idle_timeout and not self._stopping
+            and time.monotonic() - self.last_request > self.idle_timeout
+        ):
+            self._stopping = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def resolve(self, url_path: str) -> Optional[str]:
+        """Filesystem path for ``url_path``, or None if it is hidden or escapes the root."""
+        parts = [p for p in posixpath.normpath(urllib.parse.unquote(url_path)).split("/") if p]
+        # also covers "." and "..": dot-files and dot-directories are never served
+        if any(p.startswith(".") for p in parts):
+            return None
+        path = os.path.join(self.root, *parts)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        real = os.path.realpath(path)
+        if not real.startswith(self.root + os.sep):
+            return None
+        if any(p.startswith(".") for p in os.path.relpath(real, self.root).split(os.sep)):
+            return None
+        return real
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def _cache_control(path: str) -> str:
+    if path.endswith((".html", ".htm")):
+        return "no-cache"
+    return "public, max-age=3600"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = f"BloomSyncLocal/{SERVER_VERSION}"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._get(head=False)
+
+    def do_HEAD(self) -> None:
+        self._get(head=True)
+
+    def _host_ok(self) -> bool:
+        # DNS rebinding: a foreign page's requests still carry its own host name
+        host = self.headers.get("Host")
+        if host is None:
+            return True
+        try:
+            parts = urllib.parse.urlsplit("//" + host)
+            port = parts.port
+        except ValueError:
+            return False
+        return parts.hostname in _LOOPBACK_HOSTS and port in (None, self.server.port)
+
+    def do_POST(self) -> None:
+        self.server.last_request = time.monotonic()
+        path = urllib.parse.urlsplit(self.path).path
+        self.close_connection = True  # the body may be left unread below
+        if not self._host_ok():
+            return self._json({"error": "unexpected Host header"}, HTTPStatus.FORBIDDEN)
+        if self.headers.get_content_type() != "application/json":
+            return self._json({"error": "expected application/json"}, HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._json({"error": "invalid Content-Length"}, HTTPStatus.BAD_REQUEST)
+        if length > _MAX_BODY:
+            return self._json({"error": "body too large"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = self.rfile.read(length)
+        self.close_connection = False
+        try:
+            json.loads(body or b"{}")
+        except ValueError:
+            return self._json({"error": "invalid JSON"}, HTTPStatus.BAD_REQUEST)
+        if path == "/api/session":
+            return self._json({"id": self.server.sessions.put(body)})
+        self._json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+
+    def _get(self, head: bool) -> None:
+        self.server.last_request = time.monotonic()
+        if not self._host_ok():
+            return self._json({"error": "unexpected Host header"}, HTTPStatus.FORBIDDEN, head=head)
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/api/health":
+            return self._json({
+                "ok": True, "version": SERVER_VERSION, "root": self.server.root,
+                "pid": os.getpid(), "brotli": brotli is not None,
+            }, head=head)
+        if path.startswith("/api/session/"):
+            body = self.server.sessions.get(path[len("/api/session/"):])
+            if body is None:
+                return self._json({"error": "unknown session"}, HTTPStatus.NOT_FOUND, head=head)
+            # session IDs are never reused, so the document never changes
+            return self._send(body, "application/json", "private, max-age=86400, immutable", head=head)
+
+        fs_path = self.server.resolve(path)
+        if fs_path is None or not os.path.isfile(fs_path):
+            return self._json({"error": "not found"}, HTTPStatus.NOT_FOUND, head=head)
+        asset = self.server.assets.get(fs_path)
+        cache_control = _cache_control(fs_path)
+        if asset.etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", asset.etag)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, encoding = asset.body(self.headers.get("Accept-Encoding"))
+        self._send(body, asset.ctype, cache_control, etag=asset.etag, encoding=encoding,
+                   vary=asset.gzip is not None, head=head)
+
+    def _send(self, body, ctype, cache_control, etag=None, encoding=None, vary=False, head=False,
+              status=HTTPStatus.OK) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        if etag:
+            self.send_header("ETag", etag)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if vary:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _json(self, doc, status=HTTPStatus.OK, head=False) -> None:
+        self._send(json.dumps(doc).encode("utf-8"), "application/json", "no-store", head=head, status=status)
+
+
+class ServerClient:
+    """Talks to a running ``LocalServer`` at ``base_url``."""
+
+    def __init__(self, base_url: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._root: Optional[str] = None
+
+    def _request(self, path: str, doc=None) -> dict:
+        data = None if doc is None else json.dumps(doc).encode("utf-8")
+        req = urllib.request.Request(
+            self.base_url + path, data=data, headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def health(self) -> dict:
+        info = self._request("/api/health")
+        self._root = info["root"]
+        return info
+
+    def post_session(self, doc: dict) -> str:
+        return self._request("/api/session", doc)["id"]
+
+    def get_session(self, sid: str) -> dict:
+        return self._request(f"/api/session/{urllib.parse.quote(sid)}")
+
+    def url_for(self, path: str) -> str:
+        """URL of a local file under the server root (ValueError otherwise)."""
+        path = os.path.realpath(path)
+        if self._root is None:
+            self.health()
+        if not path.startswith(self._root + os.sep):
+            raise ValueError(f"{path} is not under the server root {self._root}")
+        rel = os.path.relpath(path, self._root)
+        return self.base_url + "/" + urllib.parse.quote(rel.replace(os.sep, "/"))
+
+
+def _state_file() -> str:
+    return os.path.join(STATE_DIR, "server.json")
+
+
+def _read_state() -> Optional[dict]:
+    try:
+        with open(_state_file(), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(port: int) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = f"{_state_file()}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"port": port, "pid": os.getpid(), "version": SERVER_VERSION}, fh)
+    os.replace(tmp, _state_file())
+
+
+def _clear_state() -> None:
+    state = _read_state()
+    if state and state.get("pid") == os.getpid():
+        try:
+            os.remove(_state_file())
+        except OSError:
+            pass
+
+
+def _live_client(state: Optional[dict]) -> Optional[ServerClient]:
+    if not state or state.get("version") != SERVER_VERSION:
+        return None
+    client = ServerClient(f"http://127.0.0.1:{state['port']}", timeout=1.0)
+    try:
+        if client.health().get("version") == SERVER_VERSION:
+            client.timeout = 5.0
+            return client
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+@contextmanager
+def _startup_lock():
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(os.path.join(STATE_DIR, "server.lock"), "w") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def ensure_server(
+    port: int = DEFAULT_PORT,
+    idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+    timeout: float = 15.0,
+) -> ServerClient:
+    """Client for this machine's server, starting a detached one if none answers."""
+    client = _live_client(_read_state())
+    if client is not None:
+        return client
+    with _startup_lock():
+        client = _live_client(_read_state())
+        if client is not None:
+            return client
+        cmd = [sys.executable, "-m", "rl_model.local_server", "--port", str(port)]
+        if idle_timeout:
+            cmd += ["--idle-timeout", str(idle_timeout)]
+        proc = subprocess.Popen(
+            cmd, cwd=REPO_ROOT, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            state = _read_state()
+            if state and state.get("pid") == proc.pid:
+                client = _live_client(state)
+                if client is not None:
+                    return client
+            if proc.poll() is not None:
+                raise RuntimeError(f"local server exited with status {proc.returncode}")
+            time.sleep(0.05)
+        proc.terminate()
+        raise RuntimeError("local server did not start in time")
+
+
+def visualizer_url(client: ServerClient, initial: str, final: str, **session) -> str:
+    """URL of ``sequence_transformation_viz.html`` showing ``initial -> final``.
+
+    Short payloads go in the URL fragment; longer ones are stored as a
+    session (with any extra ``session`` fields) and referenced by ID.
+    """
+    from .payload import MAX_URL_PAYLOAD, encode_payload
+
+    page = f"{client.base_url}/sequence_transformation_viz.html"
+    token = encode_payload(initial, final)
+    if len(token) + 2 <= MAX_URL_PAYLOAD:
+        return f"{page}#p={token}"
+    return f"{page}#session={client.post_session(dict(session, payload=token))}"
+
+
+def serve(
+    port: int = DEFAULT_PORT,
+    root: str = REPO_ROOT,
+    idle_timeout: Optional[float] = None,
+    write_state: bool = True,
+) -> None:
+    """Serve until interrupted (or idle); tries ``port``, else any free port."""
+    try:
+        server = LocalServer(("127.0.0.1", port), root, idle_timeout)
+    except OSError:
+        server = LocalServer(("127.0.0.1", 0), root, idle_timeout)
+    if write_state:
+        _write_state(server.port)
+    print(f"Serving {server.root} on http://127.0.0.1:{server.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if write_state:
+            _clear_state()
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Shared local server for the BloomSync visualizers")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--root", default=REPO_ROOT)
+    p.add_argument("--idle-timeout", type=float, default=None, help="exit after this many idle seconds")
+    args = p.parse_args(argv)
+    serve(port=args.port, root=args.root, idle_timeout=args.idle_timeout)
+
+
+__all__ = [
+    "LocalServer",
+    "AssetCache",
+    "SessionStore",
+    "ServerClient",
+    "ensure_server",
+    "visualizer_url",
+    "serve",
+]
+
+
+if __name__ == "__main__":
+    main()
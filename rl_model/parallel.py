@@ -0,0 +1,214 @@
+"""Process-pool rollout workers for ``train.train_batched``.
+
+Each worker owns a ``VecSequenceEnv`` slice, a CPU copy of the policy and the
+learner's ``ActionConstraints`` (if any). Nothing bulky goes through pickling:
+the learner publishes flattened policy weights into one shared-memory block
+after every update, and workers write their trajectories (uint8 observations,
+action indices, rewards, masks and final scores) straight into shared
+``(B, T, ...)`` arrays that the learner reads in place. The pipes only carry
+tiny control messages.
+
+Workers are started with the ``spawn`` method, so scripts that use them need
+the usual ``if __name__ == "__main__":`` guard.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+
+def _attach(name: str, shape, dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_main(rank, conn, env_kwargs, motifs, agent_kwargs, constraints, seed, layout, slot):
+    # imported here so the parent does not pay for it when spawning
+    from .agent import ReinforceAgent
+    from .env import VecSequenceEnv
+    from .reward_model import RewardModel
+    from .train import collect_rollout
+
+    torch.set_num_threads(1)
+    if seed is not None:
+        torch.manual_seed(seed + rank)
+    start, stop = slot
+    handles = []
+    views: Dict[str, np.ndarray] = {}
+    try:
+        for key, (name, shape, dtype) in layout.items():
+            shm, arr = _attach(name, shape, dtype)
+            handles.append(shm)
+            views[key] = arr
+
+        env = VecSequenceEnv(
+            stop - start, autoreset=False,
+            seed=None if seed is None else seed + rank, **env_kwargs,
+        )
+        model = RewardModel(env.target_ft, env.target_tfl1, motifs=motifs)
+        agent = ReinforceAgent(seq_len=env.seq_len, **agent_kwargs)
+        version = -1
+
+        while True:
+            msg = conn.recv()
+            if msg[0] == "close":
+                break
+            try:
+                if msg[1] != version:
+                    vector_to_parameters(torch.from_numpy(views["weights"].copy()), agent.policy.parameters())
+                    version = msg[1]
+                t, final = collect_rollout(
+                    agent, env, model,
+                    views["obs"][start:stop], views["actions"][start:stop],
+                    views["rewards"][start:stop], views["mask"][start:stop],
+                    constraints,
+                )
+                views["final"][start:stop] = final
+                conn.send(("done", t))
+            except Exception:
+                conn.send(("error", traceback.format_exc()))
+    finally:
+        for shm in handles:
+            shm.close()
+        conn.close()
+
+
+class RolloutWorkerPool:
+    """``num_workers`` processes, each rolling out ``envs_per_worker`` episodes per call."""
+
+    def __init__(
+        self,
+        num_workers: int,
+        envs_per_worker: int,
+        env_kwargs: dict,
+        policy: torch.nn.Module,
+        *,
+        motifs=None,
+        agent_kwargs: Optional[dict] = None,
+        constraints=None,
+        seed: Optional[int] = None,
+    ):
+        if num_workers < 1 or envs_per_worker < 1:
+            raise ValueError("num_workers and envs_per_worker must be positive")
+        self.num_workers = num_workers
+        self.num_envs = num_workers * envs_per_worker
+        seq_len = len(env_kwargs["start_sequence"])
+        max_edits = env_kwargs.get("max_edits", 10)
+        n_params = parameters_to_vector(policy.parameters()).numel()
+
+        specs = {
+            "weights": ((n_params,), np.float32),
+            "obs": ((self.num_envs, max_edits, seq_len), np.uint8),
+            "actions": ((self.num_envs, max_edits), np.int64),
+            "rewards": ((self.num_envs, max_edits), np.float64),
+            "mask": ((self.num_envs, max_edits), np.bool_),
+            "final": ((self.num_envs,), np.float64),
+        }
+        self._shms = {}
+        self._views: Dict[str, np.ndarray] = {}
+        layout = {}
+        for key, (shape, dtype) in specs.items():
+            nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._shms[key] = shm
+            self._views[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            layout[key] = (shm.name, shape, dtype)
+
+        ctx = mp.get_context("spawn")
+        self._conns = []
+        self._procs = []
+        self._version = 0
+        for rank in range(num_workers):
+            parent, child = ctx.Pipe()
+            slot = (rank * envs_per_worker, (rank + 1) * envs_per_worker)
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(rank, child, env_kwargs, motifs, agent_kwargs or {}, constraints, seed, layout, slot),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    @classmethod
+    def from_env(
+        cls, env, num_workers, envs_per_worker, agent_kwargs=None, seed=None, policy=None, constraints=None
+    ):
+        """Build a pool whose workers replicate ``env`` (same targets and start)."""
+        from .agent import ReinforceAgent
+
+        env_kwargs = dict(
+            target_ft=env.target_ft,
+            target_tfl1=env.target_tfl1,
+            start_sequence=env.start_sequence,
+            max_edits=env.max_edits,
+            noise_prob=env.noise_prob,
+            alphabet=env.alphabet,
+        )
+        motifs = env.case.motifs if env.case else None
+        policy = policy or ReinforceAgent(seq_len=env.seq_len, **(agent_kwargs or {})).policy
+        return cls(
+            num_workers, envs_per_worker, env_kwargs, policy,
+            motifs=motifs, agent_kwargs=agent_kwargs, constraints=constraints, seed=seed,
+        )
+
+    def broadcast(self, policy: torch.nn.Module) -> None:
+        """Publish the learner's current weights; workers load them on the next rollout."""
+        with torch.no_grad():
+            flat = parameters_to_vector(policy.parameters()).detach().cpu().numpy()
+        self._views["weights"][:] = flat
+        self._version += 1
+
+    def rollout(self):
+        """Run one batch of episodes on every worker.
+
+        Returns ``(steps, final_scores, (obs, actions, rewards, mask))`` where the
+        arrays are shared-memory views valid until the next call.
+        """
+        for conn in self._conns:
+            conn.send(("rollout", self._version))
+        steps = 0
+        errors = []
+        for conn in self._conns:
+            status, payload = conn.recv()
+            if status == "error":
+                errors.append(payload)
+            else:
+                steps = max(steps, payload)
+        if errors:
+            raise RuntimeError("rollout worker failed:\n" + errors[0])
+        v = self._views
+        return steps, v["final"], (v["obs"], v["actions"], v["rewards"], v["mask"])
+
+    def close(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._views.clear()
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+        self._shms.clear()
+        self._conns, self._procs = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,169 @@
+"""Compact transport of an (initial, final) sequence pair for the HTML visualizer.
+
+``sequence_transformation_viz.html`` used to receive both sequences verbatim
+in its URL, which breaks on browser URL limits at a few kilobases. A payload
+token instead carries:
+
+  - the initial sequence packed 2 bits per base (A=0, C=1, G=2, T=3; base i
+    sits in byte ``i // 4`` at bit ``2 * (i % 4)``), plus a short exception
+    list for anything that isn't uppercase ACGT;
+  - the final sequence as an edit list against the initial.
+
+Binary layout, with unsigned LEB128 varints::
+
+    u8 version | varint L | packed[ceil(L/4)]
+    | varint X | X * (varint pos delta, u8 ascii)     exceptions in initial
+    | varint E | E * (varint pos delta, u8 ascii)     final-state edits
+
+Positions are sorted and stored as deltas from the previous one, starting
+from 0. The token is ``"R"`` plus base64url (no padding) of that layout, or
+``"Z"`` plus base64url of its zlib-deflated form. The visualizer decodes
+either with ``DecompressionStream("deflate")``.
+
+``visualizer_fragment`` returns the URL fragment ``p=<token>``. Tokens longer
+than ``MAX_URL_PAYLOAD`` characters should instead be stored as a session on
+the local server (``local_server.visualizer_url`` does this).
+"""
+
+from __future__ import annotations
+
+import base64
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .encoding import BASES, N_CODE, STRICT_LUT, encode
+
+PAYLOAD_VERSION = 1
+# fragments longer than this go through a server session instead of the URL
+MAX_URL_PAYLOAD = 8000
+
+
+def _varint(n: int, out: bytearray) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _put_positions(items: List[Tuple[int, str]], out: bytearray) -> None:
+    _varint(len(items), out)
+    prev = 0
+    for pos, ch in items:
+        _varint(pos - prev, out)
+        out.append(ord(ch))
+        prev = pos
+
+
+def _get_positions(buf: bytes, pos: int) -> Tuple[List[Tuple[int, str]], int]:
+    n, pos = _read_varint(buf, pos)
+    items, at = [], 0
+    for _ in range(n):
+        delta, pos = _read_varint(buf, pos)
+        at += delta
+        items.append((at, chr(buf[pos])))
+        pos += 1
+    return items, pos
+
+
+def diff_edits(initial: str, final: str) -> List[Tuple[int, str]]:
+    """``(pos, base)`` for every position where ``final`` differs from ``initial``."""
+    if len(initial) != len(final):
+        raise ValueError("initial and final sequences must have the same length")
+    a = np.frombuffer(initial.encode("ascii"), dtype=np.uint8)
+    b = np.frombuffer(final.encode("ascii"), dtype=np.uint8)
+    return [(int(i), final[i]) for i in np.flatnonzero(a != b)]
+
+
+def pack_bases(seq: str) -> Tuple[bytes, List[Tuple[int, str]]]:
+    """2-bit pack ``seq``; non-ACGT characters are packed as A and returned as exceptions."""
+    codes = encode(seq, STRICT_LUT)
+    odd = np.flatnonzero(codes == N_CODE)
+    exceptions = [(int(i), seq[i]) for i in odd]
+    codes = codes.copy()
+    codes[odd] = 0
+    padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+    padded[: len(codes)] = codes
+    quads = padded.reshape(-1, 4)
+    packed = quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)
+    return packed.astype(np.uint8).tobytes(), exceptions
+
+
+def unpack_bases(packed: bytes, length: int, exceptions=()) -> str:
+    raw = np.frombuffer(packed, dtype=np.uint8)
+    codes = ((raw[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).reshape(-1)[:length]
+    chars = np.frombuffer(BASES.encode("ascii"), dtype=np.uint8)[codes]
+    for pos, ch in exceptions:
+        chars[pos] = ord(ch)
+    return chars.tobytes().decode("ascii")
+
+
+def encode_payload(initial: str, final: Optional[str] = None, compress: Optional[bool] = None) -> str:
+    """Token for ``(initial, final)``; ``compress=None`` deflates only if that is shorter."""
+    final = initial if final is None else final
+    packed, exceptions = pack_bases(initial)
+    body = bytearray([PAYLOAD_VERSION])
+    _varint(len(initial), body)
+    body += packed
+    _put_positions(exceptions, body)
+    _put_positions(diff_edits(initial, final), body)
+
+    raw = bytes(body)
+    if compress is None or compress:
+        deflated = zlib.compress(raw, 9)
+        if compress or len(deflated) < len(raw):
+            return "Z" + _b64(deflated)
+    return "R" + _b64(raw)
+
+
+def decode_payload(token: str) -> Tuple[str, str]:
+    """Inverse of ``encode_payload``; returns ``(initial, final)``."""
+    kind, data = token[:1], base64.urlsafe_b64decode(token[1:] + "=" * (-len(token[1:]) % 4))
+    if kind == "Z":
+        data = zlib.decompress(data)
+    elif kind != "R":
+        raise ValueError(f"unknown payload kind {kind!r}")
+    if data[0] != PAYLOAD_VERSION:
+        raise ValueError(f"unsupported payload version {data[0]}")
+    length, pos = _read_varint(data, 1)
+    nbytes = -(-length // 4)
+    packed = data[pos: pos + nbytes]
+    exceptions, pos = _get_positions(data, pos + nbytes)
+    edits, _ = _get_positions(data, pos)
+    initial = unpack_bases(packed, length, exceptions)
+    final = list(initial)
+    for p, ch in edits:
+        final[p] = ch
+    return initial, "".join(final)
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def visualizer_fragment(initial: str, final: str) -> str:
+    """URL fragment (without ``#``) that makes the visualizer show ``initial -> final``."""
+    return f"p={encode_payload(initial, final)}"
+
+
+__all__ = [
+    "encode_payload",
+    "decode_payload",
+    "diff_edits",
+    "pack_bases",
+    "unpack_bases",
+    "visualizer_fragment",
+    "MAX_URL_PAYLOAD",
+]
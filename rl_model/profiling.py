@@ -0,0 +1,228 @@
+"""Low-overhead phase timers and opt-in profiler capture for training.
+
+Code being timed takes a timer and marks phase boundaries with one
+``perf_counter_ns`` read each::
+
+    t = timer.start()
+    x = encode(seq)
+    t = timer.lap("encode", t)
+    logits = policy(x)
+    t = timer.lap("forward", t)
+
+``PhaseTimer`` keeps, per phase, a count, total/min/max nanoseconds and a
+log2 histogram. Percentiles from the histogram are accurate to within a
+factor of two. ``NULL_TIMER`` has the same interface but does nothing, so
+uninstrumented runs pay only a few no-op method calls per step.
+
+``ProfilerCapture`` wraps ``cProfile`` or ``torch.profiler`` for the first N
+episodes of a run. ``train(instrument=True, profiler=...)`` returns its
+reward trace as a ``RewardTrace``, a list with a ``.stats`` attribute
+holding the ``TrainingStats``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import time
+from typing import Dict, List, Optional
+
+_BUCKETS = 64
+
+
+class PhaseStats:
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        # hist[b] counts samples with ns.bit_length() == b, i.e. in [2**(b-1), 2**b)
+        self.hist = [0] * _BUCKETS
+
+    def add(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.hist[min(ns.bit_length(), _BUCKETS - 1)] += 1
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile_ns(self, q: float) -> float:
+        """Upper edge of the histogram bucket holding the ``q``-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for b, n in enumerate(self.hist):
+            seen += n
+            if seen >= rank and n:
+                return float(min(2 ** b, self.max_ns))
+        return float(self.max_ns)
+
+
+class TrainingStats:
+    """Per-phase timing aggregates (plus an optional profiler capture)."""
+
+    def __init__(self, phases: Dict[str, PhaseStats], wall_ns: int, capture: Optional["ProfilerCapture"] = None):
+        self.phases = phases
+        self.wall_ns = wall_ns
+        self.capture = capture
+
+    def summary(self) -> List[Dict[str, object]]:
+        rows = []
+        for name, p in sorted(self.phases.items(), key=lambda kv: -kv[1].total_ns):
+            rows.append({
+                "phase": name,
+                "count": p.count,
+                "total_s": p.total_ns / 1e9,
+                "share": p.total_ns / self.wall_ns if self.wall_ns else 0.0,
+                "mean_us": p.mean_ns / 1e3,
+                "p50_us": p.percentile_ns(50) / 1e3,
+                "p99_us": p.percentile_ns(99) / 1e3,
+                "max_us": p.max_ns / 1e3,
+            })
+        return rows
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "wall_s": self.wall_ns / 1e9,
+            "phases": {
+                name: {"count": p.count, "total_ns": p.total_ns, "min_ns": p.min_ns, "max_ns": p.max_ns, "hist": list(p.hist)}
+                for name, p in self.phases.items()
+            },
+        }
+
+    def __str__(self) -> str:
+        lines = [f"wall {self.wall_ns / 1e9:.3f}s"]
+        for r in self.summary():
+            lines.append(
+                f"{r['phase']:<10} n={r['count']:<7} total={r['total_s']:.3f}s ({r['share']:5.1%}) "
+                f"mean={r['mean_us']:.1f}us p50<={r['p50_us']:.1f}us p99<={r['p99_us']:.1f}us"
+            )
+        return "\n".join(lines)
+
+
+class PhaseTimer:
+    """Accumulates ``lap`` durations per phase name."""
+
+    enabled = True
+
+    def __init__(self):
+        self._phases: Dict[str, PhaseStats] = {}
+        self._t0 = time.perf_counter_ns()
+
+    @staticmethod
+    def start() -> int:
+        return time.perf_counter_ns()
+
+    def lap(self, name: str, since: int) -> int:
+        """Charge the time since ``since`` to ``name``; returns now for the next phase."""
+        now = time.perf_counter_ns()
+        stats = self._phases.get(name)
+        if stats is None:
+            stats = self._phases[name] = PhaseStats()
+        stats.add(now - since)
+        return now
+
+    def stats(self, capture: Optional["ProfilerCapture"] = None) -> TrainingStats:
+        return TrainingStats(self._phases, time.perf_counter_ns() - self._t0, capture)
+
+
+class _NullTimer:
+    enabled = False
+
+    @staticmethod
+    def start() -> int:
+        return 0
+
+    @staticmethod
+    def lap(name: str, since: int) -> int:
+        return 0
+
+    def stats(self, capture=None) -> None:
+        return None
+
+
+NULL_TIMER = _NullTimer()
+
+
+class ProfilerCapture:
+    """cProfile or torch.profiler capture over the first ``episodes`` episodes.
+
+    With ``out`` set, the result is written when capture ends: a ``.prof``
+    file for cProfile, a Chrome trace JSON for torch.
+    """
+
+    def __init__(self, kind: str = "cprofile", episodes: int = 10, out: Optional[str] = None):
+        if kind not in ("cprofile", "torch"):
+            raise ValueError("profiler kind must be 'cprofile' or 'torch'")
+        self.kind = kind
+        self.episodes = episodes
+        self.out = out
+        self.result = None
+        self._prof = None
+        self._active = False
+
+    def begin(self) -> None:
+        if self.kind == "cprofile":
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        else:
+            import torch.profiler
+
+            self._prof = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+            self._prof.__enter__()
+        self._active = True
+
+    def episode_end(self, episode: int) -> None:
+        if self._active and episode + 1 >= self.episodes:
+            self.end()
+
+    def end(self) -> None:
+        if not self._active:
+            return
+        self._active = False
+        if self.kind == "cprofile":
+            self._prof.disable()
+            if self.out:
+                self._prof.dump_stats(self.out)
+            self.result = pstats.Stats(self._prof)
+        else:
+            self._prof.__exit__(None, None, None)
+            if self.out:
+                self._prof.export_chrome_trace(self.out)
+            self.result = self._prof.key_averages()
+
+    def table(self, limit: int = 20) -> str:
+        """Top entries by cumulative (cProfile) or self CPU time (torch)."""
+        if self.result is None:
+            return ""
+        if self.kind == "cprofile":
+            buf = io.StringIO()
+            pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(limit)
+            return buf.getvalue()
+        return self.result.table(sort_by="self_cpu_time_total", row_limit=limit)
+
+
+class RewardTrace(list):
+    """Per-episode rewards; ``stats`` holds the ``TrainingStats`` when instrumented."""
+
+    stats: Optional[TrainingStats] = None
+
+
+__all__ = [
+    "PhaseTimer",
+    "PhaseStats",
+    "TrainingStats",
+    "ProfilerCapture",
+    "RewardTrace",
+    "NULL_TIMER",
+]
@@ -1,11 +1,19 @@
 from collections import Counter
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from .encoding import N_CODE, STRICT_LUT, encode, encode_batch
+from .seqstore import as_text
+
+DEFAULT_MOTIFS = ["ATG", "TATA", "GATA"]
 
 def kmer_score(seq, target, k=3):
     """Simple k-mer overlap score between seq and target (normalized).
 
     Returns a score in [0,1].
     """
+    seq, target = as_text(seq), as_text(target)
     if len(seq) < k or len(target) < k:
         return 0.0
     def kmers(s):
@@ -21,7 +29,8 @@ def kmer_score(seq, target, k=3):
 def motif_value(seq, motifs=None):
     """Counts presence of known motifs. Returns normalized score."""
     if motifs is None:
-        motifs = ["ATG", "TATA", "GATA"]
+        motifs = DEFAULT_MOTIFS
+    seq = as_text(seq)
     count = 0
     for m in motifs:
         if m in seq:
@@ -42,9 +51,268 @@ def compute_reward(
     w4: float = 0.6,
 ) -> float:
     """Compute R = w1*S_FT - w2*S_TFL1 - w3*edit_penalty + w4*V_motifs."""
+    seq = as_text(seq)
     s_ft = kmer_score(seq, target_ft, k=4)
     s_tfl1 = kmer_score(seq, target_tfl1, k=4)
     v_m = motif_value(seq, motifs=motifs)
     edit_penalty = n_edits / max(1, len(seq))
     R = w1 * s_ft - w2 * s_tfl1 - w3 * edit_penalty + w4 * v_m
     return float(R)
+
+
+def _count_overlapping(haystack: bytes, needle: bytes) -> int:
+    count = 0
+    i = haystack.find(needle)
+    while i != -1:
+        count += 1
+        i = haystack.find(needle, i + 1)
+    return count
+
+
+class RewardTracker:
+    """Stateful ``compute_reward`` for an env that changes one base at a time.
+
+    Target/avoid k-mer profiles are built once. ``edit`` then updates the
+    k-mer intersections and motif hit counts from the O(k + motif length)
+    windows around the edited position instead of rescanning the sequence.
+    ``reward(n_edits)`` returns exactly the float ``compute_reward`` would.
+    """
+
+    def __init__(
+        self,
+        env,
+        *,
+        motifs: Optional[Iterable[str]] = None,
+        k: int = 4,
+        w1: float = 1.0,
+        w2: float = 0.9,
+        w3: float = 0.4,
+        w4: float = 0.6,
+    ):
+        if motifs is None:
+            case = getattr(env, "case", None)
+            motifs = case.motifs if case else DEFAULT_MOTIFS
+        self.env = env
+        self.k = k
+        self.motifs = [m.encode("ascii") for m in motifs]
+        self.w1, self.w2, self.w3, self.w4 = w1, w2, w3, w4
+
+        self._ft = self._profile(env.target_ft)
+        self._tfl1 = self._profile(env.target_tfl1)
+        self._ft_denom = max(1, sum(self._ft.values()))
+        self._tfl1_denom = max(1, sum(self._tfl1.values()))
+        self._ft_valid = len(env.target_ft) >= k
+        self._tfl1_valid = len(env.target_tfl1) >= k
+
+        self.seq = bytearray()
+        self._counts: Counter = Counter()
+        self._inter_ft = 0
+        self._inter_tfl1 = 0
+        self._motif_hits = [0] * len(self.motifs)
+        self._motifs_present = 0
+        self.reset()
+
+    def _profile(self, seq: str) -> Counter:
+        raw = seq.encode("ascii")
+        return Counter(raw[i:i + self.k] for i in range(len(raw) - self.k + 1))
+
+    def reset(self, seq: Optional[str] = None) -> None:
+        """Rebuild state from ``seq`` (defaults to the env's current sequence)."""
+        seq = as_text(self.env.sequence if seq is None else seq)
+        self.seq = bytearray(seq.encode("ascii") if isinstance(seq, str) else seq)
+        self._counts = self._profile(self.seq.decode("ascii"))
+        self._inter_ft = sum(min(c, self._ft[km]) for km, c in self._counts.items() if km in self._ft)
+        self._inter_tfl1 = sum(min(c, self._tfl1[km]) for km, c in self._counts.items() if km in self._tfl1)
+        raw = bytes(self.seq)
+        self._motif_hits = [_count_overlapping(raw, m) if m else 1 for m in self.motifs]
+        self._motifs_present = sum(1 for h in self._motif_hits if h > 0)
+
+    def _window_kmers(self, pos: int):
+        k = self.k
+        lo = max(0, pos - k + 1)
+        hi = min(pos, len(self.seq) - k)
+        return [bytes(self.seq[i:i + k]) for i in range(lo, hi + 1)]
+
+    def _motif_windows(self, pos: int):
+        return [
+            _count_overlapping(bytes(self.seq[max(0, pos - len(m) + 1):pos + len(m)]), m) if m else 0
+            for m in self.motifs
+        ]
+
+    def edit(self, pos: int, base: str) -> None:
+        """Apply a single-base edit (a rewrite to the same base is a no-op)."""
+        new = ord(base)
+        if self.seq[pos] == new:
+            return
+        counts, ft, tfl1 = self._counts, self._ft, self._tfl1
+
+        before = self._motif_windows(pos)
+        for km in self._window_kmers(pos):
+            c = counts[km]
+            if c <= ft.get(km, 0):
+                self._inter_ft -= 1
+            if c <= tfl1.get(km, 0):
+                self._inter_tfl1 -= 1
+            counts[km] = c - 1
+
+        self.seq[pos] = new
+
+        for km in self._window_kmers(pos):
+            c = counts[km] + 1
+            counts[km] = c
+            if c <= ft.get(km, 0):
+                self._inter_ft += 1
+            if c <= tfl1.get(km, 0):
+                self._inter_tfl1 += 1
+        after = self._motif_windows(pos)
+
+        for i, (b, a) in enumerate(zip(before, after)):
+            if a != b:
+                was = self._motif_hits[i] > 0
+                self._motif_hits[i] += a - b
+                self._motifs_present += (self._motif_hits[i] > 0) - was
+
+    def reward(self, n_edits: int) -> float:
+        """Return ``compute_reward`` for the tracked sequence."""
+        seq_ok = len(self.seq) >= self.k
+        s_ft = self._inter_ft / self._ft_denom if seq_ok and self._ft_valid else 0.0
+        s_tfl1 = self._inter_tfl1 / self._tfl1_denom if seq_ok and self._tfl1_valid else 0.0
+        v_m = self._motifs_present / len(self.motifs)
+        edit_penalty = n_edits / max(1, len(self.seq))
+        R = self.w1 * s_ft - self.w2 * s_tfl1 - self.w3 * edit_penalty + self.w4 * v_m
+        return float(R)
+
+
+def _rolling_codes(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return base-4 integer codes of every k-mer in ``codes`` and a validity mask.
+
+    ``codes`` is ``(N, L)`` uint8; windows that contain an ambiguous base are
+    marked invalid so they never match anything.
+    """
+    n, length = codes.shape
+    width = length - k + 1
+    acc = np.zeros((n, width), dtype=np.int64)
+    bad = np.zeros((n, width), dtype=bool)
+    for j in range(k):
+        col = codes[:, j:j + width]
+        acc = acc * 4 + (col & 3)
+        bad |= col >= N_CODE
+    return acc, ~bad
+
+
+class KmerProfile:
+    """k-mer count profile of one reference, scored against batches of codes."""
+
+    # rows per bincount chunk, keeps the (rows, 4**k) count matrix cache-sized
+    CHUNK = 1024
+
+    def __init__(self, reference: str, k: int = 4):
+        self.k = k
+        self.length = len(reference)
+        self.n_bins = 4 ** k
+        ref = encode(reference, STRICT_LUT)[None, :]
+        if self.length >= k:
+            kmers, valid = _rolling_codes(ref, k)
+            self.counts = np.bincount(kmers[valid], minlength=self.n_bins)
+            # kmer_score divides by every target k-mer, ambiguous ones included
+            self.denom = max(1, kmers.shape[1])
+        else:
+            self.counts = np.zeros(self.n_bins, dtype=np.int64)
+            self.denom = 1
+
+    def intersections(self, codes: np.ndarray) -> np.ndarray:
+        """Return ``sum(min(count_seq, count_ref))`` per row of ``codes``."""
+        n, length = codes.shape
+        out = np.zeros(n, dtype=np.int64)
+        if length < self.k or self.length < self.k:
+            return out
+        for start in range(0, n, self.CHUNK):
+            chunk = codes[start:start + self.CHUNK]
+            rows = len(chunk)
+            kmers, valid = _rolling_codes(chunk, self.k)
+            flat = (kmers + (np.arange(rows, dtype=np.int64) * self.n_bins)[:, None])[valid]
+            counts = np.bincount(flat, minlength=rows * self.n_bins).reshape(rows, self.n_bins)
+            out[start:start + rows] = np.minimum(counts, self.counts).sum(axis=1)
+        return out
+
+    def score_batch(self, codes: np.ndarray) -> np.ndarray:
+        return self.intersections(codes) / self.denom
+
+
+class MotifSet:
+    """Compiled motif presence check over batches of codes."""
+
+    def __init__(self, motifs: Optional[Iterable[str]] = None):
+        self.motifs = list(DEFAULT_MOTIFS if motifs is None else motifs)
+        self._compiled = []
+        for m in self.motifs:
+            m_codes = encode(m, STRICT_LUT)
+            # motifs with letters outside ACGT can never match a coded sequence
+            matchable = bool((m_codes < N_CODE).all())
+            self._compiled.append((len(m), m_codes, matchable))
+
+    def hits(self, codes: np.ndarray) -> np.ndarray:
+        """Return the number of distinct motifs present in each row."""
+        n, length = codes.shape
+        present = np.zeros(n, dtype=np.int64)
+        for m_len, m_codes, matchable in self._compiled:
+            if m_len == 0:
+                present += 1
+            elif not matchable or m_len > length:
+                continue
+            else:
+                width = length - m_len + 1
+                match = codes[:, :width] == m_codes[0]
+                for j in range(1, m_len):
+                    match &= codes[:, j:j + width] == m_codes[j]
+                present += match.any(axis=1)
+        return present
+
+    def value_batch(self, codes: np.ndarray) -> np.ndarray:
+        return self.hits(codes) / len(self.motifs)
+
+
+class RewardModel:
+    """``compute_reward`` compiled once for fixed targets, motifs and weights.
+
+    ``score_batch`` scores an ``(N, L)`` uint8 array of base codes with rolling
+    k-mer hashes and bincount, and matches ``compute_reward`` exactly for
+    sequences made of uppercase ``ACGT``.
+    """
+
+    def __init__(
+        self,
+        target_ft: str,
+        target_tfl1: str,
+        *,
+        motifs: Optional[Iterable[str]] = None,
+        k: int = 4,
+        w1: float = 1.0,
+        w2: float = 0.9,
+        w3: float = 0.4,
+        w4: float = 0.6,
+    ):
+        self.k = k
+        self.ft = KmerProfile(target_ft, k)
+        self.tfl1 = KmerProfile(target_tfl1, k)
+        self.motifs = MotifSet(motifs)
+        self.w1, self.w2, self.w3, self.w4 = w1, w2, w3, w4
+
+    @classmethod
+    def from_env(cls, env, **kwargs) -> "RewardModel":
+        if "motifs" not in kwargs:
+            case = getattr(env, "case", None)
+            kwargs["motifs"] = case.motifs if case else None
+        return cls(env.target_ft, env.target_tfl1, **kwargs)
+
+    def score_batch(self, seqs, n_edits=0) -> np.ndarray:
+        """Return the reward for every row; ``n_edits`` may be scalar or per row."""
+        codes = encode_batch(seqs, STRICT_LUT)
+        s_ft = self.ft.score_batch(codes)
+        s_tfl1 = self.tfl1.score_batch(codes)
+        v_m = self.motifs.value_batch(codes)
+        edit_penalty = np.asarray(n_edits) / max(1, codes.shape[1])
+        return self.w1 * s_ft - self.w2 * s_tfl1 - self.w3 * edit_penalty + self.w4 * v_m
+
+    def score(self, seq, n_edits: int = 0) -> float:
+        return float(self.score_batch([seq], n_edits)[0])
@@ -1,5 +1,6 @@
 from .sample_sequences import get_case
-from .train import train
+from .callbacks import PrintLogger
+from .checkpoint import train_cached
 
 
 def main():
@@ -9,7 +10,10 @@ def main():
         f"   Start from {case.initial_name} ({len(case.initial_sequence)} bp) "
         f"and push toward {case.target_name}."
     )
-    _, env, rewards = train(episodes=120, max_edits=8, case_id=case.case_id)
+    # reuses (or warm-starts from) a cached agent for this case and settings
+    _, env, rewards = train_cached(
+        episodes=120, max_edits=8, case_id=case.case_id, callbacks=PrintLogger(show_sequence=True)
+    )
     print("\nDemo finished.")
     print(f"Final sequence: {env.sequence}")
     print(f"Reward trace (last 5): {[round(r, 3) for r in rewards[-5:]]}")
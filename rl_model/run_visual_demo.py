@@ -4,35 +4,29 @@ output sequences using rl_model.visualize.
 This script is intended for local debugging and demo generation.
 """
 
-from rl_model import train
+from rl_model.checkpoint import _replay, train_cached
+from rl_model.export import save_trajectory
 from rl_model.sample_sequences import get_case
+from rl_model.train import _make_constraints
 from rl_model.visualize import animate_edit_history
 
 
-def run_and_visualize(out_html="visual_demo.html", episodes=30, max_edits=8):
-    # create env and run the short training to get an agent and env
+def run_and_visualize(out_html="visual_demo.html", episodes=30, max_edits=8, trajectory_json=None):
+    # get a trained agent; a cached one for this case/settings skips training
     case = get_case()
-    agent, env, _ = train.train(episodes=episodes, max_edits=max_edits, case_id=case.case_id)
+    agent, env, _ = train_cached(episodes=episodes, max_edits=max_edits, case_id=case.case_id)
 
-    # We will produce a visualization from env.history if present
-    # SequenceEnv records edits into env.history during demo runs.
-    initial = env.history[0][2] if False else None
-
-    # More reliably: reset a new env, capture initial seq, run the trained agent
+    # replay the trained agent on a fresh env under the action mask it was
+    # trained with; SequenceEnv records every applied edit in env.history
     from rl_model.env import SequenceEnv
-    e = SequenceEnv(max_edits=max_edits, case_id=case.case_id)
-    init_seq = e.sequence
-    edits = []
-    done = False
-    steps = 0
-    # run the agent until done
-    while not done and steps < max_edits:
-        action, _ = agent.select_action(e.sequence)
-        env_action = agent.action_to_env(action)
-        obs, _, done, info = e.step(env_action)
-        if env_action is not None:
-            edits.append(env_action)
-        steps += 1
+    e = SequenceEnv(max_edits=max_edits, case_id=case.case_id, obs_mode="one_hot")
+    _replay(agent, e, _make_constraints(e.seq_len, True, None, None))
+    init_seq = e.initial_sequence
+    edits = e.history.edits()
+
+    # keep the run for batch re-rendering (python -m rl_model.export)
+    if trajectory_json:
+        save_trajectory(trajectory_json, init_seq, edits, case_id=case.case_id, episodes=episodes)
 
     # edits is a list of (pos, base) tuples; animate
     animate_edit_history(init_seq, edits, out_html=out_html)
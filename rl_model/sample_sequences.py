@@ -8,7 +8,7 @@ They are synthetic, non-actionable snippets that provide stable data for demos.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 
 @dataclass(frozen=True)
@@ -60,12 +60,23 @@ DEMO_CASES: Dict[str, DemoCase] = {
 }
 
 
+# cases built on first use, e.g. from the gene catalog (see catalog.CaseRegistry)
+_LAZY_CASES: Dict[str, Callable[[], DemoCase]] = {}
+
+
+def register_case(case_id: str, factory: Callable[[], DemoCase]) -> None:
+    """Register a case whose ``DemoCase`` is built by ``factory`` when first requested."""
+    _LAZY_CASES[case_id] = factory
+
+
 def get_case(case_id: str = "mdtfl1_to_mdft1") -> DemoCase:
     """Return the requested demo case (defaults to the MdTFL1→MdFT1 edit)."""
     try:
         return DEMO_CASES[case_id]
     except KeyError as exc:
-        available = ", ".join(sorted(DEMO_CASES))
+        if case_id in _LAZY_CASES:
+            return _LAZY_CASES[case_id]()
+        available = ", ".join(sorted(set(DEMO_CASES) | set(_LAZY_CASES)))
         raise ValueError(
             f"Unknown demo case '{case_id}'. Available cases: {available}"
         ) from exc
@@ -73,7 +84,7 @@ def get_case(case_id: str = "mdtfl1_to_mdft1") -> DemoCase:
 
 def list_cases() -> List[str]:
     """Return the available case identifiers."""
-    return sorted(DEMO_CASES.keys())
+    return sorted(set(DEMO_CASES) | set(_LAZY_CASES))
 
 
-__all__ = ["DemoCase", "get_case", "list_cases", "DEMO_CASES"]
+__all__ = ["DemoCase", "get_case", "list_cases", "register_case", "DEMO_CASES"]
@@ -3,18 +3,61 @@
 Contains non-actionable placeholder scorers used to compute features for the
 reward model. Implementations use simple sequence heuristics (k-mer overlap,
 motif presence) and do NOT provide lab guidance.
+
+The scorers delegate to the compiled components of ``RewardModel``; each
+reference/motif set is compiled once and cached. They accept a single string
+or an ``(N, L)`` uint8 code array (returning an array). Strings with letters
+outside uppercase ACGT take the exact string path so results never change.
+``seqstore.SequenceView`` windows are scored from their packed codes.
 """
 
-from .reward_model import kmer_score, motif_value
+from functools import lru_cache
+
+import numpy as np
+
+from .encoding import N_CODE, STRICT_LUT, encode
+from .reward_model import KmerProfile, MotifSet, kmer_score, motif_value
+from .seqstore import as_text
+
+
+@lru_cache(maxsize=64)
+def _profile(reference, k):
+    return KmerProfile(reference, k)
+
+
+@lru_cache(maxsize=64)
+def _motif_set(motifs):
+    return MotifSet(motifs)
+
+
+def _clean_codes(seq):
+    codes = encode(seq, STRICT_LUT)
+    return codes[None, :] if (codes < N_CODE).all() else None
+
+
+def _similarity(seq, reference, k):
+    reference = as_text(reference)
+    if isinstance(seq, np.ndarray):
+        return _profile(reference, k).score_batch(np.atleast_2d(seq))
+    codes = _clean_codes(seq)
+    if codes is None or _clean_codes(reference) is None or len(seq) < k:
+        return kmer_score(seq, reference, k=k)
+    return float(_profile(reference, k).score_batch(codes)[0])
 
 
 def ft_similarity(seq, reference, k=3):
-    return kmer_score(seq, reference, k=k)
+    return _similarity(seq, reference, k)
 
 
 def tfl1_similarity(seq, reference, k=3):
-    return kmer_score(seq, reference, k=k)
+    return _similarity(seq, reference, k)
 
 
 def motif_validator(seq, motifs=None):
-    return motif_value(seq, motifs=motifs)
+    compiled = _motif_set(None if motifs is None else tuple(motifs))
+    if isinstance(seq, np.ndarray):
+        return compiled.value_batch(np.atleast_2d(seq))
+    codes = _clean_codes(seq)
+    if codes is None:
+        return motif_value(seq, motifs=motifs)
+    return float(compiled.value_batch(codes)[0])
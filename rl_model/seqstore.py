@@ -0,0 +1,242 @@
+"""2-bit packed, memory-mapped sequence store.
+
+Bases are packed four to a byte (A=0, C=1, G=2, T=3, as in ``encoding``),
+and a side bitmask marks N and other ambiguity codes. Ambiguous positions read
+back as ``N_CODE`` / ``"N"``, and case is not kept. The file is opened with
+``np.memmap``, so a store the size of a genome costs page cache, not heap.
+Worker processes that open the same file share those pages.
+
+File layout::
+
+    b"BSQ1\\0\\0\\0\\0" | packed bases | mask bits | JSON index | u64 index offset | b"BSQEND01"
+
+Each record starts on an 8-base boundary, so its packed and mask bytes are
+both byte aligned. The writer streams records chunk by chunk and appends the
+index at the end.
+
+``SequenceView`` is a zero-copy window onto the mapped bytes.
+``np.asarray(view)`` unpacks just that window into uint8 codes and ``str(view)``
+decodes it, so ``encoding.encode``, the reward model and the encoders accept
+views wherever they accept code arrays.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from .encoding import BASE_LUT, N_CODE, decode, encode
+
+_MAGIC = b"BSQ1\0\0\0\0"
+_END = b"BSQEND01"
+_FOOTER = struct.Struct("<Q")
+_ALIGN = 8
+
+# byte -> its four 2-bit codes, lowest bits first
+_UNPACK = ((np.arange(256, dtype=np.uint16)[:, None] >> np.array([0, 2, 4, 6])) & 3).astype(np.uint8)
+
+Chunks = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+
+def _pack(codes: np.ndarray) -> Tuple[bytes, bytes]:
+    """Pack a multiple-of-8 run of codes into (2-bit bytes, mask bytes)."""
+    mask = codes >= N_CODE
+    bases = np.where(mask, 0, codes).reshape(-1, 4)
+    packed = bases[:, 0] | (bases[:, 1] << 2) | (bases[:, 2] << 4) | (bases[:, 3] << 6)
+    return packed.astype(np.uint8).tobytes(), np.packbits(mask, bitorder="little").tobytes()
+
+
+def write_store(path: str, records: Iterable[Tuple[str, Chunks]]) -> None:
+    """Write ``(name, sequence)`` records to a packed store at ``path``.
+
+    A sequence may be a string or an iterable of string chunks (e.g. FASTA
+    lines), so inputs larger than memory can be streamed straight in.
+    """
+    index: Dict[str, Tuple[int, int]] = {}
+    total = 0
+    with open(path, "wb") as out, tempfile.TemporaryFile() as mask_out:
+        out.write(_MAGIC)
+        for name, chunks in records:
+            if name in index:
+                raise ValueError(f"duplicate record name '{name}'")
+            if isinstance(chunks, (str, bytes)):
+                chunks = [chunks]
+            carry = np.empty(0, dtype=np.uint8)
+            length = 0
+            for chunk in chunks:
+                codes = encode(chunk, BASE_LUT)
+                length += len(codes)
+                codes = np.concatenate([carry, codes]) if len(carry) else codes
+                n = len(codes) - len(codes) % _ALIGN
+                packed, mask = _pack(codes[:n])
+                out.write(packed)
+                mask_out.write(mask)
+                carry = codes[n:]
+            if len(carry):
+                pad = np.full(_ALIGN - len(carry), N_CODE, dtype=np.uint8)
+                packed, mask = _pack(np.concatenate([carry, pad]))
+                out.write(packed)
+                mask_out.write(mask)
+            index[name] = (total, length)
+            total += -(-length // _ALIGN) * _ALIGN
+
+        mask_out.seek(0)
+        shutil.copyfileobj(mask_out, out)
+        index_offset = out.tell()
+        out.write(json.dumps({"total": total, "records": index}).encode("utf-8"))
+        out.write(_FOOTER.pack(index_offset))
+        out.write(_END)
+
+
+def fasta_records(path: str) -> Iterator[Tuple[str, Iterator[str]]]:
+    """Stream ``(name, line_chunks)`` from a FASTA file for ``write_store``.
+
+    Each chunk iterator must be consumed before advancing to the next record.
+    """
+    with open(path, "r", encoding="ascii") as fh:
+        pending = [None]
+
+        def lines():
+            for line in fh:
+                if line.startswith(">"):
+                    pending[0] = line
+                    return
+                yield line.strip()
+
+        header = next((line for line in fh if line.startswith(">")), None)
+        while header is not None:
+            yield header[1:].split()[0], lines()
+            header, pending[0] = pending[0], None
+
+
+class SequenceStore:
+    """Read-only, memory-mapped view of a file written by ``write_store``."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as fh:
+            if fh.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a sequence store")
+            footer_at = fh.seek(-(_FOOTER.size + len(_END)), os.SEEK_END)
+            (index_offset,) = _FOOTER.unpack(fh.read(_FOOTER.size))
+            if fh.read(len(_END)) != _END:
+                raise ValueError(f"{path} is truncated")
+            fh.seek(index_offset)
+            meta = json.loads(fh.read(footer_at - index_offset))
+        self.total = meta["total"]
+        self.records: Dict[str, Tuple[int, int]] = {k: tuple(v) for k, v in meta["records"].items()}
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+        start = len(_MAGIC)
+        self._packed = mm[start:start + self.total // 4]
+        self._mask = mm[start + self.total // 4:start + self.total // 4 + self.total // 8]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, name: str) -> "SequenceView":
+        offset, length = self.records[name]
+        return SequenceView(self, offset, offset + length)
+
+    def window(self, name: str, start: int, stop: Optional[int] = None) -> "SequenceView":
+        """Zero-copy view of ``name[start:stop]``."""
+        return self[name][start:stop]
+
+    @property
+    def nbytes(self) -> int:
+        return self._packed.nbytes + self._mask.nbytes
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        # re-map in the receiving process instead of pickling the data
+        self.__init__(state["path"])
+
+
+class SequenceView:
+    """A window ``[start, stop)`` of absolute base positions in a store."""
+
+    __slots__ = ("store", "start", "stop")
+    ndim = 1
+
+    def __init__(self, store: SequenceStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def shape(self) -> Tuple[int]:
+        return (len(self),)
+
+    @property
+    def packed(self) -> np.ndarray:
+        """The mapped bytes covering this window (no copy)."""
+        return self.store._packed[self.start // 4:(self.stop + 3) // 4]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Boolean mask of ambiguous positions in the window."""
+        bits = self.store._mask[self.start // 8:(self.stop + 7) // 8]
+        head = self.start % 8
+        return np.unpackbits(bits, bitorder="little")[head:head + len(self)].view(bool)
+
+    def codes(self) -> np.ndarray:
+        """Unpack the window into a fresh uint8 code array (N_CODE where masked)."""
+        head = self.start % 4
+        out = _UNPACK[self.packed].reshape(-1)[head:head + len(self)]
+        out[self.mask] = N_CODE
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.codes()
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def __str__(self) -> str:
+        return decode(self.codes())
+
+    def __repr__(self) -> str:
+        preview = str(self[:20]) + ("..." if len(self) > 20 else "")
+        return f"SequenceView({preview!r}, len={len(self)})"
+
+    def __getitem__(self, key):
+        """Index like ``str``: an int or a stepped slice gives a ``str``.
+
+        A contiguous slice gives a zero-copy ``SequenceView`` of that window
+        (``str()`` it for the text). Use ``codes()`` for code arrays.
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return SequenceView(self.store, self.start + start, self.start + max(start, stop))
+            return decode(self.codes()[key])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("SequenceView index out of range")
+        return str(self[key:key + 1])
+
+    def __reduce__(self):
+        return SequenceView, (self.store, self.start, self.stop)
+
+
+def as_text(seq) -> str:
+    """Return ``seq`` as a string, decoding store views (other values pass through)."""
+    return str(seq) if isinstance(seq, SequenceView) else seq
+
+
+__all__ = ["SequenceStore", "SequenceView", "write_store", "fasta_records", "as_text"]
@@ -0,0 +1,371 @@
+"""Local HTTP/JSON inference service for a trained ``ReinforceAgent``.
+
+    python -m rl_model.serve --checkpoint agent.pt --port 8766 --window-ms 2
+
+Endpoints:
+  - ``POST /propose``: body ``{"sequence": "ACGT...", "top_k": 5}`` (or
+    ``"sequences": [...]``). Returns the policy's most likely edits, each
+    ``{"pos", "base", "prob"}``, or ``{"noop": true, "prob"}``.
+  - ``GET /stats``: request count, requests/s, p50/p99 latency, mean batch size.
+  - ``GET /health``.
+
+Requests that arrive within ``window_ms`` of each other share one batched
+policy forward pass (up to ``max_batch`` rows). The forward pass runs on a
+single worker thread, so the event loop keeps accepting connections while it
+runs. With ``window_ms=0`` only requests that are already queued are
+coalesced. The HTTP layer is a minimal keep-alive HTTP/1.1 parser on
+``asyncio.start_server``; it needs no third-party server. ``load_test`` is
+the matching client, used by ``python -m rl_model.bench serve``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from .agent import ReinforceAgent, masked_logits
+from .constraints import ActionConstraints
+from .encoding import BASES, N_CODE, encode, one_hot
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class LatencyStats:
+    """Rolling latency samples and completion times for ``/stats``."""
+
+    def __init__(self, maxlen: int = 10_000, rate_window: float = 10.0):
+        self.latencies = deque(maxlen=maxlen)
+        self.completed = deque(maxlen=maxlen)
+        self.batch_sizes = deque(maxlen=1_000)
+        self.rate_window = rate_window
+        self.total = 0
+        self.started = time.perf_counter()
+
+    def record(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.completed.append(time.perf_counter())
+        self.total += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        now = time.perf_counter()
+        lat = np.fromiter(self.latencies, dtype=np.float64) * 1e3
+        recent = sum(1 for t in self.completed if now - t <= self.rate_window)
+        span = min(self.rate_window, now - self.started) or 1e-9
+        return {
+            "requests": self.total,
+            "rps": recent / span,
+            "p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+            "p99_ms": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+            "mean_batch": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+        }
+
+
+class PolicyService:
+    """Micro-batching front end around one agent's policy."""
+
+    def __init__(
+        self,
+        agent: ReinforceAgent,
+        window_ms: float = 2.0,
+        max_batch: int = 64,
+        mask_same_base: bool = True,
+    ):
+        self.agent = agent
+        self.window = window_ms / 1e3
+        self.max_batch = max_batch
+        self.mask_same_base = mask_same_base
+        self.stats = LatencyStats()
+        self._constraints: Dict[int, ActionConstraints] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy")
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    def _check(self, seq: str) -> np.ndarray:
+        if not isinstance(seq, str) or not seq:
+            raise ValueError("sequence must be a non-empty string")
+        codes = encode(seq)
+        if (codes >= N_CODE).any():
+            raise ValueError("sequence may only contain A, C, G and T")
+        if self.agent.policy_type != "conv" and len(codes) != self.agent.seq_len:
+            raise ValueError(f"sequence length must be {self.agent.seq_len} for this policy")
+        return codes
+
+    async def propose(self, seq: str, top_k: int = 5) -> List[dict]:
+        """Queue one sequence and wait for its batched result."""
+        codes = self._check(seq)
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((codes, max(1, int(top_k)), fut))
+        return await fut
+
+    async def _batch_loop(self) -> None:
+        while True:
+            batch: list = []
+            try:
+                await self._collect(batch)
+                await self._run_batch(batch)
+            except Exception as exc:
+                # a dead batcher would leave every later propose() waiting
+                # forever: fail this batch's callers and keep serving
+                logger.exception("policy batch failed")
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+
+    async def _collect(self, batch: list) -> None:
+        """Wait for one request, then add more until ``window`` or ``max_batch``."""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run_batch(self, batch: list) -> None:
+        loop = asyncio.get_running_loop()
+        self.stats.batch_sizes.append(len(batch))
+        # rows of different lengths (conv policies) go through separate forwards
+        by_len: Dict[int, list] = {}
+        for item in batch:
+            by_len.setdefault(len(item[0]), []).append(item)
+        for items in by_len.values():
+            codes = np.stack([c for c, _, _ in items])
+            k = max(k for _, k, _ in items)
+            try:
+                probs, idx = await loop.run_in_executor(self._executor, self._forward, codes, k)
+            except Exception as exc:
+                for _, _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for row, (c, k_i, fut) in enumerate(items):
+                if not fut.done():
+                    fut.set_result(self._proposals(len(c), probs[row, :k_i], idx[row, :k_i]))
+
+    def _forward(self, codes: np.ndarray, k: int):
+        L = codes.shape[1]
+        with torch.inference_mode():
+            logits = self.agent.policy(one_hot(codes))
+            if self.mask_same_base:
+                if L not in self._constraints:
+                    self._constraints[L] = ActionConstraints(L, mask_same_base=True)
+                logits = masked_logits(logits, self._constraints[L].mask(codes))
+            probs, idx = torch.softmax(logits, dim=-1).topk(min(k, logits.shape[-1]), dim=-1)
+        return probs.numpy(), idx.numpy()
+
+    def _proposals(self, seq_len: int, probs, idx) -> List[dict]:
+        out = []
+        noop = seq_len * self.agent.n_bases
+        for p, a in zip(probs.tolist(), idx.tolist()):
+            if a == noop:
+                out.append({"noop": True, "prob": p})
+            else:
+                out.append({"pos": a // self.agent.n_bases, "base": BASES[a % self.agent.n_bases], "prob": p})
+        return out
+
+    async def handle_propose(self, payload: dict) -> dict:
+        top_k = payload.get("top_k", 5)
+        if "sequences" in payload:
+            results = await asyncio.gather(*(self.propose(s, top_k) for s in payload["sequences"]))
+            return {"proposals": list(results)}
+        return {"proposals": await self.propose(payload.get("sequence"), top_k)}
+
+    async def _route(self, method: str, path: str, body: bytes):
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            return 200, {"ok": True}
+        if path == "/stats":
+            return 200, self.stats.snapshot()
+        if path == "/propose":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                payload = json.loads(body or b"{}")
+                return 200, await self.handle_propose(payload)
+            except (ValueError, TypeError, AttributeError) as exc:
+                return 400, {"error": str(exc)}
+            except Exception as exc:
+                # a failed forward pass still gets an answer; the connection stays usable
+                return 500, {"error": f"{type(exc).__name__}: {exc}"}
+        return 404, {"error": f"no route for {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = h.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, payload = await self._route(method, path, body)
+                if path.startswith("/propose") and status == 200:
+                    self.stats.record(time.perf_counter() - start)
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8766) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+
+
+def serve(
+    agent: ReinforceAgent,
+    host: str = "127.0.0.1",
+    port: int = 8766,
+    window_ms: float = 2.0,
+    max_batch: int = 64,
+) -> None:
+    """Run the service until interrupted."""
+
+    async def main():
+        service = PolicyService(agent, window_ms=window_ms, max_batch=max_batch)
+        server = await service.start(host, port)
+        print(f"Serving policy on http://{host}:{server.sockets[0].getsockname()[1]}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+async def _http(reader, writer, method: str, path: str, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        if h.lower().startswith(b"content-length:"):
+            length = int(h.split(b":", 1)[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def load_test(
+    host: str,
+    port: int,
+    sequences: Sequence[str],
+    requests: int = 2000,
+    concurrency: int = 32,
+    top_k: int = 5,
+) -> Dict[str, float]:
+    """Fire ``requests`` POST /propose calls over ``concurrency`` keep-alive connections.
+
+    Returns client-side rps and p50/p99 latency, plus the server's ``/stats``.
+    """
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                seq = sequences[i % len(sequences)]
+                t0 = time.perf_counter()
+                status, _ = await _http(reader, writer, "POST", "/propose", {"sequence": seq, "top_k": top_k})
+                if status != 200:
+                    raise RuntimeError(f"/propose returned {status}")
+                latencies.append(time.perf_counter() - t0)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await _http(reader, writer, "GET", "/stats")
+    writer.close()
+    lat = np.array(latencies) * 1e3
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "server_p99_ms": server_stats["p99_ms"],
+        "mean_batch": server_stats["mean_batch"],
+    }
+
+
+def main(argv=None):
+    from .checkpoint import load_checkpoint
+    from .sample_sequences import get_case
+
+    p = argparse.ArgumentParser(description="Serve a trained policy over HTTP/JSON")
+    p.add_argument("--checkpoint", help="file written by checkpoint.save_checkpoint")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8766)
+    p.add_argument("--window-ms", type=float, default=2.0)
+    p.add_argument("--max-batch", type=int, default=64)
+    args = p.parse_args(argv)
+
+    if args.checkpoint:
+        agent, _ = load_checkpoint(args.checkpoint)
+    else:
+        print("No --checkpoint given; serving an untrained policy for the demo case.")
+        agent = ReinforceAgent(seq_len=len(get_case().initial_sequence))
+    serve(agent, host=args.host, port=args.port, window_ms=args.window_ms, max_batch=args.max_batch)
+
+
+__all__ = ["PolicyService", "LatencyStats", "serve", "load_test"]
+
+
+if __name__ == "__main__":
+    main()
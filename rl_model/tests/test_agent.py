@@ -0,0 +1,403 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from rl_model.agent import ReinforceAgent
+from rl_model.encoding import encode, one_hot, to_index_tensor
+
+
+def test_encoding_accepts_str_bytes_and_codes():
+    expected = to_index_tensor("ACGT")
+    assert expected.tolist() == [0, 1, 2, 3]
+    assert torch.equal(to_index_tensor(b"acgt"), expected)
+    assert torch.equal(to_index_tensor(encode("ACGT")), expected)
+    # ambiguous bases are all-zero rows
+    assert one_hot("ANRT", flatten=False).sum(dim=1).tolist() == [1.0, 0.0, 0.0, 1.0]
+
+
+def test_agent_batch_encoding_matches_single():
+    agent = ReinforceAgent(seq_len=8)
+    seqs = ["ACGTACGT", "TTTTAAAA"]
+    batch = agent.encode_batch(np.stack([encode(s) for s in seqs]))
+    assert batch.shape == (2, 32)
+    for row, seq in zip(batch, seqs):
+        assert torch.equal(row, agent.encode_seq(seq))
+
+
+def test_discounted_returns_matches_loop():
+    from rl_model.agent import discounted_returns
+
+    rewards = np.random.default_rng(0).normal(size=(3, 12))
+    got = discounted_returns(torch.from_numpy(rewards), gamma=0.9)
+    for b in range(3):
+        R, expected = 0.0, []
+        for r in reversed(rewards[b]):
+            R = r + 0.9 * R
+            expected.append(R)
+        assert np.allclose(got[b].numpy(), expected[::-1])
+
+
+def test_discounted_returns_long_horizon_stays_finite():
+    from rl_model.agent import discounted_returns
+
+    got = discounted_returns(np.ones((1, 8000)), gamma=0.9)
+    assert torch.isfinite(got).all()
+    assert np.isclose(got[0, 0].item(), 10.0) and got[0, -1].item() == 1.0
+
+
+def test_train_batched_runs_and_reports_every_episode():
+    from rl_model.train import train_batched
+
+    torch.manual_seed(0)
+    agent, env, scores = train_batched(episodes=16, batch_size=8, max_edits=4, seed=0)
+    assert len(scores) == 16
+    assert env.done.all()
+    assert all(isinstance(s, float) for s in scores)
+
+    # a partial last batch is truncated rather than rounded up
+    _, _, scores = train_batched(episodes=5, batch_size=4, max_edits=3, seed=0)
+    assert len(scores) == 5
+
+
+def test_graph_free_update_matches_graph_gradients():
+    agent = ReinforceAgent(seq_len=8)
+    rng = np.random.default_rng(0)
+    obs = rng.integers(0, 4, (3, 5, 8), dtype=np.uint8)
+    actions = torch.from_numpy(rng.integers(0, agent.n_actions, (3, 5)))
+    rewards = torch.from_numpy(rng.normal(size=(3, 5)))
+    mask = torch.ones(3, 5, dtype=torch.bool)
+    mask[0, 3:] = False
+
+    # keep the weights fixed so both paths see the same policy
+    agent.optimizer.step = lambda: None
+    grads = []
+    for graph_free in (False, True):
+        agent.optimizer.zero_grad()
+        if graph_free:
+            agent.update_from_rollout(obs, actions, rewards, mask, chunk_size=4)
+        else:
+            lp = agent.log_probs_of(obs.reshape(15, 8), actions.reshape(15)).view(3, 5)
+            agent.update_batch(lp, rewards, mask)
+        grads.append([p.grad.clone() for p in agent.policy.parameters()])
+    for a, b in zip(*grads):
+        assert torch.allclose(a, b, atol=1e-6)
+
+
+def test_worker_pool_rollout_fills_shared_buffers():
+    from rl_model.env import VecSequenceEnv
+    from rl_model.parallel import RolloutWorkerPool
+
+    env = VecSequenceEnv(4, max_edits=3, autoreset=False, seed=0)
+    agent = ReinforceAgent(seq_len=env.seq_len)
+    with RolloutWorkerPool.from_env(env, 1, 4, seed=0, policy=agent.policy) as pool:
+        pool.broadcast(agent.policy)
+        steps, final, (obs, actions, rewards, mask) = pool.rollout()
+        assert 1 <= steps <= 3
+        assert obs.shape == (4, 3, env.seq_len)
+        assert mask[:, 0].all()
+        assert np.isfinite(final).all()
+        # the learner can recompute log-probs straight from the shared views
+        agent.update_from_rollout(obs[:, :steps], actions[:, :steps], rewards[:, :steps], mask[:, :steps])
+
+
+def test_action_constraints_mask_and_sampling():
+    from rl_model.constraints import ActionConstraints
+
+    constraints = ActionConstraints(4, forbidden=[2], max_edits=3)
+    mask = constraints.mask(["ACGT", "ACGT"], n_edits=[0, 3])
+    allowed = mask[0].view(-1)[:-1].view(4, 4)
+    # current bases and the forbidden position are masked, noop never is
+    assert not allowed[0, 0] and not allowed[1, 1] and not allowed[3, 3]
+    assert not allowed[2].any()
+    assert allowed[0, 1:].all()
+    assert mask[:, -1].all()
+    # budget exhausted -> only noop
+    assert mask[1].sum() == 1
+
+    # in-place updates after each edit match a freshly built mask
+    live = constraints.mask("ACGT")
+    for n, (pos, seq) in enumerate([(0, "GCGT"), (3, "GCGA"), (1, "GAGA")], start=1):
+        constraints.apply_edit(live, pos, "ACGT".index(seq[pos]), n)
+        assert torch.equal(live, constraints.mask(seq, n))
+
+    agent = ReinforceAgent(seq_len=4)
+    actions = agent.act(np.zeros((256, 4), dtype=np.uint8), constraints.mask(np.zeros((256, 4), dtype=np.uint8)))
+    pos, base = actions // 4, actions % 4
+    assert ((pos == 4) | ((pos != 2) & (base != 0))).all()
+
+
+def test_gae_matches_discounted_returns_with_lambda_one():
+    from rl_model.actor_critic import gae
+    from rl_model.agent import discounted_returns
+
+    rewards = torch.tensor([[1.0, 0.5, -0.2, 0.0], [0.3, 0.1, 0.0, 0.0]])
+    mask = torch.tensor([[True, True, True, False], [True, True, False, False]])
+    values = torch.zeros(2, 4)
+    adv, returns = gae(rewards, values, mask, gamma=0.9, lam=1.0)
+    expected = discounted_returns(rewards, 0.9, mask).float() * mask
+    assert torch.allclose(adv, expected)
+    assert torch.allclose(returns, expected)
+
+
+def test_train_actor_critic_smoke():
+    from rl_model.actor_critic import ActorCriticAgent, train_actor_critic
+
+    torch.manual_seed(0)
+    agent, env, scores = train_actor_critic(episodes=16, batch_size=8, max_edits=4, seed=0)
+    assert isinstance(agent, ActorCriticAgent)
+    assert len(scores) == 16
+    # the shared trunk feeds both heads
+    assert agent.policy.net.encoder is agent.net.encoder
+    with pytest.raises(ValueError):
+        train_actor_critic(episodes=8, batch_size=8, max_edits=4, epochs=0)
+
+
+def test_actor_critic_checkpoint_round_trip(tmp_path):
+    from rl_model.actor_critic import ActorCriticAgent
+    from rl_model.checkpoint import load_checkpoint, save_checkpoint
+
+    torch.manual_seed(0)
+    agent = ActorCriticAgent(seq_len=10, emb_dim=16)
+    path = str(tmp_path / "ac.pt")
+    save_checkpoint(path, agent)
+    loaded, _ = load_checkpoint(path)
+    assert isinstance(loaded, ActorCriticAgent) and loaded.policy_kwargs == {"emb_dim": 16}
+    # the critic travels with the policy
+    for a, b in zip(agent.net.parameters(), loaded.net.parameters()):
+        assert torch.equal(a, b)
+
+
+def test_conv_policy_is_length_independent():
+    agent = ReinforceAgent(seq_len=60, policy="conv")
+    n_params = sum(p.numel() for p in agent.policy.parameters())
+    assert n_params == sum(p.numel() for p in ReinforceAgent(seq_len=5000, policy="conv").policy.parameters())
+    for seq_len in (60, 257):
+        obs = np.random.default_rng(seq_len).integers(0, 4, (2, seq_len), dtype=np.uint8)
+        logits = agent.policy(agent.encode_batch(obs))
+        assert logits.shape == (2, seq_len * 4 + 1)
+        rows = agent.actions_to_env_batch(torch.tensor([seq_len * 4, 5]), seq_len=seq_len)
+        assert rows.tolist() == [[-1, 0], [1, 1]]
+
+
+def test_checkpoint_round_trip_and_model_cache(tmp_path):
+    from rl_model.checkpoint import ModelCache, load_checkpoint, save_checkpoint, train_cached
+    from rl_model.env import SequenceEnv
+
+    torch.manual_seed(0)
+    agent = ReinforceAgent(seq_len=8, policy="conv", channels=8, layers=2)
+    _, lp = agent.select_action("ACGTACGT")
+    agent.update([lp], [1.0])
+    path = str(tmp_path / "agent.pt")
+    save_checkpoint(path, agent, {"note": "x"})
+    loaded, meta = load_checkpoint(path)
+    assert meta == {"note": "x"} and loaded.policy_type == "conv"
+    for a, b in zip(agent.policy.parameters(), loaded.policy.parameters()):
+        assert torch.equal(a, b)
+    assert loaded.optimizer.state_dict()["state"].keys() == agent.optimizer.state_dict()["state"].keys()
+
+    cache = ModelCache(str(tmp_path / "cache"))
+
+    def make_env():
+        return SequenceEnv(start_sequence="ACGTACGTAC", target_ft="A" * 10, target_tfl1="C" * 10, max_edits=3)
+
+    agent1, _, scores1 = train_cached(episodes=4, env=make_env(), cache=cache)
+    assert len(scores1) == 4 and len(list((tmp_path / "cache").iterdir())) == 1
+    # same settings: served from the cache without training
+    _, _, scores2 = train_cached(episodes=4, env=make_env(), cache=cache)
+    assert scores2 == scores1
+    # a larger budget warm-starts and trains only the difference
+    _, _, scores3 = train_cached(episodes=6, env=make_env(), cache=cache)
+    assert scores3[:4] == scores1 and len(scores3) == 6
+
+
+def test_cache_hit_replays_under_training_constraints(tmp_path):
+    from rl_model.checkpoint import ModelCache, train_cached
+    from rl_model.env import SequenceEnv
+
+    cache = ModelCache(str(tmp_path / "cache"))
+    opts = dict(episodes=2, cache=cache, forbidden=list(range(9)), edit_budget=1)
+
+    def make_env():
+        return SequenceEnv(start_sequence="ACGTACGTAC", target_ft="A" * 10, target_tfl1="C" * 10, max_edits=5)
+
+    torch.manual_seed(0)
+    train_cached(env=make_env(), **opts)
+    for seed in range(5):
+        torch.manual_seed(seed)
+        _, env, _ = train_cached(env=make_env(), **opts)
+        edits = env.history.edits()
+        # only the last position, at most once, and never a same-base rewrite
+        assert len(edits) <= 1 and all(pos == 9 for pos, _ in edits) and env.steps == len(edits)
+
+    # a corrupt entry is a miss, not an error
+    key = next(iter(os.listdir(cache.root)))[:-3]
+    with open(cache.path(key), "wb") as fh:
+        fh.write(b"not a checkpoint")
+    assert cache.get(key) is None
+
+
+def test_policy_service_batches_concurrent_requests():
+    import asyncio
+
+    from rl_model.serve import PolicyService, _http, load_test
+
+    torch.manual_seed(0)
+    service = PolicyService(ReinforceAgent(seq_len=8), window_ms=20, max_batch=16)
+
+    async def run():
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            results = await asyncio.gather(*(service.propose("ACGTACGT", top_k=3) for _ in range(6)))
+            assert service.stats.batch_sizes[-1] == 6
+            assert all(len(r) == 3 for r in results)
+            edit = next(p for p in results[0] if not p.get("noop"))
+            assert "ACGTACGT"[edit["pos"]] != edit["base"]  # same-base rewrites are masked
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            status, body = await _http(reader, writer, "POST", "/propose", {"sequence": "ACGN"})
+            assert status == 400 and "error" in body
+
+            def broken(x):
+                raise RuntimeError("forward failed")
+
+            service.agent.policy.forward = broken
+            status, body = await _http(reader, writer, "POST", "/propose", {"sequence": "ACGTACGT"})
+            assert status == 500 and "forward failed" in body["error"]
+            del service.agent.policy.forward
+            # the same keep-alive connection still answers
+            status, _ = await _http(reader, writer, "POST", "/propose", {"sequence": "ACGTACGT"})
+            assert status == 200
+            writer.close()
+            stats = await load_test("127.0.0.1", port, ["ACGTACGT", "TTTTACGT"], requests=40, concurrency=4)
+            assert stats["requests"] == 40 and stats["p99_ms"] >= stats["p50_ms"]
+        finally:
+            server.close()
+            service.close()
+
+    asyncio.run(run())
+
+
+def test_policy_service_survives_unexpected_batch_errors(monkeypatch):
+    import asyncio
+
+    from rl_model.serve import PolicyService
+
+    service = PolicyService(ReinforceAgent(seq_len=8), window_ms=0)
+    proposals = service._proposals
+
+    def fail_once(*args):
+        monkeypatch.setattr(service, "_proposals", proposals)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(service, "_proposals", fail_once)
+
+    async def run():
+        try:
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(service.propose("ACGTACGT"), 5)
+            # the batcher kept running, so the next request is served
+            assert await asyncio.wait_for(service.propose("ACGTACGT", top_k=2), 5)
+        finally:
+            service.close()
+
+    asyncio.run(run())
+
+
+def test_training_job_streams_progress_and_cancels(tmp_path, monkeypatch):
+    import time
+
+    from rl_model.jobs import TrainingJob
+
+    # keep the child's model cache out of the user's home directory
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    def drain(job, until, timeout=60):
+        events, deadline = [], time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            events += job.poll()
+            if events and events[-1]["type"] in until:
+                return events
+            time.sleep(0.02)
+        raise AssertionError(f"no {until} event; got {events}")
+
+    job = TrainingJob(episodes=6, seq_len=10, max_edits=3).start()
+    events = drain(job, ("done", "error"))
+    assert events[0]["type"] == "started" and events[-1]["type"] == "done"
+    progress = [e for e in events if e["type"] == "progress"]
+    assert progress[-1]["episode"] == 6 and len(events[-1]["rewards"]) == 6
+    job.join(10)
+
+    job = TrainingJob(episodes=100_000, seq_len=10, max_edits=3).start()
+    drain(job, ("progress",))
+    job.cancel()
+    events = drain(job, ("cancelled", "error"))
+    assert events[-1]["type"] == "cancelled"
+    job.join(10)
+    assert not job.is_alive()
+
+
+def test_job_progress_counts_cached_episodes_on_resume(tmp_path):
+    import queue
+    import threading
+
+    from rl_model.checkpoint import ModelCache, train_cached
+    from rl_model.env import SequenceEnv
+    from rl_model.jobs import _JobReporter
+
+    cache = ModelCache(str(tmp_path / "cache"))
+
+    def make_env():
+        return SequenceEnv(start_sequence="ACGTACGTAC", max_edits=3, obs_mode="one_hot")
+
+    train_cached(episodes=3, env=make_env(), cache=cache)
+    events = queue.Queue()
+    reporter = _JobReporter(events, threading.Event(), 8, progress_hz=1e6)
+    train_cached(episodes=8, env=make_env(), cache=cache, callbacks=[reporter])
+    progress = [events.get_nowait() for _ in range(events.qsize())]
+    assert progress[0]["episode"] == 4
+    assert progress[-1]["episode"] == progress[-1]["episodes"] == 8
+    assert reporter.last_episode == 8
+
+
+def test_training_callbacks_fire_and_can_stop():
+    from rl_model.callbacks import RateLimited, TrainingCallback
+    from rl_model.env import SequenceEnv
+    from rl_model.train import train, train_batched
+
+    class Recorder(TrainingCallback):
+        def __init__(self, stop_at=None):
+            self.episodes, self.updates, self.best = [], [], []
+            self.stop_at = stop_at
+
+        def on_episode_end(self, episode, reward, env):
+            self.episodes.append(episode)
+            return episode == self.stop_at
+
+        def on_update(self, update, metrics):
+            self.updates.append(metrics)
+
+        def on_best(self, episode, reward, sequence):
+            self.best.append((reward, sequence))
+
+    rec = Recorder(stop_at=3)
+    env = SequenceEnv(seq_len=10, max_edits=3)
+    _, _, scores = train(episodes=10, env=env, callbacks=rec)
+    assert rec.episodes == [0, 1, 2, 3] and len(scores) == 4
+    assert [r for r, _ in rec.best] == sorted(r for r, _ in rec.best)
+    assert all(len(seq) == 10 for _, seq in rec.best)
+    assert set(rec.updates[0]) == {"loss", "reward", "episodes"}
+
+    rec = Recorder()
+    train_batched(episodes=8, batch_size=4, seq_len=10, max_edits=3, seed=0, callbacks=[rec])
+    assert rec.episodes == list(range(8)) and len(rec.updates) == 2
+    # one subscriber reads the same metric keys from both loops
+    assert {"loss", "reward", "episodes"} <= set(rec.updates[0]) and rec.updates[-1]["episodes"] == 8
+
+    inner = Recorder()
+    limited = RateLimited(inner, interval=60.0)
+    for ep in range(5):
+        limited.on_episode_end(ep, 0.0, None)
+    assert inner.episodes == [0]
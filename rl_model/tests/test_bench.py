@@ -0,0 +1,17 @@
+import json
+
+from rl_model.bench import compare_results, run_suite
+
+
+def test_bench_suite_json_and_compare():
+    doc = run_suite(lengths=[20], only=["kmer_score", "env.step"])
+    assert set(doc["results"]) == {"kmer_score[L=20]", "env.step[L=20]", "env.step[one_hot][L=20]"}
+    assert all(r["median_s"] > 0 for r in doc["results"].values())
+
+    slower = json.loads(json.dumps(doc))
+    slower["results"]["kmer_score[L=20]"]["median_s"] *= 2
+    del slower["results"]["env.step[L=20]"]
+    status = {r["benchmark"]: r["status"] for r in compare_results(doc, slower, threshold=0.15)}
+    assert status == {
+        "kmer_score[L=20]": "regression", "env.step[L=20]": "missing", "env.step[one_hot][L=20]": "ok",
+    }
@@ -0,0 +1,74 @@
+import pytest
+
+from rl_model.catalog import CaseRegistry, GeneCatalog, iter_records
+from rl_model.env import SequenceEnv
+from rl_model.sample_sequences import get_case
+
+CSV = '''gene_id_or_entry_id, species, symbol_or_gene, fasta
+G1, Malus, GeneA, ">tr|G1|G1_X desc GN=AlphaA
+  ACGTACGTAC
+  GTACGT"
+G2, Malus, GeneB, ">tr|G2|G2_X desc GN=BetaB
+  TTTTCCCCGGGGAAAA"
+G3, Malus, GeneC, ">tr|G3|G3_X desc GN=GammaC
+  CCCCCCCCCCCCCCCCCC"
+G4, Malus, NoSeq,
+'''
+
+
+def _write(tmp_path, name="genes.csv", text=CSV):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def test_streaming_offsets_and_lookup(tmp_path):
+    path = _write(tmp_path)
+    records = list(iter_records(str(path)))
+    assert [fields[0] for _, fields in records] == ["G1", "G2", "G3", "G4"]
+    raw = path.read_bytes()
+    assert all(raw[offset:].startswith(fields[0].encode()) for offset, fields in records)
+
+    index = str(tmp_path / "index")
+    with GeneCatalog([str(path)], index_dir=index) as catalog:
+        entry = catalog.get("alphaa")
+        assert entry.entry_id == "G1" and entry.sequence == "ACGTACGTACGTACGT"
+        assert catalog.get("G4").sequence is None
+        assert "GeneB" in catalog and "missing" not in catalog
+
+    # a reopened catalog reuses the index without rescanning
+    with GeneCatalog([str(path)], index_dir=index) as reopened:
+        assert reopened.refresh() == []
+        assert reopened.sequence("G3") == "C" * 18
+
+
+def test_index_is_per_source_set_and_incremental(tmp_path):
+    a = _write(tmp_path, "a.csv")
+    b = _write(tmp_path, "b.csv", CSV.replace("G1,", "H1,").replace("GeneA", "GeneH"))
+    index = str(tmp_path / "index")
+    GeneCatalog([str(a), str(b)], index_dir=index).close()
+    # another source list gets its own index and leaves the first one intact
+    with GeneCatalog([str(a)], index_dir=index) as only_a:
+        assert "GeneH" not in only_a
+    with GeneCatalog([str(a), str(b)], index_dir=index) as both:
+        assert both.refresh() == [] and both.get("GeneH").entry_id == "H1"
+
+        b.write_text(CSV.replace("G1,", "H22,").replace("GeneA", "GeneH"))
+        assert both.refresh() == [str(b)]
+        assert both.get("GeneH").entry_id == "H22"
+        assert both.sequence("AlphaA") == "ACGTACGTACGTACGT"
+
+
+def test_case_registry_is_lazy_and_env_compatible(tmp_path):
+    with GeneCatalog([str(_write(tmp_path))], index_dir=str(tmp_path / "index")) as catalog:
+        registry = CaseRegistry(catalog)
+        # keys are only resolved when the case is first used
+        registry.register("catalog_missing", "G1", "nope", "G3")
+        with pytest.raises(KeyError):
+            registry.get_case("catalog_missing")
+
+        registry.register("catalog_demo", "G1", "G2", "G3")
+        case = get_case("catalog_demo")
+        assert len(case.initial_sequence) == len(case.target_sequence) == len(case.avoid_sequence) == 16
+        env = SequenceEnv(case_id="catalog_demo", max_edits=2)
+        assert env.seq_len == 16
@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+import torch
 
 from rl_model.env import SequenceEnv
 from rl_model.reward_model import compute_reward
@@ -20,3 +22,79 @@ def test_env_defaults_to_demo_case():
     seq = env.reset()
     assert env.case is not None
     assert len(seq) == len(env.target_ft) == len(env.target_tfl1)
+
+
+def test_vec_env_step_and_autoreset():
+    from rl_model.env import VecSequenceEnv
+
+    env = VecSequenceEnv(num_envs=4, max_edits=2, noise_prob=0.0, seed=0)
+    obs = env.reset()
+    assert obs.shape == (4, env.seq_len)
+    assert env.get_sequence(0) == env.start_sequence
+
+    actions = np.array([[0, 0], [1, 1], [-1, 0], [2, 3]])
+    obs, rewards, dones, info = env.step(actions)
+    assert dones.tolist() == [False, False, True, False]
+    assert list(info["final_slots"]) == [2]
+    assert obs[0, 0] == 0 and obs[1, 1] == 1
+    # slot 2 was auto-reset back to the curated start
+    assert env.get_sequence(2) == env.start_sequence
+
+    _, _, dones, info = env.step(actions)
+    assert dones[0] and dones[1] and dones[3]
+    assert info["final_obs"].shape[1] == env.seq_len
+
+
+def test_vec_env_noise_matches_rate():
+    from rl_model.env import VecSequenceEnv
+
+    env = VecSequenceEnv(num_envs=256, seq_len=100, noise_prob=0.1, seed=1)
+    flipped = (env.sequences != env.start_codes).mean()
+    assert 0.07 < flipped < 0.13
+
+
+def test_env_array_state_and_edit_history():
+    env = SequenceEnv(start_sequence="ACGTACGT", target_ft="A" * 8, target_tfl1="C" * 8, noise_prob=0.0)
+    obs = env.reset()
+    assert not obs.flags.writeable
+    with pytest.raises(ValueError):
+        obs[0] = 3
+
+    obs, _, _, _ = env.step((0, "T"))
+    env.step((0, "T"))  # same base: counted as a step, not recorded
+    env.step((3, "A"))
+    assert obs[0] == 3 and env.sequence == "TCGAACGT"
+    assert env.initial_sequence == "ACGTACGT"
+    assert list(env.history) == [
+        {"step": 0, "pos": 0, "from": "A", "to": "T"},
+        {"step": 2, "pos": 3, "from": "T", "to": "A"},
+    ]
+    assert env.history.records["pos"].tolist() == [0, 3]
+    assert env.history.edits() == [(0, "T"), (3, "A")]
+
+    env.reset()
+    assert len(env.history) == 0 and env.sequence == "ACGTACGT"
+    with pytest.raises(ValueError):
+        env.step((0, "N"))
+
+
+def test_env_tensor_observations_track_edits():
+    from rl_model.agent import ReinforceAgent
+    from rl_model.encoding import one_hot
+
+    env = SequenceEnv(seq_len=12, max_edits=4, obs_mode="one_hot")
+    obs = env.reset()
+    agent = ReinforceAgent(seq_len=12)
+    _, lp = agent.select_action(obs)
+    for pos, base in [(0, "A"), (0, "G"), (11, "T")]:
+        same, _, _, _ = env.step((pos, base))
+        assert same is obs
+        assert torch.equal(obs, one_hot(env.sequence))
+    # the in-place edits must not invalidate the graph of earlier log-probs
+    lp.backward()
+
+    idx_env = SequenceEnv(seq_len=12, obs_mode="index")
+    idx_env.step((3, "C"))
+    assert idx_env._get_obs().tolist() == idx_env.codes.tolist()
+    with pytest.raises(ValueError):
+        SequenceEnv(seq_len=12, obs_mode="strings")
@@ -0,0 +1,61 @@
+import json
+import os
+
+from rl_model import export
+from rl_model.env import SequenceEnv
+from rl_model.export import export_directory, load_trajectory, save_trajectory, trajectory_from_env
+
+
+def test_trajectory_round_trip_from_env(tmp_path):
+    env = SequenceEnv(start_sequence="A" * 12, target_ft="C" * 12, target_tfl1="G" * 12, max_edits=3, noise_prob=0.0)
+    env.step((2, "G"))
+    env.step((5, "T"))
+    doc = trajectory_from_env(env, reward=0.5)
+    path = tmp_path / "run.json"
+    save_trajectory(str(path), doc["initial"], doc["edits"], **doc["meta"])
+    loaded = load_trajectory(str(path))
+    assert loaded["initial"] == env.initial_sequence
+    assert loaded["edits"] == [(2, "G"), (5, "T")] and loaded["meta"] == {"reward": 0.5}
+
+
+def test_export_directory_skips_unchanged_inputs(tmp_path):
+    src, out = tmp_path / "runs", tmp_path / "html"
+    save_trajectory(str(src / "a.json"), "ACGT" * 10, [(0, "T"), (4, "G")])
+    save_trajectory(str(src / "b.json"), "ACGT" * 1000, [(100, "C")])
+    (src / "bad.json").write_text(json.dumps({"format": 99}))
+
+    result = export_directory(str(src), str(out), workers=1)
+    assert (result["rendered"], result["skipped"], result["failed"]) == (2, 0, 1)
+    assert result["entries"]["b.json"]["view"] == "lod"
+    index = (out / "index.html").read_text()
+    assert 'href="a.html"' in index and 'href="b.html"' in index and "unsupported trajectory format" in index
+    assert (out / "plotly.min.js").exists()
+
+    save_trajectory(str(src / "a.json"), "ACGT" * 10, [(0, "C")])
+    result = export_directory(str(src), str(out), workers=1)
+    assert (result["rendered"], result["skipped"], result["failed"]) == (1, 1, 1)
+
+    # nothing to render: a deleted bundle is still restored for the old pages
+    (src / "bad.json").unlink()
+    (out / "plotly.min.js").unlink()
+    result = export_directory(str(src), str(out), workers=1)
+    assert (result["rendered"], result["skipped"], result["failed"]) == (0, 2, 0)
+    assert (out / "plotly.min.js").exists()
+
+
+def _crash_job(src, out_html):
+    # stands in for a worker killed mid-render (OOM, segfault)
+    os._exit(1)
+
+
+def test_export_directory_survives_a_crashed_worker(tmp_path, monkeypatch):
+    src, out = tmp_path / "runs", tmp_path / "html"
+    for name in ("a", "b", "c"):
+        save_trajectory(str(src / f"{name}.json"), "ACGT" * 10, [(0, "T")])
+    monkeypatch.setattr(export, "_render_job", _crash_job)
+
+    result = export_directory(str(src), str(out), workers=2, max_in_flight=2)
+    assert result["failed"] == 3 and result["rendered"] == 0
+    assert all("BrokenProcessPool" in e["error"] for e in result["entries"].values())
+    assert "BrokenProcessPool" in (out / "index.html").read_text()
+    assert (out / "manifest.json").exists()
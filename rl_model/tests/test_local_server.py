@@ -0,0 +1,100 @@
+import gzip
+import json
+import random
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from rl_model.payload import decode_payload
+from rl_model.local_server import LocalServer, ServerClient, visualizer_url
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "page.html").write_text("<html>" + "ACGT" * 1000 + "</html>")
+    (root / ".git").mkdir()
+    (root / ".git" / "config").write_text("[core]")
+    (root / ".env").write_text("TOKEN=x")
+    (tmp_path / "secret.txt").write_text("nope")
+    srv = LocalServer(("127.0.0.1", 0), root=str(root))
+    srv.start_background()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(url, headers=None):
+    req = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, dict(resp.headers), resp.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, dict(exc.headers), exc.read()
+
+
+def test_static_assets_are_compressed_and_revalidated(server):
+    base = f"http://127.0.0.1:{server.port}"
+    status, headers, body = _get(base + "/page.html", {"Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body).startswith(b"<html>ACGT")
+    assert headers["Cache-Control"] == "no-cache"
+
+    status, _, body = _get(base + "/page.html", {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+    assert _get(base + "/page.html")[1].get("Content-Encoding") is None
+
+    for path in ("/../secret.txt", "/%2e%2e/secret.txt", "/.git/config", "/.env", "/%2egit/config"):
+        assert _get(base + path)[0] == 404
+
+
+def test_rejects_foreign_hosts_and_bad_posts(server, tmp_path):
+    base = f"http://127.0.0.1:{server.port}"
+    # DNS rebinding: the browser sends the attacker's host name
+    assert _get(base + "/page.html", {"Host": f"evil.example:{server.port}"})[0] == 403
+    assert _get(base + "/page.html", {"Host": f"localhost:{server.port}"})[0] == 200
+
+    def post(path, body, ctype):
+        req = urllib.request.Request(base + path, data=body, headers={"Content-Type": ctype})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return resp.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    # a cross-site form/fetch can only send "simple" content types
+    assert post("/api/session", b'{"payload": "R"}', "text/plain") == 415
+    assert post("/api/mount", json.dumps({"path": str(tmp_path)}).encode(), "application/json") == 404
+
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(
+            b"POST /api/session HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+            b"Content-Type: application/json\r\nContent-Length: -1\r\n\r\n"
+        )
+        assert sock.recv(64).startswith(b"HTTP/1.1 400")
+
+    client = ServerClient(base)
+    with pytest.raises(ValueError):
+        client.url_for(str(tmp_path / "secret.txt"))
+
+
+def test_sessions_and_visualizer_url(server):
+    client = ServerClient(f"http://127.0.0.1:{server.port}")
+    assert client.health()["ok"]
+
+    sid = client.post_session({"payload": "R", "rewards": [1.5]})
+    assert client.get_session(sid) == {"payload": "R", "rewards": [1.5]}
+    assert _get(client.base_url + "/api/session/missing")[0] == 404
+
+    assert client.url_for(server.root + "/page.html") == client.base_url + "/page.html"
+
+    # random bases don't deflate below the URL limit, so this goes through a session
+    initial = "".join(random.Random(0).choices("ACGT", k=40000))
+    final = "T" + initial[1:]
+    url = visualizer_url(client, initial, final, case_id="demo")
+    assert "#session=" in url
+    doc = client.get_session(url.rsplit("=", 1)[1])
+    assert doc["case_id"] == "demo" and decode_payload(doc["payload"]) == (initial, final)
@@ -0,0 +1,15 @@
+from rl_model.payload import decode_payload, encode_payload, visualizer_fragment
+
+
+def test_visualizer_payload_round_trip():
+    initial = "ACGTNacgt" + "ACGT" * 50
+    final = "T" + initial[1:-1] + "N"
+    for compress in (False, True, None):
+        token = encode_payload(initial, final, compress=compress)
+        assert decode_payload(token) == (initial, final)
+    assert decode_payload(encode_payload("")) == ("", "")
+    # 2 bits per base plus a few bytes of header and edits
+    assert len(encode_payload("ACGT" * 250, compress=False)) < 350
+
+    frag = visualizer_fragment(initial, final)
+    assert frag.startswith("p=") and decode_payload(frag[2:]) == (initial, final)
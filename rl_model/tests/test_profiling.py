@@ -0,0 +1,40 @@
+import pytest
+
+from rl_model.callbacks import FunctionCallback
+from rl_model.env import SequenceEnv
+from rl_model.profiling import PhaseStats, ProfilerCapture, RewardTrace
+from rl_model.train import train
+
+
+def test_train_instrumentation_and_profiler_capture():
+    _, _, scores = train(episodes=3, env=SequenceEnv(seq_len=10, max_edits=3))
+    assert isinstance(scores, RewardTrace) and scores.stats is None
+
+    _, _, scores = train(
+        episodes=4, env=SequenceEnv(seq_len=10, max_edits=3), instrument=True, profiler="cprofile"
+    )
+    stats = scores.stats
+    steps = stats.phases["step"].count
+    # a sampled noop can end an episode before max_edits
+    assert 4 <= steps <= 4 * 3 and stats.phases["update"].count == stats.phases["reset"].count == 4
+    for phase in ("mask", "encode", "forward", "sample", "reward"):
+        assert stats.phases[phase].count == steps
+    assert sum(p.total_ns for p in stats.phases.values()) <= stats.wall_ns
+    assert "select_action" in stats.capture.table()
+
+    p = PhaseStats()
+    for ns in (100, 200, 300, 5000):
+        p.add(ns)
+    assert p.percentile_ns(50) == 256 and p.percentile_ns(100) == 5000
+
+
+def test_profiler_capture_stops_when_training_raises():
+    def boom(episode, reward, env):
+        raise RuntimeError("callback failed")
+
+    capture = ProfilerCapture("cprofile", episodes=100)
+    with pytest.raises(RuntimeError):
+        train(episodes=3, env=SequenceEnv(seq_len=10, max_edits=3), profiler=capture,
+              callbacks=[FunctionCallback(boom)])
+    # the capture was ended (and its result collected) despite the error
+    assert capture.result is not None
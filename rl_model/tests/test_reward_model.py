@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from rl_model.env import SequenceEnv
+from rl_model.reward_model import RewardTracker, compute_reward
+
+
+@pytest.mark.parametrize("seq_len", [3, 4, 12, 60, 500])
+def test_tracker_matches_compute_reward(seq_len):
+    rng = random.Random(seq_len)
+    random.seed(seq_len)
+    env = SequenceEnv(seq_len=seq_len, max_edits=50)
+    motifs = ["AAA", "GATA", "A", "ACGTAC"]
+    tracker = RewardTracker(env, motifs=motifs)
+
+    for _ in range(3):
+        env.reset()
+        tracker.reset()
+        n_edits = 0
+        assert tracker.reward(n_edits) == compute_reward(
+            env.sequence, env.target_ft, env.target_tfl1, n_edits, motifs=motifs
+        )
+        for _ in range(40):
+            pos, base = rng.randrange(seq_len), rng.choice("ACGT")
+            env.step((pos, base))
+            tracker.edit(pos, base)
+            n_edits += 1
+            expected = compute_reward(
+                env.sequence, env.target_ft, env.target_tfl1, n_edits, motifs=motifs
+            )
+            assert tracker.reward(n_edits) == expected
+            assert tracker.seq.decode() == env.sequence
+
+
+def test_tracker_uses_case_motifs_and_custom_weights():
+    env = SequenceEnv(max_edits=8)
+    tracker = RewardTracker(env, w1=2.0, w4=0.1)
+    for pos, base in [(0, "A"), (5, "G"), (5, "G"), (59, "T"), (30, "C")]:
+        env.step((pos, base))
+        tracker.edit(pos, base)
+    expected = compute_reward(
+        env.sequence, env.target_ft, env.target_tfl1, 5, motifs=env.case.motifs, w1=2.0, w4=0.1
+    )
+    assert tracker.reward(5) == expected
+
+
+@pytest.mark.parametrize("seq_len", [3, 8, 60])
+def test_reward_model_batch_matches_compute_reward(seq_len):
+    import numpy as np
+
+    from rl_model.encoding import decode
+    from rl_model.reward_model import RewardModel
+
+    rng = np.random.default_rng(seq_len)
+    target_ft = decode(rng.integers(0, 4, seq_len))
+    target_tfl1 = decode(rng.integers(0, 4, seq_len))
+    motifs = ["AAA", "GATA", "A", "ACGTAC", "AN"]
+    model = RewardModel(target_ft, target_tfl1, motifs=motifs)
+
+    codes = rng.integers(0, 4, (200, seq_len), dtype=np.uint8)
+    n_edits = rng.integers(0, 10, 200)
+    got = model.score_batch(codes, n_edits)
+    expected = [
+        compute_reward(decode(c), target_ft, target_tfl1, int(n), motifs=motifs)
+        for c, n in zip(codes, n_edits)
+    ]
+    assert got.tolist() == expected
+
+
+def test_scorers_match_string_implementations():
+    from rl_model import scorers
+    from rl_model.reward_model import kmer_score, motif_value
+
+    ref = "AAGCCCAATAAACCACTCTGACTGGCCGAATAGG"
+    for seq in ["AAGCCCAATAGACCTATATGCCTGCCCGATTAGG", "AAGNNCAATAAACC", "aagcccaat"]:
+        assert scorers.ft_similarity(seq, ref) == kmer_score(seq, ref, k=3)
+        assert scorers.tfl1_similarity(seq, ref, k=4) == kmer_score(seq, ref, k=4)
+        assert scorers.motif_validator(seq) == motif_value(seq)
+        assert scorers.motif_validator(seq, ["GCC", "TT"]) == motif_value(seq, ["GCC", "TT"])
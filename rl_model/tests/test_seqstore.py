@@ -0,0 +1,63 @@
+import pickle
+
+import numpy as np
+
+from rl_model.encoding import N_CODE, encode, one_hot
+from rl_model.env import SequenceEnv, VecSequenceEnv
+from rl_model.reward_model import RewardModel, compute_reward
+from rl_model.seqstore import SequenceStore, SequenceView, fasta_records, write_store
+
+
+def _store(tmp_path, records):
+    path = str(tmp_path / "seqs.bsq")
+    write_store(path, records)
+    return SequenceStore(path)
+
+
+def test_round_trip_with_ambiguity_and_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    long_seq = "".join(rng.choice(list("ACGT"), size=1003))
+    store = _store(tmp_path, [
+        ("short", "ACGTNRAC"),
+        ("chunked", (long_seq[i:i + 61] for i in range(0, len(long_seq), 61))),
+        ("lower", "acgtn"),
+    ])
+    assert str(store["short"]) == "ACGTNNAC"
+    assert str(store["chunked"]) == long_seq
+    assert str(store["lower"]) == "ACGTN"
+    assert store.nbytes < len(long_seq) // 2
+
+    view = store.window("chunked", 5, 500)
+    assert str(view) == long_seq[5:500]
+    assert str(view[3:17]) == long_seq[8:22]
+    assert view[0] == long_seq[5] and view[-1] == long_seq[499]
+    # indexing follows str: ints and stepped slices give text, plain slices a view
+    assert isinstance(view[3:17], SequenceView)
+    assert view[::7] == long_seq[5:500:7] and view[10:2:-2] == long_seq[15:7:-2]
+    np.testing.assert_array_equal(np.asarray(view), encode(long_seq[5:500]))
+    assert np.asarray(store["short"])[4] == N_CODE
+    assert np.shares_memory(view.packed, store._packed)
+
+
+def test_fasta_and_pickled_views(tmp_path):
+    fasta = tmp_path / "genome.fa"
+    fasta.write_text(">chr1 first\nACGT\nTTGG\n>chr2\nNNCC\n")
+    store = _store(tmp_path, fasta_records(str(fasta)))
+    assert list(store) == ["chr1", "chr2"]
+    assert str(store["chr1"]) == "ACGTTTGG"
+    view = pickle.loads(pickle.dumps(store.window("chr1", 2, 7)))
+    assert str(view) == "GTTTG"
+
+
+def test_views_feed_env_reward_and_encoders(tmp_path):
+    store = _store(tmp_path, [("a", "ACGTACGTATGCCGATAA"), ("b", "TTGACCGATAGGCATACG")])
+    start, target, avoid = store["a"], store["b"], store.window("a", 0, 18)
+    env = SequenceEnv(target_ft=target, target_tfl1=avoid, start_sequence=start, max_edits=2, noise_prob=0.0)
+    assert env.sequence == str(start)
+    vec = VecSequenceEnv(2, target_ft=target, target_tfl1=avoid, start_sequence=start, noise_prob=0.0)
+    np.testing.assert_array_equal(vec.sequences[0], np.asarray(start))
+
+    expected = compute_reward(str(start), str(target), str(avoid), 0)
+    assert compute_reward(start, target, avoid, 0) == expected
+    assert np.isclose(RewardModel(target, avoid).score(start), expected)
+    assert one_hot(start).shape == (18 * 4,)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from rl_model import visualize
+from rl_model.visualize import (
+    animate_edit_history,
+    edit_deltas,
+    helix_coords,
+    plot_sequence_3d,
+    sequence_to_coords,
+    window_values,
+)
+
+
+def test_edit_animation_uses_deltas_and_shared_offline_bundle(tmp_path):
+    assert edit_deltas("AAAA", [(0, "G"), (2, "C"), (0, "T")]) == [(0, "G", "A"), (2, "C", "A"), (0, "T", "G")]
+
+    seq = "ACGT" * 250
+    edits = [(i * 7 % len(seq), "ACGT"[i % 4]) for i in range(200)]
+    out = tmp_path / "edits.html"
+    animate_edit_history(seq, edits, out_html=str(out), include_plotlyjs="directory")
+    plot_sequence_3d(seq, out_html=str(tmp_path / "seq.html"), include_plotlyjs="directory")
+    html = out.read_text()
+    assert "cdn.plot.ly" not in html and 'src="plotly.min.js"' in html
+    # coordinates are written once, not once per frame
+    assert "addFrames" not in html
+    assert out.stat().st_size < 300_000
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["edits.html", "plotly.min.js", "seq.html"]
+
+
+def test_helix_coords_cached_and_lod_view(tmp_path, monkeypatch):
+    xs, ys, zs = sequence_to_coords("ACGTA")
+    assert np.allclose(zs, np.arange(5) * 3.4) and np.isclose(xs[0], 10.0)
+    assert helix_coords(5) is helix_coords(5) and not helix_coords(5).flags.writeable
+
+    assert np.allclose(window_values("GGAATTCC", 4), [0.5, 0.5])
+    assert np.allclose(window_values("AAAAAAAAAA", 4, "edits", [(1, "G"), (1, "C"), (9, "T")]), [0.25, 0, 0.5])
+
+    seq = "ACGT" * 2500
+    out = tmp_path / "lod.html"
+    plot_sequence_3d(seq, out_html=str(out), include_plotlyjs=False, edits=[(5000, "G")], focus=3)
+    html = out.read_text()
+    assert "focus bases" in html and '"4997: C"' in html and '"5004: A"' not in html
+    assert out.stat().st_size < 100_000
+
+    # helix parameters reach both the segment axis and the focus bases
+    figs = []
+    monkeypatch.setattr(visualize, "_write_html", lambda fig, *args, **kwargs: figs.append(fig))
+    plot_sequence_3d(seq, edits=[(5000, "G")], focus=0, rise=1.0, radius=2.0)
+    axis, bases = figs[0].data
+    assert np.asarray(axis.z).max() == len(seq) - 1
+    assert list(bases.z) == [5000.0] and np.isclose(np.hypot(bases.x[0], bases.y[0]), 2.0)
@@ -1,8 +1,28 @@
-from .env import SequenceEnv
+from .env import SequenceEnv, VecSequenceEnv
 from .agent import ReinforceAgent
-from .reward_model import compute_reward
-import time
-from typing import List, Optional, Tuple
+from .callbacks import CallbackList, PrintLogger
+from .constraints import ActionConstraints
+from .profiling import NULL_TIMER, PhaseTimer, ProfilerCapture, RewardTrace
+from .reward_model import RewardModel, RewardTracker
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+
+def _make_constraints(seq_len, mask_actions, forbidden, edit_budget) -> Optional[ActionConstraints]:
+    if not (mask_actions or forbidden or edit_budget is not None):
+        return None
+    return ActionConstraints(
+        seq_len, forbidden=forbidden, max_edits=edit_budget, mask_same_base=mask_actions
+    )
+
+
+def _reached(scores: List[float], target: Optional[float], window: int = 20) -> bool:
+    """True once the mean of the last ``window`` episode rewards hits ``target``."""
+    if target is None or len(scores) < window:
+        return False
+    return sum(scores[-window:]) / window >= target
 
 
 def train(
@@ -11,51 +31,292 @@ def train(
     max_edits: int = 10,
     env: Optional[SequenceEnv] = None,
     case_id: Optional[str] = None,
+    target_reward: Optional[float] = None,
+    mask_actions: bool = True,
+    forbidden: Optional[List[int]] = None,
+    edit_budget: Optional[int] = None,
+    policy: str = "mlp",
+    agent: Optional[ReinforceAgent] = None,
+    callbacks=None,
+    instrument: bool = False,
+    profiler: Union[None, str, ProfilerCapture] = None,
+    first_episode: int = 0,
 ) -> Tuple[ReinforceAgent, SequenceEnv, List[float]]:
-    """Run training and return the agent, final env, and reward trace."""
-    env = env or SequenceEnv(seq_len=seq_len, max_edits=max_edits, case_id=case_id)
-    agent = ReinforceAgent(seq_len=env.seq_len)
-    episode_scores: List[float] = []
+    """Run training and return the agent, final env, and reward trace.
+
+    Stops early once the rolling mean episode reward reaches ``target_reward``.
+    With ``mask_actions`` the policy never samples same-base rewrites, the
+    ``forbidden`` positions, or edits beyond ``edit_budget``. ``policy``
+    picks the network (``"mlp"`` or the length-independent ``"conv"``).
+    Pass a trained ``agent`` to warm-start from it instead (``policy`` is
+    then ignored). ``callbacks`` subscribe to progress (see
+    ``rl_model.callbacks``); an ``on_episode_end`` returning True stops
+    training early. The loop itself never prints. ``first_episode`` offsets
+    the episode indices callbacks see, so a resumed run keeps counting from
+    where the earlier one stopped.
+
+    With ``instrument`` every step is split into mask/encode/forward/sample/
+    step/reward phases (plus reset and update per episode) and the returned
+    trace is a ``RewardTrace`` whose ``.stats`` holds the per-phase totals
+    and histograms. ``profiler`` (``"cprofile"``, ``"torch"`` or a
+    ``ProfilerCapture``) additionally profiles the first episodes; the capture
+    ends up in ``stats.capture``. See ``rl_model.profiling``.
+    """
+    # the policy reads the env's in-place one-hot tensor; no per-step encode
+    env = env or SequenceEnv(seq_len=seq_len, max_edits=max_edits, case_id=case_id, obs_mode="one_hot")
+    agent = agent or ReinforceAgent(seq_len=env.seq_len, policy=policy)
+    episode_scores = RewardTrace()
     motifs = env.case.motifs if env.case else None
+    tracker = RewardTracker(env, motifs=motifs)
+    constraints = _make_constraints(env.seq_len, mask_actions, forbidden, edit_budget)
+    cbs = CallbackList(callbacks)
+    timer = PhaseTimer() if instrument else NULL_TIMER
+    if isinstance(profiler, str):
+        profiler = ProfilerCapture(profiler)
+    if profiler is not None:
+        profiler.begin()
+
+    # the capture must not stay enabled in the caller if a callback or the env raises
+    try:
+        for ep in range(episodes):
+            t = timer.start()
+            obs = env.reset()
+            tracker.reset()
+            log_probs = []
+            rewards = []
+            n_edits = 0
+            done = False
+            prev_score = tracker.reward(n_edits)
+            # built once per episode, then patched in place after every edit
+            action_mask = constraints.mask(env.codes) if constraints else None
+            timer.lap("reset", t)
+
+            while not done:
+                action, lp = agent.select_action(obs, action_mask, timer)
+                t = timer.start()
+                env_action = agent.action_to_env(action)
+                obs, _, done, _ = env.step(env_action)
+                t = timer.lap("step", t)
+                if env_action is not None:
+                    n_edits += 1
+                    tracker.edit(*env_action)
+                current_score = tracker.reward(n_edits)
+                t = timer.lap("reward", t)
+                if constraints and env_action is not None:
+                    pos = env_action[0]
+                    constraints.apply_edit(action_mask, pos, int(env.codes[pos]), n_edits)
+                timer.lap("mask", t)
+                shaped_reward = current_score - prev_score
+                prev_score = current_score
+                log_probs.append(lp)
+                rewards.append(shaped_reward)
+
+            # small push to ensure we keep learning even if only noop happened
+            if not rewards:
+                rewards = [prev_score]
+
+            t = timer.start()
+            loss = agent.update(log_probs, rewards)
+            timer.lap("update", t)
+            episode_scores.append(prev_score)
+            if profiler is not None:
+                profiler.episode_end(ep)
+            if cbs:
+                i = first_episode + ep
+                if cbs.is_best(prev_score):
+                    cbs.on_best(i, prev_score, env.sequence)
+                cbs.on_update(i, {"loss": loss, "reward": prev_score, "episodes": i + 1})
+                if cbs.on_episode_end(i, prev_score, env):
+                    break
+            if _reached(episode_scores, target_reward):
+                break
+    finally:
+        if profiler is not None:
+            profiler.end()
+    if instrument or profiler is not None:
+        episode_scores.stats = (timer if instrument else PhaseTimer()).stats(profiler)
+    return agent, env, episode_scores
+
+
+def collect_rollout(agent, env, model, obs_buf, act_buf, rew_buf, mask_buf, constraints=None):
+    """Roll out one graph-free episode per slot of ``env`` into ``(B, T, ...)`` buffers.
+
+    ``env`` must not auto-reset. Actions are sampled under ``constraints``
+    masks when given. Returns the number of steps taken and the final reward
+    of every episode.
+    """
+    obs = env.reset()
+    n_edits = np.zeros(env.num_envs, dtype=np.int64)
+    prev_score = model.score_batch(obs, n_edits)
+    mask_buf[:] = False
+    t = 0
+    while not env.done.all():
+        active = ~env.done
+        obs_buf[:, t] = obs
+        action_mask = constraints.mask(obs, n_edits) if constraints else None
+        actions = agent.act(obs, action_mask)
+        act_buf[:, t] = actions.numpy()
+        env_actions = agent.actions_to_env_batch(actions)
+        obs, _, _, _ = env.step(env_actions)
+        n_edits += active & (env_actions[:, 0] >= 0)
+        current_score = model.score_batch(obs, n_edits)
+        rew_buf[:, t] = current_score - prev_score
+        mask_buf[:, t] = active
+        prev_score = current_score
+        t += 1
+    return t, prev_score
+
 
-    for ep in range(episodes):
-        obs = env.reset()
-        log_probs = []
-        rewards = []
-        n_edits = 0
-        done = False
-        prev_score = compute_reward(
-            env.sequence, env.target_ft, env.target_tfl1, n_edits, motifs=motifs
+def train_batched(
+    episodes: int = 200,
+    batch_size: int = 16,
+    seq_len: Optional[int] = None,
+    max_edits: int = 10,
+    env: Optional[VecSequenceEnv] = None,
+    case_id: Optional[str] = None,
+    gamma: float = 0.99,
+    baseline: str = "mean",
+    normalize: bool = True,
+    lr: float = 1e-3,
+    target_reward: Optional[float] = None,
+    seed: Optional[int] = None,
+    graph_free: bool = True,
+    num_workers: int = 0,
+    mask_actions: bool = True,
+    forbidden: Optional[List[int]] = None,
+    edit_budget: Optional[int] = None,
+    policy: str = "mlp",
+    callbacks=None,
+) -> Tuple[ReinforceAgent, VecSequenceEnv, List[float]]:
+    """REINFORCE with ``batch_size`` episodes per optimizer step.
+
+    Episodes are rolled out in lockstep on a ``VecSequenceEnv`` and scored with
+    ``RewardModel.score_batch``; the shaped rewards match ``train``. Returns the
+    agent, the vectorized env and the per-episode reward trace.
+
+    With ``graph_free`` the rollout runs under ``torch.inference_mode`` and only
+    uint8 observations and action indices are kept; log-probs are recomputed
+    in one batched forward at update time, so memory no longer grows with
+    autograd graphs per step. Otherwise every step keeps its graph alive.
+
+    ``num_workers > 0`` moves the (graph-free) rollouts into a
+    :class:`~rl_model.parallel.RolloutWorkerPool`; ``batch_size`` is split
+    evenly across the workers (rounded up) and the learner stays in this process.
+
+    ``mask_actions``, ``forbidden``, ``edit_budget``, ``policy`` and
+    ``callbacks`` work as in ``train``; ``on_update`` fires once per batch.
+    """
+    env = env or VecSequenceEnv(
+        batch_size, seq_len=seq_len, max_edits=max_edits, case_id=case_id,
+        autoreset=False, seed=seed,
+    )
+    if env.autoreset:
+        raise ValueError("train_batched needs a VecSequenceEnv with autoreset=False")
+    if num_workers and not graph_free:
+        raise ValueError("rollout workers only support graph_free=True")
+    agent = ReinforceAgent(seq_len=env.seq_len, lr=lr, policy=policy)
+    model = RewardModel.from_env(env)
+    constraints = _make_constraints(env.seq_len, mask_actions, forbidden, edit_budget)
+    opts = dict(gamma=gamma, baseline=baseline, normalize=normalize)
+    episode_scores: List[float] = []
+    cbs = CallbackList(callbacks)
+
+    pool = None
+    if num_workers:
+        from .parallel import RolloutWorkerPool
+
+        pool = RolloutWorkerPool.from_env(
+            env, num_workers, -(-env.num_envs // num_workers), seed=seed,
+            agent_kwargs=dict(policy=policy), policy=agent.policy, constraints=constraints,
         )
+        batch_size = pool.num_envs
+    else:
+        batch_size = env.num_envs
+        obs_buf = np.empty((batch_size, env.max_edits, env.seq_len), dtype=np.uint8)
+        act_buf = np.zeros((batch_size, env.max_edits), dtype=np.int64)
+        rew_buf = np.zeros((batch_size, env.max_edits), dtype=np.float64)
+        mask_buf = np.zeros((batch_size, env.max_edits), dtype=bool)
+
+    update = 0
+    try:
+        while len(episode_scores) < episodes:
+            if pool is not None:
+                pool.broadcast(agent.policy)
+                t, final_score, (obs_buf, act_buf, rew_buf, mask_buf) = pool.rollout()
+            elif graph_free:
+                t, final_score = collect_rollout(
+                    agent, env, model, obs_buf, act_buf, rew_buf, mask_buf, constraints
+                )
+            else:
+                t, final_score, log_probs = _collect_with_graph(
+                    agent, env, model, rew_buf, mask_buf, constraints
+                )
 
-        while not done:
-            action, lp = agent.select_action(obs)
-            env_action = agent.action_to_env(action)
-            obs, _, done, _ = env.step(env_action)
-            if env_action is not None:
-                n_edits += 1
-            current_score = compute_reward(
-                env.sequence, env.target_ft, env.target_tfl1, n_edits, motifs=motifs
-            )
-            shaped_reward = current_score - prev_score
-            prev_score = current_score
-            log_probs.append(lp)
-            rewards.append(shaped_reward)
-
-        # small push to ensure we keep learning even if only noop happened
-        if not rewards:
-            rewards = [prev_score]
-
-        agent.update(log_probs, rewards)
-        episode_scores.append(prev_score)
-        if ep % 20 == 0:
-            print(
-                f"Episode {ep:3d}: reward={prev_score:+.4f} edits={n_edits} seq={env.sequence}"
-            )
-        time.sleep(0.01)
+            # the last batch only trains on (and reports) the episodes still owed
+            n = min(len(final_score), episodes - len(episode_scores))
+            final_score = final_score[:n]
+            rewards_t = torch.from_numpy(rew_buf[:n, :t])
+            masks_t = torch.from_numpy(mask_buf[:n, :t])
+            if graph_free:
+                loss = agent.update_from_rollout(
+                    obs_buf[:n, :t], act_buf[:n, :t], rewards_t, masks_t, constraints=constraints, **opts
+                )
+            else:
+                loss = agent.update_batch(log_probs[:n], rewards_t, masks_t, **opts)
+            first = len(episode_scores)
+            episode_scores.extend(final_score.tolist())
+            if cbs and _notify_batch(cbs, update, first, final_score, loss, None if pool else env):
+                break
+            update += 1
+            if _reached(episode_scores, target_reward, window=max(20, batch_size)):
+                break
+    finally:
+        if pool is not None:
+            pool.close()
 
     return agent, env, episode_scores
 
 
+def _notify_batch(cbs, update, first, final_score, loss, env) -> bool:
+    """Fire the per-batch hooks; ``env`` (if local) supplies the best sequence."""
+    best = int(np.argmax(final_score))
+    if cbs.is_best(float(final_score[best])):
+        cbs.on_best(first + best, float(final_score[best]), env.get_sequence(best) if env is not None else None)
+    cbs.on_update(update, {
+        "loss": float(loss),
+        "reward": float(final_score.mean()),
+        "best_reward": float(final_score[best]),
+        "episodes": first + len(final_score),
+    })
+    stop = False
+    for i, score in enumerate(final_score.tolist()):
+        stop = bool(cbs.on_episode_end(first + i, score, env)) or stop
+    return stop
+
+
+def _collect_with_graph(agent, env, model, rew_buf, mask_buf, constraints=None):
+    """Like ``collect_rollout`` but keeps every step's autograd graph alive."""
+    obs = env.reset()
+    n_edits = np.zeros(env.num_envs, dtype=np.int64)
+    prev_score = model.score_batch(obs, n_edits)
+    mask_buf[:] = False
+    log_probs = []
+    t = 0
+    while not env.done.all():
+        active = ~env.done
+        action_mask = constraints.mask(obs, n_edits) if constraints else None
+        actions, lp = agent.select_actions(obs, action_mask)
+        log_probs.append(lp)
+        env_actions = agent.actions_to_env_batch(actions)
+        obs, _, _, _ = env.step(env_actions)
+        n_edits += active & (env_actions[:, 0] >= 0)
+        current_score = model.score_batch(obs, n_edits)
+        rew_buf[:, t] = current_score - prev_score
+        mask_buf[:, t] = active
+        prev_score = current_score
+        t += 1
+    return t, prev_score, torch.stack(log_probs, dim=1)
+
+
 if __name__ == "__main__":
-    train(episodes=30)
+    train(episodes=30, callbacks=PrintLogger())
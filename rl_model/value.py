@@ -6,6 +6,8 @@ Provides a minimal value network to estimate V(s) from encoder features.
 import torch
 import torch.nn as nn
 
+from .encoding import as_model_input
+
 
 class ValueHead(nn.Module):
     def __init__(self, input_dim):
@@ -17,4 +19,5 @@ class ValueHead(nn.Module):
         )
 
     def forward(self, x):
-        return self.net(x).squeeze(-1)
+        # raw sequences are one-hot encoded (input_dim must then be seq_len * 4)
+        return self.net(as_model_input(x)).squeeze(-1)
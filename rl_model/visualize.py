@@ -20,14 +20,33 @@ Usage examples:
     # a CSV or simple string and pass via --edits
 
 The animation works by creating a helix path and coloring bases by type.
-Each frame represents the sequence after each successive edit.
+Coordinates, colors and labels are written once for the initial sequence;
+each frame is a single ``(pos, new base, previous base)`` delta that a small
+script applies with ``Plotly.restyle``, so output size grows with L + E
+rather than L * E.
+
+Every writer takes ``include_plotlyjs`` (see ``plotly.io.write_html``). The
+default ``"cdn"`` loads plotly from the CDN; ``"directory"`` (``--offline``)
+writes one ``plotly.min.js`` per output directory and all HTML files there
+share it.
+
+Long sequences: ``plot_sequence_3d`` switches to a level-of-detail view above
+``LOD_THRESHOLD`` bases. The sequence is drawn as at most ``max_segments``
+colored segments along the helix axis (GC content or edit density per
+window), and individual bases with labels appear only in focus windows
+around edited positions. Its cost depends on the segment and focus counts,
+not on L.
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
+import json
 import math
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
 
 try:
     import plotly.graph_objects as go
@@ -44,17 +63,29 @@ BASE_COLORS = {
 }
 
 
+# plot_sequence_3d(lod="auto") switches to windowed segments above this length
+LOD_THRESHOLD = 2000
+
+
+@functools.lru_cache(maxsize=16)
+def helix_coords(n: int, rise=3.4, bases_per_turn=10.5, radius=10.0) -> np.ndarray:
+    """Read-only ``(3, n)`` array of helix x/y/z per base index; cached per shape."""
+    coords = _helix_points(np.arange(n, dtype=np.float64), rise, bases_per_turn, radius)
+    coords.flags.writeable = False
+    return coords
+
+
+def _helix_points(idx: np.ndarray, rise=3.4, bases_per_turn=10.5, radius=10.0) -> np.ndarray:
+    angle = (2 * math.pi / bases_per_turn) * idx
+    return np.stack([radius * np.cos(angle), radius * np.sin(angle), rise * idx])
+
+
 def sequence_to_coords(seq: str, rise=3.4, bases_per_turn=10.5, radius=10.0):
-    """Return (x,y,z) coords for each base along a simple helical path."""
-    xs, ys, zs = [], [], []
-    for i in range(len(seq)):
-        angle = 2 * math.pi * (i / bases_per_turn)
-        x = radius * math.cos(angle)
-        y = radius * math.sin(angle)
-        z = i * rise
-        xs.append(x)
-        ys.append(y)
-        zs.append(z)
+    """Return (x,y,z) coords for each base along a simple helical path.
+
+    The arrays are read-only views into the ``helix_coords`` cache.
+    """
+    xs, ys, zs = helix_coords(len(seq), rise, bases_per_turn, radius)
     return xs, ys, zs
 
 
@@ -62,7 +93,8 @@ def build_snapshots(initial_seq: str, edits: List[Tuple[int, str]]):
     """Return a list of sequence snapshots starting with initial_seq and
     applying edits sequentially.
 
-    edits: list of (pos, base) tuples.
+    edits: list of (pos, base) tuples. This materializes every snapshot
+    (O(L * E)); ``edit_deltas`` is the compact form used for animation.
     """
     snapshots = [list(initial_seq)]
     cur = list(initial_seq)
@@ -73,43 +105,173 @@ def build_snapshots(initial_seq: str, edits: List[Tuple[int, str]]):
     return ["".join(s) for s in snapshots]
 
 
-def plot_sequence_3d(seq: str, out_html: str = "sequence.html"):
-    xs, ys, zs = sequence_to_coords(seq)
-    colors = [BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in seq]
+def edit_deltas(initial_seq: str, edits: List[Tuple[int, str]]) -> List[Tuple[int, str, str]]:
+    """Return ``(pos, new_base, previous_base)`` per edit, so frames can be
+    stepped forwards and backwards without storing snapshots."""
+    cur = list(initial_seq)
+    deltas = []
+    for pos, base in edits:
+        pos = int(pos)
+        deltas.append((pos, base, cur[pos]))
+        cur[pos] = base
+    return deltas
 
-    fig = go.Figure()
-    # backbone line
-    fig.add_trace(go.Scatter3d(x=xs, y=ys, z=zs, mode="lines", line=dict(color="#444444", width=4), name="backbone"))
-    # bases
-    fig.add_trace(go.Scatter3d(x=xs, y=ys, z=zs, mode="markers+text", marker=dict(size=8, color=colors), text=list(seq), textposition="top center", name="bases"))
 
-    fig.update_layout(scene=dict(xaxis=dict(visible=False), yaxis=dict(visible=False), zaxis=dict(title="base index")), title="Sequence 3D (helix-like)")
-    fig.write_html(out_html, include_plotlyjs="cdn")
+def _write_html(fig, out_html: str, include_plotlyjs: Union[str, bool], post_script=None):
+    fig.write_html(out_html, include_plotlyjs=include_plotlyjs, post_script=post_script)
     print(f"Wrote {out_html}")
 
 
-def animate_edit_history(initial_seq: str, edits: List[Tuple[int, str]], out_html: str = "edits.html"):
-    snapshots = build_snapshots(initial_seq, edits)
-    xs, ys, zs = sequence_to_coords(snapshots[0])
+# Steps the "bases" trace (index 1) through the edit deltas. Frame k is the
+# sequence after k edits; driven by the Play/Pause buttons and the slider.
+_PLAYER_JS = """
+var gd = document.getElementById('{plot_id}');
+var cfg = __CONFIG__;
+var colors = gd.data[1].marker.color.slice();
+var text = gd.data[1].text.slice();
+var cur = 0, timer = null;
+function paint(i, b) { colors[i] = cfg.colors[b] || cfg.colors.N; text[i] = b; }
+function show(k) {
+    k = Math.max(0, Math.min(k, cfg.edits.length));
+    while (cur < k) { var e = cfg.edits[cur++]; paint(e[0], e[1]); }
+    while (cur > k) { var e = cfg.edits[--cur]; paint(e[0], e[2]); }
+    return Plotly.restyle(gd, {'marker.color': [colors.slice()], 'text': [text.slice()]}, [1]);
+}
+function stop() { if (timer) { clearInterval(timer); timer = null; } }
+function tick() {
+    if (cur >= cfg.edits.length) { stop(); return; }
+    show(cur + 1);
+    Plotly.relayout(gd, {'sliders[0].active': cur});
+}
+gd.on('plotly_buttonclicked', function (ev) {
+    stop();
+    if (ev.button.label === 'Play') {
+        if (cur >= cfg.edits.length) { show(0); }
+        timer = setInterval(tick, cfg.ms);
+    }
+});
+gd.on('plotly_sliderchange', function (ev) {
+    if (ev.interaction) { stop(); show(parseInt(ev.step.value, 10)); }
+});
+"""
+
+
+def window_values(seq: str, window: int, color_by: str = "gc", edits: Optional[Iterable[Tuple[int, str]]] = None) -> np.ndarray:
+    """Per-window GC fraction (``"gc"``) or fraction of edited positions (``"edits"``)."""
+    n = len(seq)
+    starts = np.arange(0, n, window)
+    sizes = np.minimum(starts + window, n) - starts
+    if color_by == "gc":
+        raw = np.frombuffer(seq.upper().encode("ascii"), dtype=np.uint8)
+        hits = ((raw == ord("G")) | (raw == ord("C"))).astype(np.int64)
+        return np.add.reduceat(hits, starts) / sizes
+    if color_by == "edits":
+        positions = np.unique(np.fromiter((int(p) for p, _ in edits or ()), dtype=np.int64))
+        return np.bincount(positions // window, minlength=len(starts))[: len(starts)] / sizes
+    raise ValueError("color_by must be 'gc' or 'edits'")
+
+
+def _focus_positions(n: int, edits, focus: int) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    for pos, _ in edits or ():
+        mask[max(0, int(pos) - focus): int(pos) + focus + 1] = True
+    return np.flatnonzero(mask)
+
+
+def plot_sequence_3d(
+    seq: str,
+    out_html: str = "sequence.html",
+    include_plotlyjs: Union[str, bool] = "cdn",
+    edits: Optional[List[Tuple[int, str]]] = None,
+    lod: Union[str, bool] = "auto",
+    color_by: str = "gc",
+    max_segments: int = 400,
+    focus: int = 10,
+    rise=3.4,
+    bases_per_turn=10.5,
+    radius=10.0,
+):
+    """Write a 3D helix view of ``seq``.
+
+    ``lod`` is True, False or ``"auto"`` (on above ``LOD_THRESHOLD`` bases).
+    The level-of-detail view colors up to ``max_segments`` windows by
+    ``color_by`` (``"gc"`` or ``"edits"``, which needs ``edits``) and labels
+    only the bases within ``focus`` of an edited position. ``rise``,
+    ``bases_per_turn`` and ``radius`` shape the helix in both views.
+    """
+    helix = (rise, bases_per_turn, radius)
+    if lod == "auto":
+        lod = len(seq) > LOD_THRESHOLD
+    if lod:
+        fig = _lod_figure(seq, edits, color_by, max_segments, focus, helix)
+    else:
+        xs, ys, zs = sequence_to_coords(seq, *helix)
+        colors = [BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in seq]
+
+        fig = go.Figure()
+        # backbone line
+        fig.add_trace(go.Scatter3d(x=xs, y=ys, z=zs, mode="lines", line=dict(color="#444444", width=4), name="backbone"))
+        # bases
+        fig.add_trace(go.Scatter3d(x=xs, y=ys, z=zs, mode="markers+text", marker=dict(size=8, color=colors), text=list(seq), textposition="top center", name="bases"))
 
-    # Create base frame (initial)
-    init_colors = [BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in snapshots[0]]
+    fig.update_layout(scene=dict(xaxis=dict(visible=False), yaxis=dict(visible=False), zaxis=dict(title="base index")), title="Sequence 3D (helix-like)")
+    _write_html(fig, out_html, include_plotlyjs)
+
+
+def _lod_figure(seq: str, edits, color_by: str, max_segments: int, focus: int, helix=(3.4, 10.5, 10.0)):
+    rise = helix[0]
+    n = len(seq)
+    window = max(1, -(-n // max_segments))
+    values = window_values(seq, window, color_by, edits)
+    starts = np.arange(0, n, window)
+    ends = np.minimum(starts + window, n)
+
+    # each window is one flat-colored segment along the axis: two vertices
+    # per window, carrying the window's value
+    z = np.empty(2 * len(starts))
+    z[0::2], z[1::2] = starts * rise, (ends - 1) * rise
+    colors = np.repeat(values, 2)
+    label = "GC" if color_by == "gc" else "edited"
+    hover = [f"{a}-{b - 1}: {label} {v:.0%}" for a, b, v in zip(starts.tolist(), ends.tolist(), values.tolist())]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter3d(
+        x=np.zeros_like(z), y=np.zeros_like(z), z=z, mode="lines",
+        line=dict(color=colors, colorscale="Viridis", cmin=0.0, cmax=1.0, width=12,
+                  colorbar=dict(title=f"{label} / {window} bp")),
+        text=np.repeat(hover, 2).tolist(), hoverinfo="text", name=f"{label} ({window} bp windows)",
+    ))
+
+    idx = _focus_positions(n, edits, focus)
+    if len(idx):
+        xs, ys, zs = _helix_points(idx.astype(np.float64), *helix)
+        bases = [seq[i] for i in idx.tolist()]
+        fig.add_trace(go.Scatter3d(
+            x=xs, y=ys, z=zs, mode="markers+text",
+            marker=dict(size=6, color=[BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in bases]),
+            text=bases, hovertext=[f"{i}: {b}" for i, b in zip(idx.tolist(), bases)], hoverinfo="text",
+            textposition="top center", name="focus bases",
+        ))
+    return fig
+
+
+def animate_edit_history(
+    initial_seq: str,
+    edits: List[Tuple[int, str]],
+    out_html: str = "edits.html",
+    include_plotlyjs: Union[str, bool] = "cdn",
+    frame_ms: int = 600,
+):
+    deltas = edit_deltas(initial_seq, edits)
+    xs, ys, zs = sequence_to_coords(initial_seq)
+
+    init_colors = [BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in initial_seq]
     data = [
         go.Scatter3d(x=xs, y=ys, z=zs, mode="lines", line=dict(color="#444444", width=4), name="backbone"),
-        go.Scatter3d(x=xs, y=ys, z=zs, mode="markers+text", marker=dict(size=8, color=init_colors), text=list(snapshots[0]), textposition="top center", name="bases"),
+        go.Scatter3d(x=xs, y=ys, z=zs, mode="markers+text", marker=dict(size=8, color=init_colors), text=list(initial_seq), textposition="top center", name="bases"),
     ]
+    fig = go.Figure(data=data)
 
-    frames = []
-    for idx, snap in enumerate(snapshots):
-        colors = [BASE_COLORS.get(b.upper(), BASE_COLORS["N"]) for b in snap]
-        frames.append(go.Frame(data=[
-            go.Scatter3d(x=xs, y=ys, z=zs, mode="lines", line=dict(color="#444444", width=4)),
-            go.Scatter3d(x=xs, y=ys, z=zs, mode="markers+text", marker=dict(size=8, color=colors), text=list(snap), textposition="top center"),
-        ], name=f"frame{idx}"))
-
-    fig = go.Figure(data=data, frames=frames)
-
-    # Animation controls
+    # Animation controls; "skip" leaves the actual work to _PLAYER_JS
     fig.update_layout(
         updatemenus=[
             dict(
@@ -120,16 +282,24 @@ def animate_edit_history(initial_seq: str, edits: List[Tuple[int, str]], out_htm
                 xanchor="right",
                 yanchor="top",
                 buttons=[
-                    dict(label="Play", method="animate", args=[None, dict(frame=dict(duration=600, redraw=True), fromcurrent=True, mode="immediate")]),
-                    dict(label="Pause", method="animate", args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+                    dict(label="Play", method="skip", args=[None]),
+                    dict(label="Pause", method="skip", args=[None]),
                 ],
             )
-        ]
+        ],
+        sliders=[
+            dict(
+                active=0,
+                currentvalue=dict(prefix="edit "),
+                steps=[dict(label=str(k), value=str(k), method="skip", args=[None]) for k in range(len(deltas) + 1)],
+            )
+        ],
     )
 
     fig.update_layout(scene=dict(xaxis=dict(visible=False), yaxis=dict(visible=False), zaxis=dict(title="base index")), title="Edit history animation")
-    fig.write_html(out_html, include_plotlyjs="cdn")
-    print(f"Wrote {out_html}")
+    config = {"edits": deltas, "colors": {b: c for b, c in BASE_COLORS.items()}, "ms": frame_ms}
+    player = _PLAYER_JS.replace("__CONFIG__", json.dumps(config, separators=(",", ":")))
+    _write_html(fig, out_html, include_plotlyjs, post_script=player)
 
 
 def parse_edits_string(s: str) -> List[Tuple[int, str]]:
@@ -150,16 +320,27 @@ def _cli():
     p.add_argument("--sequence", help="Initial sequence (required for edits or single view)")
     p.add_argument("--edits", help="Comma-separated edits like '0:G,3:C,5:T' (optional)")
     p.add_argument("--out", default="sequence.html", help="Output HTML file")
+    p.add_argument("--final", action="store_true", help="With --edits: draw one (level-of-detail) view instead of animating")
+    p.add_argument("--lod", choices=["auto", "on", "off"], default="auto", help="Windowed view for long sequences")
+    p.add_argument("--color-by", choices=["gc", "edits"], default="gc", help="Window coloring in the level-of-detail view")
+    p.add_argument("--offline", action="store_true", help="Write/share plotly.min.js next to the output instead of using the CDN")
     args = p.parse_args()
+    plotlyjs = "directory" if args.offline else "cdn"
+    edits = parse_edits_string(args.edits) if args.edits else None
 
     if not args.sequence:
         p.error("--sequence is required")
 
-    if args.edits:
-        edits = parse_edits_string(args.edits)
-        animate_edit_history(args.sequence, edits, out_html=args.out)
+    if edits and not args.final:
+        animate_edit_history(args.sequence, edits, out_html=args.out, include_plotlyjs=plotlyjs)
     else:
-        plot_sequence_3d(args.sequence, out_html=args.out)
+        final = list(args.sequence)
+        for pos, base in edits or ():
+            final[pos] = base
+        plot_sequence_3d(
+            "".join(final), out_html=args.out, include_plotlyjs=plotlyjs, edits=edits,
+            lod={"auto": "auto", "on": True, "off": False}[args.lod], color_by=args.color_by,
+        )
 
 
 if __name__ == "__main__":
@@ -1,47 +1,26 @@
-"""Test script to verify the HTTP server works with query parameters."""
-import http.server
-import socketserver
+"""Test script to verify the shared local server serves the visualizer with a payload."""
 import webbrowser
-import time
-import threading
-from functools import partial
-import os
+
+from rl_model.local_server import ensure_server, visualizer_url
+
+# a manual check (starts a background server, opens a browser); keep pytest
+# from collecting test_server() when run from the repo root
+__test__ = False
 
 def test_server():
-    # Get the current directory
-    directory = os.path.dirname(os.path.abspath(__file__))
-    
-    # Create handler
-    handler = partial(http.server.SimpleHTTPRequestHandler, directory=directory)
-    
-    # Start server
-    port = 8765
-    httpd = socketserver.TCPServer(("", port), handler)
+    # Starts rl_model.local_server in the background, or reuses the running one
+    client = ensure_server()
+    print(f"Server running at {client.base_url} (pid {client.health()['pid']})")
     
-    # Start server in background
-    server_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    server_thread.start()
-    
-    print(f"Server started on http://localhost:{port}")
-    
-    # Test URL with parameters
-    test_url = f"http://localhost:{port}/sequence_transformation_viz.html?initial=ACGTACGT&target=TGCATGCA"
+    # Test URL with a compact payload
+    test_url = visualizer_url(client, "ACGTACGT", "TGCATGCA")
     print(f"Opening: {test_url}")
     
-    # Give server a moment to start
-    time.sleep(0.5)
-    
     # Open browser
     webbrowser.open_new_tab(test_url)
     
-    print("\nServer is running. Press Ctrl+C to stop.")
-    
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("\nShutting down...")
-        httpd.shutdown()
+    print("\nThe server keeps running in the background and is shared by the GUI")
+    print("and demo.py; it exits after an hour idle.")
 
 if __name__ == "__main__":
     test_server()